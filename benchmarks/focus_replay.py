@@ -0,0 +1,547 @@
+# --- PATH: GameFocusManager/benchmarks/focus_replay.py ---
+"""
+Replays focus traces through the worker's focus -> classify -> schedule ->
+actuate path and measures what it costs.
+
+The worker runs unmodified against stand-ins: a fixture /proc tree in a
+temp dir, a temp MangoHud config, and either the event-driven
+LocalFocusEmitter with LocalProcessMonitor (standing in for KWin and the
+proc connector) or the polling FakeFocusSource with the /proc scan
+fallback. Time is virtual, so
+hours of idle desktop replay in seconds. The same trace is also run
+through a model of the old focus_worker.sh loop (1 s polling, eight
+spawned commands per iteration) to compare against it.
+
+    python benchmarks/focus_replay.py [--scenario NAME] [--trace FILE]
+                                      [--output FILE] [--compare FILE]
+
+A trace is JSONL, one record per line, in time order (t in seconds):
+
+    {"config": {"mangohud_per_app": true}}                  optional, first line
+    {"t": 0, "spawn": {"pid": 4001, "comm": "dota2", "exe": "/games/dota2", "ppid": 1}}
+    {"t": 1.5, "focus": 4001, "class": "dota2"}
+    {"t": 900, "exit": 4001}
+"""
+
+import argparse
+import bisect
+import gc
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.actuators import MangoHudActuator  # noqa: E402
+from src.config import GameConfig  # noqa: E402
+from src.eventlog import EventLogWriter  # noqa: E402
+from src.focus import FakeFocusSource, LocalFocusEmitter  # noqa: E402
+from src.lifecycle import LocalProcessMonitor, ProcScanMonitor  # noqa: E402
+from src.procfs import ProcFS  # noqa: E402
+from src.worker import FocusWorker  # noqa: E402
+
+SOURCES = ("events", "polling")
+
+# Модель focus_worker.sh: на каждой итерации 3 x jq, 2 x kdotool, ps, grep, sleep;
+# на каждой смене лимита ещё touch, sed -i и date; sed -i переписывает файл, echo дописывает
+BASELINE_POLL_INTERVAL = 1.0
+BASELINE_SPAWNS_PER_ITERATION = 8
+BASELINE_SPAWNS_PER_CHANGE = 3
+BASELINE_WRITES_PER_CHANGE = 2
+
+
+# --- Трассы ---
+
+DESKTOP = {
+    1500: ("plasmashell", "/usr/bin/plasmashell", "plasmashell"),
+    1501: ("krunner", "/usr/bin/krunner", "krunner"),
+    1800: ("steam", "/home/user/.local/share/Steam/ubuntu12_32/steam", "steam"),
+    2001: ("firefox", "/usr/lib64/firefox/firefox", "firefox"),
+    2002: ("konsole", "/usr/bin/konsole", "org.kde.konsole"),
+    2003: ("dolphin", "/usr/bin/dolphin", "org.kde.dolphin"),
+    2004: ("Discord", "/opt/discord/Discord", "discord"),
+}
+GAMES = {
+    4001: ("dota2", "/games/dota 2 beta/game/bin/linuxsteamrt64/dota2", "dota2"),
+    4002: ("cs2", "/games/Counter-Strike Global Offensive/game/bin/linuxsteamrt64/cs2", "cs2"),
+    4003: ("witcher3.exe", "/games/The Witcher 3/bin/x64/witcher3.exe", "steam_app_292030"),
+}
+WINDOW_CLASSES = {pid: entry[2] for pid, entry in {**DESKTOP, **GAMES}.items()}
+
+
+def _spawn(t, pid, table):
+    comm, exe, _ = table[pid]
+    return {"t": t, "spawn": {"pid": pid, "comm": comm, "exe": exe, "ppid": 1800 if pid in GAMES else 1}}
+
+
+def _focus(t, pid):
+    return {"t": round(t, 3), "focus": pid, "class": WINDOW_CLASSES.get(pid, "")}
+
+
+def _desktop_start():
+    return [_spawn(0, pid, DESKTOP) for pid in DESKTOP]
+
+
+def trace_alt_tab_storm(rng: random.Random) -> list:
+    """ 10 минут: две игры и рабочий стол, серии быстрых Alt+Tab с паузами между ними. """
+    trace = _desktop_start() + [_spawn(0, 4001, GAMES), _spawn(0, 4002, GAMES), _focus(0.5, 4001)]
+    windows = [4001, 2001, 4002, 2002, 1500]
+    t = 1.0
+    while t < 600:
+        t += rng.uniform(5, 20)
+        for _ in range(rng.randint(5, 30)):
+            t += rng.uniform(0.04, 0.25)
+            trace.append(_focus(t, rng.choice(windows)))
+    return trace
+
+
+def trace_multi_game(rng: random.Random) -> list:
+    """ Час с тремя играми в per-app режиме: игры запускаются и закрываются по ходу. """
+    trace = [{"config": {"mangohud_per_app": True}}] + _desktop_start()
+    lifetimes = {4001: (0, 3600), 4002: (600, 2400), 4003: (1200, 3600)}
+    events = []
+    for pid, (start, end) in lifetimes.items():
+        events.append(_spawn(start, pid, GAMES))
+        if end < 3600:
+            events.append({"t": end, "exit": pid})
+    t = 1.0
+    while t < 3600:
+        t += rng.uniform(5, 120)
+        running = [pid for pid, (start, end) in lifetimes.items() if start <= t < end]
+        events.append(_focus(t, rng.choice(running + [2001, 2002])))
+    return trace + sorted(events, key=lambda record: record["t"])
+
+
+def trace_overlay_popups(rng: random.Random) -> list:
+    """ 30 минут в одной игре с всплывающими оверлеями, уведомлениями и KRunner. """
+    trace = _desktop_start() + [_spawn(0, 4001, GAMES), _focus(0.5, 4001)]
+    popups = [2004, 1800, 1500, 1501]
+    t = 1.0
+    while t < 1800:
+        t += rng.uniform(15, 60)
+        trace.append(_focus(t, rng.choice(popups)))
+        t += rng.uniform(0.1, 1.5)
+        trace.append(_focus(t, 4001))
+    return trace
+
+
+def trace_idle_desktop(rng: random.Random) -> list:
+    """ 4 часа без игр: редкие переключения между приложениями рабочего стола. """
+    trace = _desktop_start()
+    windows = [2001, 2002, 2003, 2004]
+    t = 0.0
+    while t < 4 * 3600:
+        t += rng.uniform(60, 600)
+        trace.append(_focus(t, rng.choice(windows)))
+    return trace
+
+
+SCENARIOS = {
+    "alt_tab_storm": trace_alt_tab_storm,
+    "multi_game": trace_multi_game,
+    "overlay_popups": trace_overlay_popups,
+    "idle_desktop": trace_idle_desktop,
+}
+
+
+def load_trace(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def dump_trace(trace: list, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in trace:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+# --- Подмены окружения ---
+
+class VirtualClock:
+    """ Монотонные часы, которые двигает сам бенчмарк. """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeProcTree:
+    """ Минимальное дерево /proc в каталоге: comm, cmdline, exe, stat и task/*/children. """
+
+    def __init__(self, root, monitor=None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.children = {}
+        self._ticks = 1000
+        # LocalProcessMonitor, которому сообщаем о запуске и завершении (как proc connector)
+        self.monitor = monitor
+
+    def spawn(self, pid: int, comm: str, exe: str = None, ppid: int = 1, cmdline: list = None):
+        exe = exe or f"/usr/bin/{comm}"
+        path = self.root / str(pid)
+        (path / "task" / str(pid)).mkdir(parents=True)
+        (path / "comm").write_text(comm[:15] + "\n")
+        (path / "cmdline").write_bytes(b"\0".join(arg.encode() for arg in (cmdline or [exe])) + b"\0")
+        os.symlink(exe, path / "exe")
+        self._ticks += 1
+        fields = ["S", str(ppid)] + ["0"] * 17 + [str(self._ticks)] + ["0"] * 10
+        (path / "stat").write_text(f"{pid} ({comm[:15]}) " + " ".join(fields) + "\n")
+        self.children.setdefault(ppid, set()).add(pid)
+        self._write_children(ppid)
+        self._write_children(pid)
+        if self.monitor is not None:
+            self.monitor.emit("exec", pid)
+
+    def exit(self, pid: int):
+        shutil.rmtree(self.root / str(pid), ignore_errors=True)
+        for parent, kids in self.children.items():
+            if pid in kids:
+                kids.discard(pid)
+                self._write_children(parent)
+        if self.monitor is not None:
+            self.monitor.emit("exit", pid)
+
+    def _write_children(self, pid: int):
+        task = self.root / str(pid) / "task" / str(pid)
+        if task.is_dir():
+            (task / "children").write_text(" ".join(map(str, sorted(self.children.get(pid, ())))))
+
+
+class PollingReplaySource(FakeFocusSource):
+    """ FakeFocusSource, который считает опросы. """
+
+    def __init__(self, pid=None):
+        super().__init__(pid)
+        self.polls = 0
+
+    def active_pid(self):
+        self.polls += 1
+        return self.pid
+
+
+class AuditCounters:
+    """ Считает порождённые процессы и открытия файлов на запись через sys.addaudithook. """
+
+    SPAWN_EVENTS = {"subprocess.Popen", "os.posix_spawn", "os.fork", "os.forkpty", "os.exec", "os.system"}
+    WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_APPEND | os.O_CREAT
+
+    def __init__(self):
+        self.active = False
+        self.reset()
+        sys.addaudithook(self._hook)
+
+    def reset(self):
+        self.spawns = 0
+        self.opened_for_write = 0
+        self.renames = 0
+
+    def _hook(self, event, args):
+        if not self.active:
+            return
+        if event in self.SPAWN_EVENTS:
+            self.spawns += 1
+        elif event == "open":
+            _, mode, flags = args
+            if (flags or 0) & self.WRITE_FLAGS or (isinstance(mode, str) and set(mode) & set("wax+")):
+                self.opened_for_write += 1
+        elif event == "os.rename":
+            self.renames += 1
+
+
+AUDIT = None
+
+
+def percentile(values: list, q: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _latency_summary(values: list, scale: float, digits: int) -> dict:
+    def rounded(value):
+        return None if value is None else round(value * scale, digits)
+    return {"p50": rounded(percentile(values, 50)), "p99": rounded(percentile(values, 99)),
+            "max": rounded(max(values, default=None)), "samples": len(values)}
+
+
+# --- Прогон воркера ---
+
+def build_config(trace: list) -> dict:
+    base = json.loads((PROJECT_ROOT / "games.json").read_text(encoding="utf-8"))
+    for record in trace:
+        if "config" in record:
+            base.update(record["config"])
+    return GameConfig.from_dict(base).to_dict()
+
+
+def replay(trace: list, source_kind: str, track_allocations: bool = False) -> dict:
+    """ Прогоняет трассу через FocusWorker и возвращает метрики. """
+    records = [record for record in trace if "t" in record]
+    end = (records[-1]["t"] if records else 0.0) + 5.0
+
+    with tempfile.TemporaryDirectory(prefix="gfm-bench-") as tmp:
+        tmp = Path(tmp)
+        config_file = tmp / "games.json"
+        config_file.write_text(json.dumps(build_config(trace), indent=2), encoding="utf-8")
+        mangohud_file = tmp / "MangoHud" / "MangoHud.conf"
+        mangohud_file.parent.mkdir()
+        mangohud_file.write_text("fps_limit=0\n")
+        if source_kind == "events":
+            source, monitor = LocalFocusEmitter(), LocalProcessMonitor()
+        else:
+            source, monitor = PollingReplaySource(), None
+        procs = FakeProcTree(tmp / "proc", monitor)
+        procfs = ProcFS(str(procs.root))
+        if monitor is None:
+            monitor = ProcScanMonitor(procfs)
+
+        clock = VirtualClock()
+        actuator = MangoHudActuator(mangohud_file)
+        worker = FocusWorker(config_file, focus_source=source, actuator=actuator,
+                             procfs=procfs, event_log=EventLogWriter(tmp / "events.jsonl"),
+                             clock=clock, process_monitor=monitor)
+        worker.start()
+
+        # Моменты реальных смен фокуса: по ним считается задержка и для опроса
+        change_times = [0.0]
+        latencies, processing = [], []
+        cpu = 0.0
+        writes_before = actuator.writes
+        suppressed_before = worker.scheduler.suppressed
+
+        def step():
+            nonlocal cpu
+            observed = worker.decision_latency.count
+            wall, cpu_start = time.perf_counter(), time.process_time()
+            AUDIT.active = True
+            worker.run_once(timeout=0)
+            AUDIT.active = False
+            cpu += time.process_time() - cpu_start
+            wall = time.perf_counter() - wall
+            # Только решения по смене фокуса: запись после запуска/выхода игры задержки не имеет
+            if worker.decision_latency.count > observed:
+                decided_on = clock.now - worker.last_decision_latency
+                changed_at = change_times[bisect.bisect_right(change_times, decided_on + 1e-9) - 1]
+                latencies.append(clock.now - changed_at)
+                processing.append(wall)
+
+        def advance(until: float):
+            while True:
+                deadline = worker.next_deadline()
+                if deadline is None or deadline > until:
+                    break
+                clock.now = max(clock.now, deadline)
+                step()
+            clock.now = max(clock.now, until)
+
+        AUDIT.reset()
+        if track_allocations:
+            gc.collect()
+            tracemalloc.start()
+            blocks_before = sys.getallocatedblocks()
+
+        for record in records:
+            advance(record["t"])
+            if "spawn" in record:
+                procs.spawn(**record["spawn"])
+            elif "exit" in record:
+                procs.exit(record["exit"])
+            elif "focus" in record:
+                change_times.append(clock.now)
+                if source.event_driven:
+                    source.emit(record["focus"], record.get("class", ""), timestamp=clock.now)
+                    step()
+                else:
+                    source.set_active(record["focus"])
+        advance(end)
+
+        result = {
+            "simulated_seconds": round(end, 3),
+            "latency_ms": _latency_summary(latencies, 1000, 3),
+            "processing_us": _latency_summary(processing, 1e6, 1),
+            "cpu_ms": round(cpu * 1000, 3),
+            "cpu_ms_per_hour": round(cpu * 1000 * 3600 / end, 3) if end else None,
+            "process_spawns": AUDIT.spawns,
+            "spawns_per_hour": round(AUDIT.spawns * 3600 / end, 1) if end else None,
+            "mangohud_writes": actuator.writes - writes_before,
+            "files_opened_for_write": AUDIT.opened_for_write,
+            "renames": AUDIT.renames,
+            "focus_polls": getattr(source, "polls", 0),
+            # Настоящий опрашивающий источник (kdotool) запускает по процессу на опрос
+            "source_spawns_per_hour": round(getattr(source, "polls", 0) * 3600 / end, 1) if end else None,
+            "suppressed_transitions": worker.scheduler.suppressed - suppressed_before,
+        }
+        if track_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            gc.collect()
+            result["alloc_peak_kib"] = round(peak / 1024, 1)
+            result["alloc_blocks_delta"] = sys.getallocatedblocks() - blocks_before
+
+        worker.shutdown()
+        worker.event_log.close()
+        return result
+
+
+def replay_baseline(trace: list) -> dict:
+    """
+    Модель focus_worker.sh на той же трассе: раз в секунду проверяет, игра ли
+    в фокусе (`ps -o cmd= | grep -E`), и переписывает общий MangoHud.conf
+    при смене состояния. Время CPU не моделируется.
+    """
+    config = GameConfig.from_dict(build_config(trace))
+    records = [record for record in trace if "t" in record]
+    end = (records[-1]["t"] if records else 0.0) + 5.0
+
+    cmdlines = {}
+    focused_pid, focused_at = None, 0.0
+    is_game_focused = False
+    changes = 0
+    latencies = []
+    index = 0
+    ticks = int(end / BASELINE_POLL_INTERVAL) + 1
+    for tick in range(ticks):
+        now = tick * BASELINE_POLL_INTERVAL
+        while index < len(records) and records[index]["t"] <= now:
+            record = records[index]
+            if "spawn" in record:
+                spawn = record["spawn"]
+                cmdlines[spawn["pid"]] = spawn.get("exe") or spawn["comm"]
+            elif "exit" in record:
+                cmdlines.pop(record["exit"], None)
+            elif "focus" in record:
+                focused_pid, focused_at = record["focus"], record["t"]
+            index += 1
+        cmd = cmdlines.get(focused_pid, "")
+        game_now = any(game in cmd for game in config.games_to_watch)
+        if game_now != is_game_focused:
+            is_game_focused = game_now
+            changes += 1
+            latencies.append(now - focused_at)
+
+    spawns = ticks * BASELINE_SPAWNS_PER_ITERATION + changes * BASELINE_SPAWNS_PER_CHANGE
+    return {
+        "simulated_seconds": round(end, 3),
+        "latency_ms": _latency_summary(latencies, 1000, 3),
+        "cpu_ms_per_hour": None,
+        "process_spawns": spawns,
+        "spawns_per_hour": round(spawns * 3600 / end, 1),
+        "mangohud_writes": changes,
+        "files_opened_for_write": changes * BASELINE_WRITES_PER_CHANGE,
+        "focus_polls": ticks,
+    }
+
+
+# --- Отчёт ---
+
+def run_scenario(trace: list, allocations: bool) -> dict:
+    result = {"focus_events": sum("focus" in record for record in trace), "worker": {}}
+    for source_kind in SOURCES:
+        metrics = replay(trace, source_kind)
+        if allocations:
+            allocation_run = replay(trace, source_kind, track_allocations=True)
+            metrics["alloc_peak_kib"] = allocation_run["alloc_peak_kib"]
+            metrics["alloc_blocks_delta"] = allocation_run["alloc_blocks_delta"]
+        result["worker"][source_kind] = metrics
+    result["baseline_focus_worker_sh"] = replay_baseline(trace)
+    return result
+
+
+def compare(results: dict, previous: dict, tolerance: float) -> list:
+    """ Метрики, которые ухудшились больше чем на tolerance относительно прошлого прогона. """
+    keys = [("latency_ms", "p99"), ("cpu_ms_per_hour", None), ("spawns_per_hour", None),
+            ("mangohud_writes", None)]
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        old_scenario = previous.get("scenarios", {}).get(name)
+        if old_scenario is None:
+            continue
+        for source_kind, metrics in scenario["worker"].items():
+            old_metrics = old_scenario["worker"].get(source_kind, {})
+            for key, sub in keys:
+                new, old = metrics.get(key), old_metrics.get(key)
+                if sub:
+                    new, old = (new or {}).get(sub), (old or {}).get(sub)
+                if new is None or old is None:
+                    continue
+                # Небольшой абсолютный допуск, чтобы не спотыкаться о шум около нуля
+                if new > old * (1 + tolerance) + 1.0:
+                    regressions.append(f"{name}/{source_kind}: {key}{'.' + sub if sub else ''} {old} -> {new}")
+    return regressions
+
+
+def print_report(results: dict):
+    header = f"{'scenario':<16}{'run':<10}{'p50 ms':>10}{'p99 ms':>10}{'cpu ms/h':>10}{'spawns/h':>10}{'writes':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, scenario in results["scenarios"].items():
+        runs = list(scenario["worker"].items()) + [("script", scenario["baseline_focus_worker_sh"])]
+        for source_kind, metrics in runs:
+            latency = metrics["latency_ms"]
+            cpu = metrics["cpu_ms_per_hour"]
+            print(f"{name:<16}{source_kind:<10}{str(latency['p50']):>10}{str(latency['p99']):>10}"
+                  f"{'-' if cpu is None else cpu:>10}{metrics['spawns_per_hour']:>10}{metrics['mangohud_writes']:>8}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay focus traces through the worker and measure it")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Synthetic scenario to run (default: all)")
+    parser.add_argument("--trace", action="append", default=[], help="Recorded trace (JSONL) to replay")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="focus_bench.json", help="Machine-readable results")
+    parser.add_argument("--compare", default=None, help="Previous results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--no-allocations", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--dump-traces", default=None, help="Write the synthetic traces to this directory")
+    args = parser.parse_args(argv)
+
+    global AUDIT
+    AUDIT = AuditCounters()
+
+    traces = {}
+    if args.scenario or not args.trace:
+        for name in args.scenario or sorted(SCENARIOS):
+            traces[name] = SCENARIOS[name](random.Random(args.seed))
+    for path in args.trace:
+        traces[Path(path).stem] = load_trace(path)
+
+    if args.dump_traces:
+        Path(args.dump_traces).mkdir(parents=True, exist_ok=True)
+        for name, trace in traces.items():
+            dump_trace(trace, Path(args.dump_traces) / f"{name}.jsonl")
+
+    results = {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "scenarios": {name: run_scenario(trace, not args.no_allocations) for name, trace in traces.items()},
+    }
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_report(results)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text(encoding="utf-8")),
+                              args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+# --- PATH: GameFocusManager/benchmarks/startup_budget.py ---
+"""
+Measures how long GameFocusManager takes to start and how much memory it
+needs, in headless mode (--headless, no PySide6) and in GUI mode, and checks
+both against a budget.
+
+Each mode is started with --startup-probe, which makes it exit as soon as
+it is ready. For the GUI that is right after the main window has been shown.
+Startup time is the wall time from spawning the process to its exit (the
+median of several runs). RSS is the peak resident set size reported by
+wait4(). The GUI runs on Qt's offscreen platform, so no display is needed.
+
+    python benchmarks/startup_budget.py [--executable PATH] [--mode headless|gui]
+                                        [--runs N] [--output FILE] [--no-check]
+
+Without --executable the sources are measured (python main.py). The
+cx_Freeze build in setup.py runs the same check against the frozen binary.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Бюджеты: время до готовности (медиана, с) и пиковый RSS (МБ).
+# headless: интерпретатор + src.cli/WorkerManager - измерено около 0.08 с и 14 МБ;
+# GUI: QApplication, главное окно и вкладка состояния (остальные
+# вкладки строятся лениво). Запас - на медленные диски и холодный кэш.
+BUDGETS = {
+    "headless": {"seconds": 0.3, "rss_mb": 32},
+    "gui": {"seconds": 2.0, "rss_mb": 200},
+}
+MODE_ARGS = {
+    "headless": ["--headless", "--startup-probe"],
+    "gui": ["--startup-probe"],
+}
+
+
+def base_command(executable=None) -> list:
+    """ Команда запуска приложения: собранный бинарник или main.py из исходников. """
+    if executable:
+        return [str(executable)]
+    return [sys.executable, str(PROJECT_ROOT / "main.py")]
+
+
+def measure_once(command: list, env: dict) -> tuple:
+    """ Один запуск: (секунды до выхода, пиковый RSS в МБ, код выхода). """
+    start = time.perf_counter()
+    process = subprocess.Popen(command, env=env, cwd=str(PROJECT_ROOT),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 вместо wait: заодно получаем ru_maxrss именно этого процесса
+    _, status, rusage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    stderr = process.stderr.read().decode(errors="replace").strip()
+    process.stderr.close()
+    if process.returncode != 0 and stderr:
+        print(stderr, file=sys.stderr)
+    # В Linux ru_maxrss - в килобайтах
+    return elapsed, rusage.ru_maxrss / 1024, process.returncode
+
+
+def measure(mode: str, executable=None, runs: int = 5) -> dict:
+    env = dict(os.environ)
+    if mode == "gui":
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    command = base_command(executable) + MODE_ARGS[mode]
+    samples = [measure_once(command, env) for _ in range(runs)]
+    return {
+        "mode": mode,
+        "command": command,
+        "runs": runs,
+        "seconds": round(statistics.median(sample[0] for sample in samples), 4),
+        "seconds_max": round(max(sample[0] for sample in samples), 4),
+        "rss_mb": round(max(sample[1] for sample in samples), 1),
+        "exit_codes": sorted({sample[2] for sample in samples}),
+    }
+
+
+def check(result: dict, budgets=BUDGETS) -> list:
+    """ Нарушения бюджета для результата measure() (пустой список - всё в порядке). """
+    budget = budgets[result["mode"]]
+    failures = []
+    if result["exit_codes"] != [0]:
+        failures.append(f"{result['mode']}: startup probe exited with {result['exit_codes']}")
+    if result["seconds"] > budget["seconds"]:
+        failures.append(f"{result['mode']}: startup took {result['seconds']:.3f} s, "
+                        f"budget is {budget['seconds']:g} s")
+    if result["rss_mb"] > budget["rss_mb"]:
+        failures.append(f"{result['mode']}: peak RSS {result['rss_mb']:.1f} MB, budget is {budget['rss_mb']:g} MB")
+    return failures
+
+
+def check_budget(executable=None, modes=tuple(BUDGETS), runs: int = 5) -> tuple:
+    """ Измеряет режимы и проверяет бюджет. Возвращает (результаты, нарушения). """
+    results, failures = [], []
+    for mode in modes:
+        result = measure(mode, executable, runs)
+        results.append(result)
+        failures += check(result)
+    return results, failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Startup time and RSS budget of GameFocusManager")
+    parser.add_argument("--executable", default=None, help="Frozen GameFocusManager binary (default: main.py)")
+    parser.add_argument("--mode", choices=tuple(BUDGETS), action="append",
+                        help="Mode to measure (repeatable; default: all)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--no-check", action="store_true", help="Only measure, do not fail on budget overruns")
+    args = parser.parse_args(argv)
+
+    results, failures = check_budget(args.executable, args.mode or tuple(BUDGETS), args.runs)
+    for result in results:
+        budget = BUDGETS[result["mode"]]
+        print(f"{result['mode']:>8}: {result['seconds'] * 1000:7.1f} ms (budget {budget['seconds'] * 1000:g} ms), "
+              f"RSS {result['rss_mb']:6.1f} MB (budget {budget['rss_mb']:g} MB)")
+    if args.output:
+        Path(args.output).write_text(json.dumps({"results": results, "budgets": BUDGETS}, indent=2))
+    for failure in failures:
+        print(f"OVER BUDGET: {failure}", file=sys.stderr)
+    return 1 if failures and not args.no_check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,21 @@
 # --- PATH: GameFocusManager/main.py (Финальная версия) ---
 
 import sys
+
+if __name__ == "__main__" and "--worker" in sys.argv[1:]:
+    # Режим фонового воркера: GUI и PySide6 не нужны
+    from src.worker import main as worker_main
+    args = sys.argv[1:]
+    args.remove("--worker")
+    sys.exit(worker_main(args))
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Управление воркером из терминала (run/start/stop/status/...), тоже без PySide6
+    from src.cli import main as cli_main
+    args = sys.argv[1:]
+    args.remove("--headless")
+    sys.exit(cli_main(args))
+
 from PySide6.QtWidgets import QApplication
 # Импортируем наш класс главного окна
 from src.main_window import MainWindow
@@ -13,5 +28,10 @@ if __name__ == "__main__":
     window = MainWindow()
     window.show()
 
+    if "--startup-probe" in sys.argv[1:]:
+        # Проверка бюджета запуска (benchmarks/startup_budget.py): выходим, как только окно показано
+        from PySide6.QtCore import QTimer
+        QTimer.singleShot(0, app.quit)
+
     # Запускаем главный цикл обработки событий
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -1,11 +1,21 @@
 # --- PATH: GameFocusManager/setup.py ---
 
+import sys
+from pathlib import Path
+
 from cx_Freeze import setup, Executable
 
+try:
+    from cx_Freeze.command.build_exe import build_exe
+except ImportError:  # cx_Freeze < 6.15
+    from cx_Freeze.dist import build_exe
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchmarks.startup_budget import BUDGETS, check_budget
+
 # Список дополнительных файлов, которые нужно включить в сборку
 # Формат: ('путь к файлу', 'путь назначения в сборке')
 include_files = [
-    "focus_worker.sh",
     "games.json"
 ]
 
@@ -17,6 +27,38 @@ build_exe_options = {
     "build_exe": "build/GameFocusManager" # Указываем папку для сборки
 }
 
+
+class BuildExeWithStartupBudget(build_exe):
+    """
+    build_exe that afterwards starts the frozen binary in headless and GUI
+    mode and fails the build if startup time or peak RSS exceed the budget
+    in benchmarks/startup_budget.py.
+    """
+
+    user_options = build_exe.user_options + [
+        ("skip-startup-budget", None, "do not check startup time and RSS of the build"),
+    ]
+    boolean_options = getattr(build_exe, "boolean_options", []) + ["skip-startup-budget"]
+
+    def initialize_options(self):
+        super().initialize_options()
+        self.skip_startup_budget = False
+
+    def run(self):
+        super().run()
+        if self.skip_startup_budget:
+            return
+        executable = Path(self.build_exe) / "GameFocusManager"
+        results, failures = check_budget(executable)
+        for result in results:
+            budget = BUDGETS[result["mode"]]
+            print(f"startup budget, {result['mode']}: {result['seconds'] * 1000:.1f} ms "
+                  f"(budget {budget['seconds'] * 1000:g} ms), RSS {result['rss_mb']:.1f} MB "
+                  f"(budget {budget['rss_mb']:g} MB)")
+        if failures:
+            raise SystemExit("Startup budget exceeded:\n" + "\n".join(failures))
+
+
 # Определяем нашу главную точку входа
 base = "gui" # Используем "gui" для GUI-приложений на Linux
 
@@ -25,5 +67,6 @@ setup(
     version="1.0",
     description="Manages game performance on focus loss.",
     options={"build_exe": build_exe_options},
+    cmdclass={"build_exe": BuildExeWithStartupBudget},
     executables=[Executable("main.py", base=base, target_name="GameFocusManager")]
-)
\ No newline at end of file
+)
@@ -0,0 +1,154 @@
+# --- PATH: GameFocusManager/src/actuators.py ---
+
+import os
+from pathlib import Path
+
+from src.fsutil import write_textfile
+
+
+def default_mangohud_config() -> Path:
+    """ Путь к глобальному конфигу MangoHud с учётом XDG_CONFIG_HOME. """
+    config_home = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return Path(config_home) / "MangoHud" / "MangoHud.conf"
+
+
+def mangohud_app_config_name(game: str) -> str:
+    """
+    Имя файла конфига MangoHud для конкретного приложения: для Windows-игр
+    (Wine/Proton) MangoHud ищет wine-<имя без .exe>.conf, для нативных - <имя>.conf.
+    """
+    if game.lower().endswith(".exe"):
+        return f"wine-{game[:-4]}.conf"
+    return f"{game}.conf"
+
+
+class Actuator:
+    """
+    Base interface for whatever actually enforces an FPS limit.
+    """
+
+    def apply(self, fps_limit: int, game: str = None) -> bool:
+        """
+        Применяет лимит FPS: для игры game, если актуатор умеет различать игры,
+        иначе глобально. Возвращает True, если что-то действительно изменилось.
+        """
+        raise NotImplementedError
+
+
+class _MangoHudFile:
+    """ In-memory copy of one MangoHud config file. """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lines = []
+        self.fps_limit = None
+        self.signature = None
+
+    def _stat_signature(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def refresh(self, seed_lines=None):
+        """ Перечитывает файл, только если его изменил кто-то кроме нас. """
+        signature = self._stat_signature()
+        if signature == self.signature and self.signature is not None:
+            return
+        if signature is None:
+            # Файла нет: начинаем с заготовки (например, копии глобального конфига)
+            self.lines = [line for line in (seed_lines or []) if not line.startswith("fps_limit=")]
+            self.fps_limit = None
+        else:
+            self.lines = self.path.read_text().splitlines()
+            self.fps_limit = None
+            for line in self.lines:
+                if line.startswith("fps_limit="):
+                    self.fps_limit = line[len("fps_limit="):].strip()
+        self.signature = signature
+
+    def write_limit(self, fps_limit: int) -> bool:
+        value = str(fps_limit)
+        if value == self.fps_limit:
+            return False
+
+        # Меняем первую строку fps_limit на месте, дубликаты убираем
+        new_lines, replaced = [], False
+        for line in self.lines:
+            if line.startswith("fps_limit="):
+                if not replaced:
+                    new_lines.append(f"fps_limit={value}")
+                    replaced = True
+            else:
+                new_lines.append(line)
+        if not replaced:
+            new_lines.append(f"fps_limit={value}")
+
+        # Пишем во временный файл рядом и атомарно подменяем: MangoHud по inotify
+        # никогда не увидит полузаписанный конфиг или конфиг без fps_limit
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_textfile(self.path, "\n".join(new_lines) + "\n")
+
+        self.lines = new_lines
+        self.fps_limit = value
+        self.signature = self._stat_signature()
+        return True
+
+
+class MangoHudActuator(Actuator):
+    """
+    Sets `fps_limit=` in MangoHud configs. Each file is parsed once and kept
+    in memory (re-read only if someone else edits it); it is rewritten only
+    when the effective value changes, with one write-and-rename so MangoHud's
+    reload never sees a partial file.
+
+    When a game is given, the limit goes to ~/.config/MangoHud/<app>.conf
+    (wine-<app>.conf for .exe games) instead of the global MangoHud.conf, so
+    unrelated MangoHud applications are never throttled. A missing per-app
+    file is seeded from the global config, because MangoHud uses the
+    per-app file instead of the global one.
+    """
+
+    def __init__(self, config_file=None):
+        self.config_file = Path(config_file) if config_file else default_mangohud_config()
+        self.writes = 0
+        self._files = {}
+
+    def _file(self, path: Path) -> _MangoHudFile:
+        entry = self._files.get(path)
+        if entry is None:
+            entry = self._files[path] = _MangoHudFile(path)
+        return entry
+
+    def path_for(self, game: str = None) -> Path:
+        if game:
+            return self.config_file.parent / mangohud_app_config_name(game)
+        return self.config_file
+
+    def apply(self, fps_limit: int, game: str = None) -> bool:
+        path = self.path_for(game)
+        entry = self._file(path)
+        seed = None
+        if path != self.config_file:
+            global_entry = self._file(self.config_file)
+            global_entry.refresh()
+            seed = global_entry.lines
+        entry.refresh(seed)
+        if entry.write_limit(fps_limit):
+            self.writes += 1
+            return True
+        return False
+
+
+class FakeActuator(Actuator):
+    """
+    Records every applied limit instead of touching the file system.
+    """
+
+    def __init__(self):
+        self.applied = []
+
+    def apply(self, fps_limit: int, game: str = None) -> bool:
+        self.applied.append((fps_limit, game))
+        return True
@@ -0,0 +1,283 @@
+# --- PATH: GameFocusManager/src/affinity.py ---
+
+import ctypes
+import ctypes.util
+import json
+import os
+import platform
+import resource
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.demotion import Demotion, parse_cpulist, parse_ioprio
+from src.fsutil import write_textfile
+
+# Номера системных вызовов (ioprio_get, ioprio_set): в модуле os их нет
+_IOPRIO_SYSCALLS = {
+    "x86_64": (252, 251),
+    "aarch64": (31, 30),
+    "i386": (290, 289),
+    "i686": (290, 289),
+}
+IOPRIO_WHO_PROCESS = 1
+CAP_SYS_NICE = 23
+
+# ЦП считается энергоэффективным, если его производительность ниже этой доли от самой высокой.
+# Разброс между "любимыми" P-ядрами (Turbo Boost Max 3.0) заметно меньше.
+EFFICIENCY_RATIO = 0.85
+
+
+@dataclass(frozen=True)
+class CpuTopology:
+    """ Online CPUs and which of them are efficiency cores (none on a non-hybrid CPU). """
+    online: frozenset
+    efficiency: frozenset = frozenset()
+
+    @property
+    def performance(self) -> frozenset:
+        return self.online - self.efficiency
+
+    @property
+    def hybrid(self) -> bool:
+        return bool(self.efficiency) and bool(self.performance)
+
+
+def _read_text(path):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+
+def detect_topology(sysfs_root="/sys/devices/system/cpu") -> CpuTopology:
+    """
+    Определяет E-ядра гибридного ЦП. У Intel (Alder Lake и новее) их перечисляет
+    PMU cpu_atom (/sys/devices/cpu_atom/cpus). Иначе ЦП сравниваются по первому
+    источнику, доступному для всех: cpu_capacity (ARM big.LITTLE),
+    acpi_cppc/highest_perf, cpufreq/cpuinfo_max_freq.
+    """
+    root = Path(sysfs_root)
+    text = _read_text(root / "online")
+    if text:
+        online = parse_cpulist(text)
+    else:
+        online = frozenset(int(path.name[3:]) for path in root.glob("cpu[0-9]*") if path.name[3:].isdigit())
+
+    atom = _read_text(root.parent.parent / "cpu_atom" / "cpus")
+    if atom:
+        return CpuTopology(online, parse_cpulist(atom) & online)
+
+    for name in ("cpu_capacity", "acpi_cppc/highest_perf", "cpufreq/cpuinfo_max_freq"):
+        values = {}
+        for cpu in online:
+            value = _read_text(root / f"cpu{cpu}" / name)
+            if not value or not value.isdigit():
+                break
+            values[cpu] = int(value)
+        else:
+            if values:
+                top = max(values.values())
+                return CpuTopology(online, frozenset(cpu for cpu, value in values.items()
+                                                     if value < top * EFFICIENCY_RATIO))
+    return CpuTopology(online)
+
+
+def _has_cap_sys_nice() -> bool:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("CapEff:"):
+                    return bool(int(line.split()[1], 16) >> CAP_SYS_NICE & 1)
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+class AffinityActuator:
+    """
+    Demotes an unfocused game so that it stops competing with the
+    foreground: every thread of its process tree is moved to a CPU set
+    (by default the efficiency cores of a hybrid CPU), its nice value is
+    raised and its I/O priority lowered.
+
+    The affinity mask, nice value and I/O priority of every thread are
+    remembered and put back exactly by restore(). Threads started while the
+    game was demoted get the values of the game's main thread. Lowering a
+    nice value again needs CAP_SYS_NICE or a large enough RLIMIT_NICE, so
+    the nice value is only raised when it can be restored.
+
+    The sysfs and ProcFS roots are injectable. What is demoted is also
+    written to `state_file`, and recover() restores it after a crash.
+    """
+
+    def __init__(self, procfs, sysfs_root="/sys/devices/system/cpu", state_file=None,
+                 max_processes: int = 256):
+        self.procfs = procfs
+        self.sysfs_root = sysfs_root
+        self.state_file = Path(state_file) if state_file else None
+        self.max_processes = max_processes
+        self._topology = None
+        self._can_lower_nice = _has_cap_sys_nice() or os.geteuid() == 0
+        self._syscall, self._ioprio_numbers = None, _IOPRIO_SYSCALLS.get(platform.machine())
+        libc_name = ctypes.util.find_library("c")
+        if self._ioprio_numbers and libc_name:
+            self._syscall = ctypes.CDLL(libc_name, use_errno=True).syscall
+        # pid игры -> {"starttime", "threads": {"tid": [ЦП, nice, ioprio]}}
+        self.demoted = {}
+
+    @property
+    def topology(self) -> CpuTopology:
+        if self._topology is None:
+            self._topology = detect_topology(self.sysfs_root)
+        return self._topology
+
+    def cpus_for(self, demotion: Demotion) -> frozenset:
+        """ Набор ЦП для фоновой игры; пустой - привязку не менять. """
+        if not demotion.cpus:
+            return frozenset()
+        if demotion.cpus == "efficiency":
+            topology = self.topology
+            return topology.efficiency if topology.hybrid else frozenset()
+        return parse_cpulist(demotion.cpus) & self.topology.online
+
+    # --- Потоки ---
+
+    def _get_ioprio(self, tid: int):
+        if self._syscall is None:
+            return None
+        value = self._syscall(self._ioprio_numbers[0], IOPRIO_WHO_PROCESS, tid)
+        return value if value >= 0 else None
+
+    def _set_ioprio(self, tid: int, value: int) -> bool:
+        return self._syscall is not None and self._syscall(self._ioprio_numbers[1], IOPRIO_WHO_PROCESS,
+                                                           tid, value) == 0
+
+    def _read_thread(self, tid: int):
+        """ [ЦП, nice, ioprio] потока или None, если его уже нет. """
+        try:
+            return [sorted(os.sched_getaffinity(tid)), os.getpriority(os.PRIO_PROCESS, tid), self._get_ioprio(tid)]
+        except OSError:
+            return None
+
+    @staticmethod
+    def _call(func, *args) -> bool:
+        try:
+            func(*args)
+            return True
+        except OSError:
+            return False
+
+    def _can_renice(self, pid: int, nice: int) -> bool:
+        """ Получится ли потом вернуть процессу nice (понизить его) - иначе повышать не стоит. """
+        if self._can_lower_nice:
+            return True
+        try:
+            soft, _ = resource.prlimit(pid, resource.RLIMIT_NICE)
+        except (OSError, ValueError):
+            return False
+        # RLIMIT_NICE разрешает опускать nice до 20 - rlim_cur
+        return soft == resource.RLIM_INFINITY or 20 - soft <= nice
+
+    def _threads(self, pid: int):
+        for member, _ in self.procfs.process_tree(pid, self.max_processes):
+            for tid in self.procfs.tasks(member):
+                yield member, tid
+
+    # --- Понижение и восстановление ---
+
+    def demote(self, pid: int, demotion: Demotion) -> list:
+        """ Понижает игру. Возвращает, что удалось изменить: "affinity", "nice", "ioprio". """
+        self.restore(pid)
+        stat = self.procfs.stat(pid)
+        if stat is None or not demotion:
+            return []
+        cpus = self.cpus_for(demotion)
+        ioprio = parse_ioprio(demotion.ioprio)
+
+        threads, changed = {}, set()
+        for member, tid in self._threads(pid):
+            original = self._read_thread(tid)
+            if original is None:
+                continue
+            threads[str(tid)] = original
+            mask, nice, thread_ioprio = original
+            if cpus and set(mask) != cpus and self._call(os.sched_setaffinity, tid, cpus):
+                changed.add("affinity")
+            if (demotion.nice > nice and self._can_renice(member, nice)
+                    and self._call(os.setpriority, os.PRIO_PROCESS, tid, demotion.nice)):
+                changed.add("nice")
+            if ioprio is not None and thread_ioprio is not None and ioprio != thread_ioprio \
+                    and self._set_ioprio(tid, ioprio):
+                changed.add("ioprio")
+        if not changed:
+            return []
+
+        self.demoted[pid] = {"starttime": stat.starttime, "threads": threads}
+        self._save_state()
+        return sorted(changed)
+
+    def restore(self, pid: int) -> bool:
+        """ Возвращает игре исходные привязку и приоритеты. False - она не была понижена. """
+        entry = self.demoted.pop(pid, None)
+        if entry is None:
+            return False
+        self._restore_entry(pid, entry)
+        self._save_state()
+        return True
+
+    def restore_all(self):
+        for pid in list(self.demoted):
+            self.restore(pid)
+
+    def forget(self, pid: int):
+        """ Игра завершилась - восстанавливать больше нечего. """
+        if self.demoted.pop(pid, None) is not None:
+            self._save_state()
+
+    def is_demoted(self, pid: int) -> bool:
+        return pid in self.demoted
+
+    def _restore_entry(self, pid: int, entry: dict):
+        stat = self.procfs.stat(pid)
+        if stat is None or stat.starttime != entry["starttime"]:
+            return  # игра завершилась, PID мог достаться другому процессу
+        threads = entry["threads"]
+        default = threads.get(str(pid))
+        for _, tid in self._threads(pid):
+            original = threads.get(str(tid), default)
+            current = self._read_thread(tid)
+            if original is None or current is None:
+                continue
+            mask, nice, ioprio = original
+            if set(current[0]) != set(mask):
+                self._call(os.sched_setaffinity, tid, mask)
+            if current[1] != nice:
+                self._call(os.setpriority, os.PRIO_PROCESS, tid, nice)
+            if ioprio is not None and current[2] != ioprio:
+                self._set_ioprio(tid, ioprio)
+
+    # --- Восстановление после аварии ---
+
+    def _save_state(self):
+        if self.state_file is None:
+            return
+        try:
+            if not self.demoted:
+                self.state_file.unlink(missing_ok=True)
+                return
+            write_textfile(self.state_file, json.dumps({str(pid): entry for pid, entry in self.demoted.items()}))
+        except OSError:
+            pass
+
+    def recover(self) -> int:
+        """ Восстанавливает игры, оставшиеся пониженными после аварийного завершения. Возвращает их число. """
+        if self.state_file is None:
+            return 0
+        try:
+            entries = json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return 0
+        for pid, entry in entries.items():
+            self._restore_entry(int(pid), entry)
+        self.state_file.unlink(missing_ok=True)
+        return len(entries)
@@ -0,0 +1,113 @@
+# --- PATH: GameFocusManager/src/classifier.py ---
+
+# Обёртки, под которыми обычно запускаются игры. Спускаться к потомкам можно только
+# от них: у Steam или терминала среди потомков тоже есть игры, но их окна - не игра.
+WRAPPER_NAMES = frozenset({
+    "gamescope", "gamemoderun", "reaper", "steamlaunchwrapper", "pressure-vessel",
+    "pv-bwrap", "bwrap", "proton", "wine", "wine64", "wine-preloader",
+    "wine64-preloader", "wineserver", "start.exe", "explorer.exe"
+})
+# В /proc/<pid>/stat имя обрезано до 15 символов
+_WRAPPER_COMMS = frozenset(name[:15] for name in WRAPPER_NAMES)
+
+
+class ProcessClassifier:
+    """
+    Remembers whether a process is one of the watched games.
+
+    Entries are keyed by (pid, start time), so a recycled PID never inherits
+    a stale verdict, and the whole cache is dropped when the config
+    generation changes. A cache hit costs one read of /proc/<pid>/stat (to
+    confirm the start time) and a dictionary lookup.
+
+    A process that does not match by itself is resolved through its parent
+    chain (the game launched a helper that owns the window) and then through
+    its descendants, but only when the window belongs to a known wrapper
+    (gamescope, Proton/Wine, Steam's reaper) and the game runs below it.
+    """
+
+    def __init__(self, procfs, max_ancestors: int = 8, max_descendants: int = 64,
+                 max_entries: int = 1024):
+        self.procfs = procfs
+        self.max_ancestors = max_ancestors
+        self.max_descendants = max_descendants
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}  # pid -> (starttime, game | None)
+        self._generation = None
+
+    def forget(self, pid: int):
+        """ Удаляет запись о процессе (например, когда стало известно о его завершении). """
+        self._cache.pop(pid, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def prune(self):
+        """ Выбрасывает записи о процессах, которых уже нет. """
+        for pid, (starttime, _) in list(self._cache.items()):
+            stat = self.procfs.stat(pid)
+            if stat is None or stat.starttime != starttime:
+                del self._cache[pid]
+
+    def classify(self, pid, matcher, generation):
+        """ Возвращает имя игры, к которой относится процесс, или None. """
+        if pid is None:
+            return None
+        if generation != self._generation:
+            self._cache.clear()
+            self._generation = generation
+
+        stat = self.procfs.stat(pid)
+        if stat is None:
+            self._cache.pop(pid, None)
+            return None
+
+        entry = self._cache.get(pid)
+        if entry is not None and entry[0] == stat.starttime:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        game = self._resolve(stat, matcher)
+        if len(self._cache) >= self.max_entries:
+            self.prune()
+        self._cache[pid] = (stat.starttime, game)
+        return game
+
+    def _resolve(self, stat, matcher):
+        game = matcher.match_process(self.procfs, stat.pid)
+        if game is not None:
+            return game
+
+        # Вверх по дереву: окно принадлежит вспомогательному процессу игры
+        parent = stat.ppid
+        for _ in range(self.max_ancestors):
+            if parent <= 1:
+                break
+            entry = self._cache.get(parent)
+            parent_stat = self.procfs.stat(parent)
+            if parent_stat is None:
+                break
+            if entry is not None and entry[0] == parent_stat.starttime and entry[1] is not None:
+                return entry[1]
+            game = matcher.match_process(self.procfs, parent)
+            if game is not None:
+                return game
+            parent = parent_stat.ppid
+
+        # Вниз по дереву: окно принадлежит обёртке, а игра запущена под ней
+        if stat.comm.casefold() not in _WRAPPER_COMMS:
+            return None
+        queue = self.procfs.children(stat.pid)
+        visited = 0
+        while queue and visited < self.max_descendants:
+            child = queue.pop(0)
+            visited += 1
+            game = matcher.match_process(self.procfs, child)
+            if game is not None:
+                return game
+            queue.extend(self.procfs.children(child))
+        return None
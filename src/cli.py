@@ -0,0 +1,183 @@
+# --- PATH: GameFocusManager/src/cli.py ---
+
+import argparse
+import json
+import select
+import signal
+import sys
+import threading
+import time
+
+from src.eventlog import EventLogReader, format_record
+from src.metrics import Histogram, render_prometheus
+from src.paths import event_log_file
+from src.worker_manager import WorkerManager
+
+COMMANDS = ("run", "start", "stop", "restart", "status", "reload", "metrics", "log")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def format_status(status: dict) -> list:
+    """ Статус воркера в виде строк для терминала. """
+    lines = [f"Worker running (PID: {status.get('pid')}), uptime {status.get('uptime', 0):g} s,"
+             f" focus source: {status.get('focus_source') or '-'}",
+             f"Focused: {status.get('focused_game') or '-'}"
+             if status.get("focus_tracking") is not False else "Focus tracking paused: no watched game is running"]
+    for game in status.get("games", []):
+        limit = game.get("applied_limit")
+        text = "no limit" if limit == 0 else (f"{limit} FPS" if limit is not None else "-")
+        if game.get("frozen"):
+            text += ", frozen"
+        if game.get("demoted"):
+            text += ", demoted"
+        if game.get("running_for") is not None:
+            text += f", running for {game['running_for']:g} s"
+        lines.append(f"  {game.get('game')} (PID {game.get('pid')}): {text}")
+    latency = status.get("last_decision_latency_ms")
+    if latency is not None:
+        lines.append(f"Last decision latency: {latency:g} ms")
+    return lines
+
+
+def parse_duration(text: str) -> float:
+    """ Длительность для --since: число секунд или с суффиксом s/m/h/d (90, 15m, 2h). """
+    unit = DURATION_UNITS.get(text[-1:].lower())
+    try:
+        return float(text[:-1] if unit else text) * (unit or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration: {text!r}") from None
+
+
+def print_log(path, generations: int, since: float = None, types=None, as_json: bool = False) -> int:
+    """ Записи журнала событий за последние since секунд нужных типов. """
+    reader = EventLogReader(path, generations)
+    for record in reader.query(since=None if since is None else time.time() - since, types=types):
+        print(json.dumps(record, ensure_ascii=False) if as_json else format_record(record))
+    return 0
+
+
+def wait_for_status(manager: WorkerManager, timeout: float):
+    """ Ждёт первый статус от только что запущенного воркера. None - не дождались. """
+    channel = manager.channel
+    deadline = time.monotonic() + timeout
+    while channel is not None and not channel.closed:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([channel], [], [], remaining)[0]:
+            return None
+        for message in channel.read_messages():
+            if message.get("event") == "status":
+                return message.get("status")
+    return None
+
+
+def run(manager: WorkerManager) -> int:
+    """ Держит воркер запущенным (с перезапуском после падений) до SIGTERM/SIGINT. """
+    done = threading.Event()
+    # Код выхода воркера, если он завершился сам и перезапуска не будет
+    result = {}
+
+    def on_exit(pid, returncode, restart_delay):
+        if restart_delay is None:
+            result["code"] = returncode
+            done.set()
+
+    def on_signal(*_):
+        done.set()
+
+    manager.add_exit_listener(on_exit)
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+    if not manager.start():
+        return 1
+    # Ждём с таймаутом, чтобы обработчики сигналов срабатывали без задержки
+    while not done.wait(1.0):
+        pass
+    if "code" in result:
+        return result["code"]
+    # Остановка по сигналу; заодно отменяет перезапуск, если воркер только что упал
+    manager.stop()
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="GameFocusManager --headless",
+                                     description="Run and control the Game Focus Manager worker without the GUI")
+    parser.add_argument("command", nargs="?", default="run", choices=COMMANDS,
+                        help="run (default): supervise the worker in the foreground; "
+                             "start: start it in the background; stop, restart, status, reload, "
+                             "metrics (Prometheus text), log (event log)")
+    parser.add_argument("--json", action="store_true", help="Print status or log records as JSON")
+    parser.add_argument("--timeout", type=float, default=3.0,
+                        help="How long to wait for the worker to start or stop")
+    parser.add_argument("--since", type=parse_duration, default=None,
+                        help="log: only records from the last DURATION (seconds or 15m, 2h, 1d)")
+    parser.add_argument("--type", dest="types", action="append", default=None,
+                        help="log: only records of this event type (can be repeated)")
+    parser.add_argument("--log-file", default=None, help="log: event log to read (default: the worker's)")
+    parser.add_argument("--log-generations", type=int, default=3, help=argparse.SUPPRESS)
+    # Для проверки бюджета запуска (benchmarks/startup_budget.py): выйти сразу после инициализации
+    parser.add_argument("--startup-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    manager = WorkerManager()
+    if args.startup_probe:
+        if "PySide6" in sys.modules:
+            print("PySide6 was imported in headless mode.", file=sys.stderr)
+            return 2
+        return 0
+
+    if args.command == "run":
+        return run(manager)
+
+    if args.command == "log":
+        return print_log(args.log_file or event_log_file(), args.log_generations,
+                         since=args.since, types=args.types, as_json=args.json)
+
+    if args.command == "stop":
+        return 0 if manager.stop(args.timeout) else 1
+    if args.command == "restart" and manager.is_running()[0] and not manager.stop(args.timeout):
+        return 1
+
+    if args.command in ("start", "restart"):
+        if not manager.start():
+            return 1
+        status = wait_for_status(manager, args.timeout)
+        # Воркер работает дальше сам по себе; наш конец socketpair просто закрывается
+        manager.disconnect()
+        if status is None:
+            print("Worker did not report its status in time.", file=sys.stderr)
+            return 1
+        print(f"Worker is ready (PID: {status.get('pid')}).")
+        return 0
+
+    if args.command == "status":
+        status = manager.status()
+        if status is None:
+            is_running, pid = manager.is_running()
+            print(f"Worker is running (PID: {pid}) but does not answer." if is_running
+                  else "Worker is not running.")
+            return 3
+        print(json.dumps(status, indent=2, ensure_ascii=False) if args.json else "\n".join(format_status(status)))
+        return 0
+
+    if args.command == "reload":
+        if not manager.reload():
+            print("Worker is not running.", file=sys.stderr)
+            return 1
+        print("Configuration reloaded.")
+        return 0
+
+    if args.command == "metrics":
+        metrics = manager.metrics()
+        if metrics is None:
+            print("Worker is not running.", file=sys.stderr)
+            return 1
+        histograms = {key: Histogram.from_dict(value) for key, value in metrics["histograms"].items()}
+        sys.stdout.write(render_prometheus(metrics["metrics"], histograms))
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
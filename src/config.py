@@ -0,0 +1,444 @@
+# --- PATH: GameFocusManager/src/config.py ---
+
+import fcntl
+import fnmatch
+import json
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.demotion import Demotion
+from src.fsutil import write_textfile
+from src.inotify import IN_CLOSE_WRITE, IN_MOVED_TO, Inotify, InotifyUnavailable
+from src.policy import FREEZE_METHODS, BackgroundPolicy, parse_tiers
+from src.scheduler import DEFAULT_IGNORED_WINDOW_CLASSES
+
+MATCH_MODES = ("exact", "substring", "glob")
+
+# Ядро обрезает /proc/<pid>/comm до 15 символов
+COMM_MAX_LEN = 15
+
+# Версия схемы games.json. Файлы без "schema_version" - версия 0 (до появления версий),
+# они читаются как есть и получают версию при первой записи.
+CONFIG_SCHEMA_VERSION = 1
+# Служебные ключи файла, которые не входят в GameConfig
+SCHEMA_VERSION_KEY = "schema_version"
+GENERATION_KEY = "generation"
+
+# Код выхода воркера, который не смог прочитать games.json при запуске:
+# перезапуск не поможет, пока файл не исправят
+CONFIG_ERROR_EXIT_CODE = 4
+
+
+class GameMatcher:
+    """
+    The `games_to_watch` list compiled once into a matcher.
+
+    In the default "exact" mode a process matches when its comm, its exe
+    basename or the basename of argv[0] (Windows paths included, for Wine and
+    Proton) is one of the listed names - a plain set lookup. "substring"
+    keeps the old behaviour of searching the names in the full command line,
+    "glob" matches shell-style patterns against the same candidates as
+    "exact".
+    """
+
+    def __init__(self, names, mode: str = "exact"):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        self.names = [name for name in names if name]
+        self.mode = mode
+
+        self._exact = {}
+        self._pattern = None
+        if mode == "exact":
+            for name in self.names:
+                key = name.casefold()
+                self._exact.setdefault(key, name)
+                # Длинные имена в comm видны только обрезанными
+                self._exact.setdefault(key[:COMM_MAX_LEN], name)
+        elif mode == "glob" and self.names:
+            self._pattern = re.compile("|".join(f"(?P<g{i}>{fnmatch.translate(name.casefold())})"
+                                                for i, name in enumerate(self.names)))
+
+    def __bool__(self):
+        return bool(self.names)
+
+    @staticmethod
+    def _candidates(procfs, pid):
+        """ Имена, под которыми процесс может значиться в списке игр (читаются по мере надобности). """
+        comm = procfs.comm(pid)
+        if comm:
+            yield comm
+        exe = procfs.exe_name(pid)
+        if exe:
+            yield exe
+        argv = procfs.cmdline(pid)
+        if argv and argv[0]:
+            yield re.split(r"[\\/]", argv[0])[-1]
+
+    def match_process(self, procfs, pid):
+        """ Возвращает имя игры из списка, которой соответствует процесс, или None. """
+        if pid is None or not self.names:
+            return None
+
+        if self.mode == "substring":
+            cmd = " ".join(procfs.cmdline(pid))
+            for name in self.names:
+                if name in cmd:
+                    return name
+            return None
+
+        for candidate in self._candidates(procfs, pid):
+            key = candidate.casefold()
+            if self.mode == "exact":
+                game = self._exact.get(key)
+                if game is not None:
+                    return game
+            else:
+                match = self._pattern.fullmatch(key)
+                if match:
+                    return self.names[int(match.lastgroup[1:])]
+        return None
+
+
+@dataclass
+class GameConfig:
+    """ Parsed contents of games.json. """
+    games_to_watch: list = field(default_factory=list)
+    fps_limit_active: int = 0
+    # Как в поставляемом games.json: фоновая игра почти не тратит GPU
+    fps_limit_inactive: int = 2
+    match_mode: str = "exact"
+    # Писать лимит в конфиги MangoHud отдельных игр вместо глобального MangoHud.conf
+    mangohud_per_app: bool = False
+    # Индивидуальные лимиты: {"dota2": {"fps_limit_active": 120, "fps_limit_inactive": 5}}
+    game_overrides: dict = field(default_factory=dict)
+    # Сколько ждать, прежде чем считать потерю фокуса настоящей (мс)
+    focus_loss_debounce_ms: int = 750
+    # Классы окон, получение фокуса которыми не считается уходом из игры
+    ignored_window_classes: list = field(default_factory=lambda: list(DEFAULT_IGNORED_WINDOW_CLASSES))
+    # Ступени фона после fps_limit_inactive: [{"after": 60, "fps_limit": 1}, {"after": 2400, "freeze": true}].
+    # Для отдельной игры задаются в game_overrides[игра]["background_tiers"].
+    background_tiers: tuple = ()
+    # Чем замораживать игру: "cgroup" (freezer cgroup v2, иначе SIGSTOP) или "signal" (только SIGSTOP)
+    freeze_method: str = "cgroup"
+    # Понижение фоновой игры: ЦП ("efficiency" - E-ядра, "16-23" - список, "" - не трогать),
+    # nice (1..19, 0 - не менять) и приоритет ввода-вывода ("idle", "be:7", "" - не менять).
+    # Для отдельной игры - те же ключи в game_overrides.
+    background_cpus: str = ""
+    background_nice: int = 0
+    background_ioprio: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameConfig":
+        """ Разбирает и проверяет содержимое games.json. Любая ошибка - ValueError. """
+        if not isinstance(data, dict):
+            raise ValueError("the config must be a JSON object")
+        for key, kind in (("games_to_watch", list), ("game_overrides", dict), ("ignored_window_classes", list),
+                          ("background_tiers", list)):
+            if key in data and not isinstance(data[key], kind):
+                raise ValueError(f"{key} must be a {'list' if kind is list else 'mapping'}")
+        try:
+            config = cls._from_dict(data)
+        except (TypeError, AttributeError) as e:
+            raise ValueError(str(e))
+        if config.fps_limit_active < 0:
+            raise ValueError("fps_limit_active must be 0 (no limit) or positive")
+        if config.fps_limit_inactive < 1:
+            raise ValueError("fps_limit_inactive must be at least 1")
+        if config.focus_loss_debounce_ms < 0:
+            raise ValueError("focus_loss_debounce_ms must not be negative")
+        for game, overrides in config.game_overrides.items():
+            if overrides.get("fps_limit_active", 0) < 0 or overrides.get("fps_limit_inactive", 1) < 1:
+                raise ValueError(f"game_overrides[{game!r}]: invalid FPS limit")
+        return config
+
+    @classmethod
+    def _from_dict(cls, data: dict) -> "GameConfig":
+        defaults = cls()
+        match_mode = data.get("match_mode", defaults.match_mode)
+        if match_mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match_mode: {match_mode}")
+        freeze_method = data.get("freeze_method", defaults.freeze_method)
+        if freeze_method not in FREEZE_METHODS:
+            raise ValueError(f"Unknown freeze_method: {freeze_method}")
+        # Проверяем сразу, чтобы ошибка в конфиге не всплыла только при первой потере фокуса
+        demotion = Demotion(str(data.get("background_cpus", defaults.background_cpus)),
+                            int(data.get("background_nice", defaults.background_nice)),
+                            str(data.get("background_ioprio", defaults.background_ioprio)))
+        return cls(
+            games_to_watch=[str(name) for name in data.get("games_to_watch", [])],
+            fps_limit_active=int(data.get("fps_limit_active", defaults.fps_limit_active)),
+            fps_limit_inactive=int(data.get("fps_limit_inactive", defaults.fps_limit_inactive)),
+            match_mode=match_mode,
+            mangohud_per_app=bool(data.get("mangohud_per_app", defaults.mangohud_per_app)),
+            game_overrides={
+                str(game): cls._parse_overrides(overrides)
+                for game, overrides in data.get("game_overrides", {}).items()
+            },
+            focus_loss_debounce_ms=int(data.get("focus_loss_debounce_ms", defaults.focus_loss_debounce_ms)),
+            ignored_window_classes=[str(name) for name in
+                                    data.get("ignored_window_classes", defaults.ignored_window_classes)],
+            background_tiers=parse_tiers(data.get("background_tiers", [])),
+            freeze_method=freeze_method,
+            background_cpus=demotion.cpus,
+            background_nice=demotion.nice,
+            background_ioprio=demotion.ioprio
+        )
+
+    @staticmethod
+    def _parse_overrides(overrides: dict) -> dict:
+        parsed = {key: int(value) for key, value in overrides.items()
+                  if key in ("fps_limit_active", "fps_limit_inactive")}
+        if "background_tiers" in overrides:
+            parsed["background_tiers"] = parse_tiers(overrides["background_tiers"])
+        for key in ("background_cpus", "background_ioprio"):
+            if key in overrides:
+                parsed[key] = str(overrides[key])
+        if "background_nice" in overrides:
+            parsed["background_nice"] = int(overrides["background_nice"])
+        # Проверка значений понижения
+        Demotion(parsed.get("background_cpus", ""), parsed.get("background_nice", 0),
+                 parsed.get("background_ioprio", ""))
+        return parsed
+
+    def to_dict(self) -> dict:
+        data = {
+            "games_to_watch": list(self.games_to_watch),
+            "fps_limit_active": self.fps_limit_active,
+            "fps_limit_inactive": self.fps_limit_inactive,
+            "focus_loss_debounce_ms": self.focus_loss_debounce_ms,
+            "ignored_window_classes": list(self.ignored_window_classes)
+        }
+        # Режим по умолчанию не пишем, чтобы не менять привычный вид файла
+        if self.match_mode != "exact":
+            data["match_mode"] = self.match_mode
+        if self.mangohud_per_app:
+            data["mangohud_per_app"] = True
+        if self.game_overrides:
+            data["game_overrides"] = {
+                game: {key: [tier.to_dict() for tier in value] if key == "background_tiers" else value
+                       for key, value in overrides.items()}
+                for game, overrides in self.game_overrides.items()
+            }
+        if self.background_tiers:
+            data["background_tiers"] = [tier.to_dict() for tier in self.background_tiers]
+        if self.freeze_method != "cgroup":
+            data["freeze_method"] = self.freeze_method
+        if self.background_cpus:
+            data["background_cpus"] = self.background_cpus
+        if self.background_nice:
+            data["background_nice"] = self.background_nice
+        if self.background_ioprio:
+            data["background_ioprio"] = self.background_ioprio
+        return data
+
+    def limits_for(self, game: str) -> tuple:
+        """ (активный, фоновый) лимиты для игры с учётом индивидуальных настроек. """
+        overrides = self.game_overrides.get(game, {})
+        return (overrides.get("fps_limit_active", self.fps_limit_active),
+                overrides.get("fps_limit_inactive", self.fps_limit_inactive))
+
+    def tiers_for(self, game: str) -> tuple:
+        """ Ступени фона для игры: свои из game_overrides или общие. """
+        return self.game_overrides.get(game, {}).get("background_tiers", self.background_tiers)
+
+    def policy_for(self, game: str) -> BackgroundPolicy:
+        return BackgroundPolicy(self.limits_for(game)[1], self.tiers_for(game))
+
+    def demotion_for(self, game: str) -> Demotion:
+        """ Понижение фоновой игры (ЦП, nice, ввод-вывод) с учётом индивидуальных настроек. """
+        overrides = self.game_overrides.get(game, {})
+        return Demotion(overrides.get("background_cpus", self.background_cpus),
+                        overrides.get("background_nice", self.background_nice),
+                        overrides.get("background_ioprio", self.background_ioprio))
+
+    def compile_matcher(self) -> GameMatcher:
+        return GameMatcher(self.games_to_watch, self.match_mode)
+
+
+class ConfigConflict(RuntimeError):
+    """ games.json изменился с момента чтения: запись отменена, чтобы не затереть чужие изменения. """
+
+
+class ConfigUnreadable(RuntimeError):
+    """ games.json нет или его не удалось прочитать, а прежнего конфига, с которым можно работать дальше, нет. """
+
+
+def migrate_config(data: dict) -> dict:
+    """
+    Приводит содержимое файла к текущей версии схемы. Новые версии добавляют
+    сюда свои шаги. Файл более новой версии, чем знает программа, - ValueError.
+    """
+    version = data.get(SCHEMA_VERSION_KEY, 0)
+    if not isinstance(version, int) or version < 0:
+        raise ValueError(f"invalid {SCHEMA_VERSION_KEY}: {version!r}")
+    if version > CONFIG_SCHEMA_VERSION:
+        raise ValueError(f"the config was written by a newer version (schema {version}, "
+                         f"this one supports {CONFIG_SCHEMA_VERSION})")
+    # 0 -> 1: поля не менялись, появились только schema_version и generation
+    return dict(data, **{SCHEMA_VERSION_KEY: CONFIG_SCHEMA_VERSION})
+
+
+class ConfigStore:
+    """
+    The single reader/writer of games.json, shared by SettingsTab, the CLI
+    and the worker.
+
+    Writes are transactions. Writers are serialized by a lock file. A save
+    is refused with ConfigConflict if the file changed since this store
+    last read it. The new content goes to a temp file, is fsynced and
+    renamed over games.json, so a reader sees either the old file or the
+    new one, never half of it. Every commit bumps the `generation` stored
+    in the file.
+
+    Readers are notified through inotify (ConfigWatcher) or
+    QFileSystemWatcher. reload_if_changed() compares the file's (mtime,
+    size, inode), so each consumer reloads once per commit, and never after
+    its own write. `revision` counts loads in this process; caches derived
+    from the config are keyed by it, because a hand edit changes the
+    config without bumping `generation`.
+    """
+
+    def __init__(self, config_file, default_file=None):
+        self.config_file = Path(config_file)
+        # Поставляемый games.json, из которого создаётся конфиг пользователя
+        self.default_file = Path(default_file) if default_file else None
+        self.lock_file = self.config_file.with_name(f".{self.config_file.name}.lock")
+        self.config = None
+        self.matcher = None
+        self.generation = 0
+        self.revision = 0
+        self._signature = None
+
+    def _stat_signature(self):
+        st = self.config_file.stat()
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _read(self) -> tuple:
+        """ (сигнатура, содержимое после миграции) текущего файла. """
+        signature = self._stat_signature()
+        with self.config_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("the config must be a JSON object")
+        return signature, migrate_config(data)
+
+    def _apply(self, config: GameConfig, generation: int, signature):
+        self.config = config
+        self.matcher = config.compile_matcher()
+        self.generation = generation
+        self.revision += 1
+        self._signature = signature
+
+    def load(self) -> GameConfig:
+        """ Читает файл безусловно. Ошибки (нет файла, битый JSON, неверные значения) пробрасываются. """
+        signature, data = self._read()
+        config = GameConfig.from_dict(data)
+        self._apply(config, int(data.get(GENERATION_KEY, 0)), signature)
+        return config
+
+    def reload_if_changed(self) -> bool:
+        """ Перечитывает файл, только если он изменился. Возвращает True при перезагрузке. """
+        if self.config is not None and self._stat_signature() == self._signature:
+            return False
+        self.load()
+        return True
+
+    def ensure_exists(self) -> bool:
+        """
+        Создаёт games.json, если его нет: из поставляемого файла (для тех, кто
+        обновляется, это их прежний конфиг рядом с программой) или из значений
+        по умолчанию. Возвращает True, если файл был создан.
+        """
+        if self.config_file.exists():
+            return False
+        config = GameConfig()
+        if self.default_file is not None and self.default_file.is_file():
+            try:
+                config = GameConfig.from_dict(migrate_config(json.loads(self.default_file.read_text(encoding="utf-8"))))
+            except ValueError as e:
+                print(f"Ignoring invalid default config {self.default_file}: {e}")
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            if self.config_file.exists():
+                return False
+            self._commit(config, 1)
+        return True
+
+    @contextmanager
+    def _locked(self):
+        """ Блокировка записи (flock на отдельном файле: сам конфиг заменяется переименованием). """
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _commit(self, config: GameConfig, generation: int):
+        data = {SCHEMA_VERSION_KEY: CONFIG_SCHEMA_VERSION, GENERATION_KEY: generation}
+        data.update(config.to_dict())
+        write_textfile(self.config_file, json.dumps(data, indent=2, ensure_ascii=False) + "\n", fsync=True)
+        self._apply(config, generation, self._stat_signature())
+
+    def save(self, config: GameConfig, check: bool = True) -> int:
+        """
+        Записывает конфиг одной транзакцией и делает его текущим. С check=True
+        запись отменяется (ConfigConflict), если файл изменился с последнего
+        чтения этим хранилищем. Возвращает новое поколение.
+        """
+        # Проверяем до записи, чтобы в файл не попало то, что потом не прочитается
+        GameConfig.from_dict(config.to_dict())
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._locked():
+            try:
+                signature, current = self._read()
+                generation = int(current.get(GENERATION_KEY, 0))
+            except FileNotFoundError:
+                signature, generation = None, 0
+            except ValueError:
+                # Битый файл заменяем, но поколение продолжаем
+                signature, generation = self._signature, self.generation
+            if check and self._signature is not None and signature != self._signature:
+                raise ConfigConflict(f"{self.config_file} was changed by another program")
+            self._commit(config, generation + 1)
+        return self.generation
+
+
+class ConfigWatcher:
+    """
+    Wakes the worker when games.json is rewritten. Watches the parent
+    directory through inotify, so both in-place writes and
+    write-and-rename replacements are seen.
+    """
+
+    def __init__(self, config_file):
+        self.config_file = Path(config_file)
+        self._inotify = Inotify()
+        try:
+            self._inotify.add_watch(str(self.config_file.parent), IN_CLOSE_WRITE | IN_MOVED_TO)
+        except OSError as e:
+            self._inotify.close()
+            raise InotifyUnavailable(str(e))
+
+    def fileno(self) -> int:
+        return self._inotify.fileno()
+
+    def changed(self) -> bool:
+        """ Забирает события и сообщает, касались ли они файла конфига. """
+        name = self.config_file.name
+        return any(event_name == name for _, event_name, _ in self._inotify.read_events())
+
+    def close(self):
+        self._inotify.close()
+
+
+def open_config_watcher(config_file):
+    """ ConfigWatcher или None, если inotify недоступен (тогда проверяем mtime). """
+    try:
+        return ConfigWatcher(config_file)
+    except InotifyUnavailable:
+        return None
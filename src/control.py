@@ -0,0 +1,274 @@
+# --- PATH: GameFocusManager/src/control.py ---
+
+import errno
+import json
+import os
+import selectors
+import socket
+import time
+
+# Протокол: по одному JSON-объекту на строку в обе стороны.
+# Запрос:  {"cmd": "status" | "reload" | "stop" | "subscribe" | "ping"}
+# Ответ:   {"ok": true, ...} или {"ok": false, "error": "..."}
+# Подписчики дополнительно получают {"event": "status", "status": {...}} при каждом изменении.
+
+# Сколько неотправленных байт терпим от клиента, который не читает ответы; дальше - отключаем
+MAX_PENDING_OUTPUT = 1024 * 1024
+
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+class ControlChannel:
+    """
+    One end of a control connection with line framing. Reads are
+    non-blocking, so the channel can be driven by a selector or a
+    QSocketNotifier. Used by both the worker and WorkerManager.
+
+    Status pushes are coalesced: while earlier output is still unsent, only
+    the latest snapshot is kept, so a subscriber that stops reading costs
+    one snapshot instead of an ever-growing buffer.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.sock.setblocking(False)
+        self.closed = False
+        self.subscribed = False
+        self._inbuf = b""
+        self._outbuf = b""
+        # Последний статус, ждущий отправки (заменяет предыдущий, пока клиент не читает)
+        self._latest = b""
+
+    def fileno(self) -> int:
+        return self.sock.fileno()
+
+    def read_messages(self) -> list:
+        """ Забирает все полные сообщения. При разрыве соединения closed становится True. """
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.closed = True
+                break
+            self._inbuf += data
+
+        messages = []
+        while b"\n" in self._inbuf:
+            line, self._inbuf = self._inbuf.split(b"\n", 1)
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                continue
+        return messages
+
+    def send(self, message: dict, coalesce: bool = False) -> bool:
+        """
+        Ставит сообщение в очередь и пытается отправить. Возвращает True, если всё ушло.
+        coalesce=True - снимок состояния: пока предыдущий вывод не ушёл, он заменяет прежний снимок.
+        """
+        data = encode_message(message)
+        if coalesce:
+            self._latest = data
+        else:
+            self._outbuf += self._latest + data
+            self._latest = b""
+            if len(self._outbuf) > MAX_PENDING_OUTPUT:
+                # Клиент не читает ответы - отключаем, а не копим их в памяти воркера
+                self.closed = True
+                return False
+        return self.flush()
+
+    def flush(self) -> bool:
+        while not self.closed:
+            if not self._outbuf:
+                if not self._latest:
+                    break
+                self._outbuf, self._latest = self._latest, b""
+            try:
+                sent = self.sock.send(self._outbuf)
+            except (BlockingIOError, InterruptedError):
+                return False
+            except OSError:
+                self.closed = True
+                return False
+            self._outbuf = self._outbuf[sent:]
+        return not self.has_pending_output
+
+    @property
+    def has_pending_output(self) -> bool:
+        return bool(self._outbuf or self._latest)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class ControlServer:
+    """
+    Worker side of the control protocol. Listens on a Unix socket in the
+    runtime dir and can also adopt an already connected socket (the
+    socketpair end handed over by WorkerManager), which is subscribed from
+    the start. Everything is driven by the worker's selector.
+
+    `handler(channel, request)` returns the reply dict for a request.
+    """
+
+    def __init__(self, selector, handler, path=None, inherited_fd: int = None):
+        self.selector = selector
+        self.handler = handler
+        self.path = str(path) if path else None
+        self.listener = None
+        self.channels = []
+
+        if self.path:
+            self._listen()
+        if inherited_fd is not None:
+            channel = self._add_channel(socket.socket(fileno=inherited_fd))
+            channel.subscribed = True
+
+    def _listen(self):
+        # Сокет от прошлого запуска мог остаться после аварийного завершения
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise RuntimeError(f"Another worker is already listening on {self.path}")
+            finally:
+                probe.close()
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.listener.listen(8)
+        self.listener.setblocking(False)
+        self.selector.register(self.listener, selectors.EVENT_READ, self._on_accept)
+
+    def _add_channel(self, sock) -> ControlChannel:
+        channel = ControlChannel(sock)
+        self.channels.append(channel)
+        self.selector.register(channel.sock, selectors.EVENT_READ, lambda: self._on_readable(channel))
+        return channel
+
+    def _on_accept(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                if e.errno in (errno.EMFILE, errno.ENFILE):
+                    return
+                raise
+            self._add_channel(sock)
+
+    def _on_readable(self, channel: ControlChannel):
+        for request in channel.read_messages():
+            try:
+                reply = self.handler(channel, request)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            if reply is not None:
+                channel.send(reply)
+        self._update_interest(channel)
+
+    def _on_writable(self, channel: ControlChannel):
+        channel.flush()
+        self._update_interest(channel)
+
+    def _update_interest(self, channel: ControlChannel):
+        if channel.closed:
+            self._drop(channel)
+        elif channel.has_pending_output:
+            self.selector.modify(channel.sock, selectors.EVENT_READ | selectors.EVENT_WRITE,
+                                 lambda: self._on_io(channel))
+        else:
+            self.selector.modify(channel.sock, selectors.EVENT_READ, lambda: self._on_readable(channel))
+
+    def _on_io(self, channel: ControlChannel):
+        # Событие могло прийти как на чтение, так и на запись - делаем оба шага
+        channel.flush()
+        self._on_readable(channel)
+
+    def _drop(self, channel: ControlChannel):
+        if channel in self.channels:
+            self.channels.remove(channel)
+            try:
+                self.selector.unregister(channel.sock)
+            except (KeyError, ValueError):
+                pass
+        channel.close()
+
+    def publish(self, message: dict, coalesce: bool = False):
+        """ Рассылает сообщение всем подписчикам (coalesce - см. ControlChannel.send). """
+        for channel in list(self.channels):
+            if channel.subscribed:
+                channel.send(message, coalesce)
+                self._update_interest(channel)
+
+    def close(self):
+        for channel in list(self.channels):
+            channel.flush()
+            self._drop(channel)
+        if self.listener is not None:
+            self.selector.unregister(self.listener)
+            self.listener.close()
+            self.listener = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class ControlClient:
+    """
+    Blocking one-shot requests to a running worker over its control socket.
+    """
+
+    def __init__(self, path, timeout: float = 1.0):
+        self.path = str(path)
+        self.timeout = timeout
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, cmd: str, **params) -> dict:
+        """ Отправляет команду и ждёт ответ. OSError, если воркер недоступен. """
+        sock = self.connect()
+        try:
+            sock.sendall(encode_message(dict(params, cmd=cmd)))
+            data = b""
+            deadline = time.monotonic() + self.timeout
+            while b"\n" not in data:
+                sock.settimeout(max(0.01, deadline - time.monotonic()))
+                chunk = sock.recv(65536)
+                if not chunk:
+                    raise ConnectionResetError("Worker closed the control connection")
+                data += chunk
+            return json.loads(data.split(b"\n", 1)[0])
+        finally:
+            sock.close()
+
+    def subscribe(self) -> ControlChannel:
+        """ Открывает соединение, на которое воркер будет присылать изменения статуса. """
+        sock = self.connect()
+        sock.sendall(encode_message({"cmd": "subscribe"}))
+        return ControlChannel(sock)
@@ -0,0 +1,68 @@
+# --- PATH: GameFocusManager/src/demotion.py ---
+
+from dataclasses import dataclass
+
+# Кодирование приоритета ввода-вывода для ioprio_set (linux/ioprio.h)
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+
+
+def parse_cpulist(text: str) -> frozenset:
+    """ Разбирает список ЦП в формате ядра: "0-3,8,10-11". Ошибки - ValueError. """
+    cpus = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        first = int(first)
+        last = int(last) if sep else first
+        if first < 0 or last < first:
+            raise ValueError(f"Invalid CPU range: {part!r}")
+        cpus.update(range(first, last + 1))
+    return frozenset(cpus)
+
+
+def format_cpulist(cpus) -> str:
+    ranges, cpus = [], sorted(cpus)
+    for cpu in cpus:
+        if ranges and ranges[-1][1] == cpu - 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def parse_ioprio(text: str):
+    """ "idle" или "be:<0-7>" -> значение для ioprio_set; "" -> None (не менять). """
+    text = text.strip().lower()
+    if not text:
+        return None
+    if text == "idle":
+        return IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT
+    cls, sep, level = text.partition(":")
+    if cls == "be" and sep and level.isdigit() and int(level) <= 7:
+        return (IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT) | int(level)
+    raise ValueError(f"Unknown I/O priority: {text!r} (expected idle or be:<0-7>)")
+
+
+@dataclass(frozen=True)
+class Demotion:
+    """ What an unfocused game is demoted to: a CPU set, a nice value and an I/O priority. """
+    # "" - привязку не менять, "efficiency" - E-ядра гибридного ЦП, иначе список ЦП ("16-23")
+    cpus: str = ""
+    # 0 - не менять, иначе 1..19
+    nice: int = 0
+    # "" - не менять, "idle" или "be:<0-7>"
+    ioprio: str = ""
+
+    def __post_init__(self):
+        if self.cpus and self.cpus != "efficiency" and not parse_cpulist(self.cpus):
+            raise ValueError(f"Empty CPU list: {self.cpus!r}")
+        if not 0 <= self.nice <= 19:
+            raise ValueError(f"background_nice must be in 0..19, got {self.nice}")
+        parse_ioprio(self.ioprio)
+
+    def __bool__(self):
+        return bool(self.cpus or self.nice or self.ioprio)
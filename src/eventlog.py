@@ -0,0 +1,177 @@
+# --- PATH: GameFocusManager/src/eventlog.py ---
+
+import json
+import os
+import time
+from pathlib import Path
+
+
+def rotated_files(path, generations: int) -> list:
+    """ Файлы журнала от самого старого к текущему: events.jsonl.N, ..., events.jsonl.1, events.jsonl. """
+    path = Path(path)
+    return [path.with_name(f"{path.name}.{i}") for i in range(generations, 0, -1)] + [path]
+
+
+def format_record(record: dict) -> str:
+    """ Человекочитаемая строка в привычном формате: [EVENT] [HH:MM:SS] сообщение. """
+    stamp = time.strftime("%H:%M:%S", time.localtime(record.get("ts", 0)))
+    return f"[{record.get('level', 'INFO')}] [{stamp}] {record.get('msg', '')}"
+
+
+class EventLogWriter:
+    """
+    Structured worker log: one JSON object per line with at least `ts`
+    (unix time), `level`, `type` and `msg`, plus event fields such as pid,
+    game, old_limit/new_limit and latency_ms.
+
+    Records are buffered and written in batches by flush(). Errors are
+    flushed right away. When the file would grow past `max_bytes` it is
+    rotated, keeping `generations` old files.
+    """
+
+    def __init__(self, path, max_bytes: int = 1024 * 1024, generations: int = 3,
+                 max_buffered: int = 64):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.generations = generations
+        self.max_buffered = max_buffered
+        self._buffer = []
+        self._fd = None
+        self._size = 0
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        self._size = os.fstat(self._fd).st_size
+
+    def _rotate(self):
+        os.close(self._fd)
+        self._fd = None
+        files = rotated_files(self.path, self.generations)
+        # Самое старое поколение затирается следующим
+        for older, newer in zip(files, files[1:]):
+            try:
+                os.replace(newer, older)
+            except FileNotFoundError:
+                pass
+        self._open()
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def write(self, level: str, event_type: str, message: str, **fields):
+        record = {"ts": round(time.time(), 3), "level": level, "type": event_type, "msg": message}
+        record.update((key, value) for key, value in fields.items() if value is not None)
+        self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        if level == "ERROR" or len(self._buffer) >= self.max_buffered:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._fd is None:
+            self._open()
+        data = "".join(self._buffer).encode()
+        self._buffer.clear()
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        os.write(self._fd, data)
+        self._size += len(data)
+
+    def close(self):
+        self.flush()
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class EventLogReader:
+    """
+    Queries the rotated JSONL files by time range and type. Files whose
+    time span is outside the range are skipped by looking only at their
+    first and last records, and the start of the range is found by binary
+    search over byte offsets, so old history is never scanned.
+    """
+
+    def __init__(self, path, generations: int = 3):
+        self.path = Path(path)
+        self.generations = generations
+
+    @staticmethod
+    def _parse(line: bytes):
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    def _record_at(self, f, offset: int, size: int):
+        """ Первая полная запись, начинающаяся не раньше offset: (смещение, запись). """
+        f.seek(offset)
+        if offset > 0:
+            f.readline()  # дочитываем строку, в середину которой попали
+        while f.tell() < size:
+            start = f.tell()
+            record = self._parse(f.readline())
+            if record is not None:
+                return start, record
+        return size, None
+
+    def _last_ts(self, f, size: int):
+        """ Время последней записи файла: читаем только хвост. """
+        tail = min(size, 64 * 1024)
+        f.seek(size - tail)
+        for line in reversed(f.read(tail).splitlines()):
+            record = self._parse(line)
+            if record is not None:
+                return record.get("ts", 0)
+        return None
+
+    def _seek_since(self, f, size: int, since: float) -> int:
+        """ Смещение первой записи с ts >= since (бинарный поиск по байтам). """
+        low, high = 0, size
+        while low < high:
+            middle = (low + high) // 2
+            _, record = self._record_at(f, middle, size)
+            if record is None or record.get("ts", 0) >= since:
+                high = middle
+            else:
+                low = middle + 1
+        return self._record_at(f, low, size)[0]
+
+    def query(self, since: float = None, until: float = None, types=None):
+        """ Итерирует записи с since <= ts <= until нужных типов в хронологическом порядке. """
+        types = set(types) if types else None
+        for path in rotated_files(self.path, self.generations):
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    continue
+                first = self._record_at(f, 0, size)[1]
+                if first is None:
+                    continue
+                if until is not None and first.get("ts", 0) > until:
+                    return  # этот и все более новые файлы позже диапазона
+                if since is not None:
+                    last_ts = self._last_ts(f, size)
+                    if last_ts is not None and last_ts < since:
+                        continue
+                    f.seek(self._seek_since(f, size, since))
+                else:
+                    f.seek(0)
+
+                for line in f:
+                    record = self._parse(line)
+                    if record is None:
+                        continue
+                    ts = record.get("ts", 0)
+                    if since is not None and ts < since:
+                        continue
+                    if until is not None and ts > until:
+                        return
+                    if types is None or record.get("type") in types:
+                        yield record
@@ -0,0 +1,349 @@
+# --- PATH: GameFocusManager/src/focus.py ---
+
+import os
+import subprocess
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+
+class FocusSourceUnavailable(Exception):
+    """ Источник фокуса не может работать в текущем окружении. """
+
+
+@dataclass
+class FocusEvent:
+    """ Focus moved to a window owned by `pid` (None if nothing is focused). """
+    pid: int = None
+    window_class: str = ""
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+class FocusSource:
+    """
+    Base interface for anything that can tell the worker which process owns
+    the currently focused window.
+
+    Polling sources only implement active_pid(). Event-driven sources also
+    expose a file descriptor that becomes readable when focus changes, and
+    return the accumulated changes from read_events().
+    """
+
+    event_driven = False
+
+    def open(self):
+        """ Вызывается один раз перед началом работы воркера. """
+
+    def close(self):
+        """ Вызывается при остановке воркера. """
+
+    def suspend(self):
+        """ Ни одна игра не запущена: источник может перестать следить за фокусом до resume(). """
+
+    def resume(self):
+        """ Снова нужен фокус. Событийный источник должен сообщить текущее активное окно. """
+
+    def active_pid(self):
+        """ Возвращает PID процесса активного окна или None, если его не удалось определить. """
+        raise NotImplementedError
+
+    def fileno(self):
+        """ Дескриптор, по готовности которого нужно вызвать read_events(). """
+        return None
+
+    def read_events(self) -> list:
+        """ Забирает накопленные события смены фокуса. """
+        return []
+
+
+class KdotoolFocusSource(FocusSource):
+    """
+    Queries KWin through kdotool. Both lookups are chained into a single call,
+    so a poll costs one process spawn instead of two.
+    """
+
+    def __init__(self, executable: str = "kdotool", timeout: float = 2.0):
+        self.executable = executable
+        self.timeout = timeout
+
+    def active_pid(self):
+        try:
+            result = subprocess.run(
+                [self.executable, "getactivewindow", "getwindowpid"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout,
+                text=True
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+
+        # При цепочке команд kdotool печатает результат последней из них
+        lines = result.stdout.split()
+        if result.returncode != 0 or not lines:
+            return None
+        try:
+            return int(lines[-1])
+        except ValueError:
+            return None
+
+
+# Скрипт KWin: на каждую смену активного окна вызывает наш D-Bus метод.
+# Plasma 6 использует windowActivated/activeWindow, Plasma 5 - clientActivated/activeClient.
+KWIN_SCRIPT = """
+function report(window) {
+    callDBus("%(service)s", "%(path)s", "%(interface)s", "WindowActivated",
+             window ? window.pid : 0, window ? String(window.resourceClass) : "");
+}
+if (workspace.windowActivated) {
+    workspace.windowActivated.connect(report);
+    report(workspace.activeWindow);
+} else {
+    workspace.clientActivated.connect(report);
+    report(workspace.activeClient);
+}
+"""
+
+
+class KWinDBusFocusSource(FocusSource):
+    """
+    Event-driven focus tracking over the session D-Bus. A tiny KWin script is
+    loaded through org.kde.kwin.Scripting; it calls back into this process on
+    every active-window change, so the worker sleeps until focus really moves.
+    Requires the optional `jeepney` package.
+    """
+
+    event_driven = True
+
+    SERVICE = "org.gamefocusmanager.Worker"
+    OBJECT_PATH = "/FocusTracker"
+    INTERFACE = "org.gamefocusmanager.FocusTracker"
+    PLUGIN_NAME = "gamefocusmanager_focus"
+
+    def __init__(self, timeout: float = 2.0):
+        self.timeout = timeout
+        self.connection = None
+        self.script_file = None
+        self._pid = None
+        self._calls = deque()
+        self._owner_changes = deque()
+        # События, разобранные вне read_events() (пока ждали ответ KWin)
+        self._events = []
+        self._suspended = False
+
+    def _call_kwin(self, path: str, interface: str, method: str, signature: str = None, body=()):
+        from jeepney import DBusAddress, new_method_call
+        from jeepney.wrappers import unwrap_msg
+
+        address = DBusAddress(path, bus_name="org.kde.KWin", interface=interface)
+        message = new_method_call(address, method, signature, body)
+        return unwrap_msg(self.connection.send_and_get_reply(message, timeout=self.timeout))
+
+    def _install_script(self):
+        """ Загружает (или перезагружает) скрипт KWin и запускает его. """
+        self._call_kwin("/Scripting", "org.kde.kwin.Scripting", "unloadScript", "s", (self.PLUGIN_NAME,))
+        self._call_kwin("/Scripting", "org.kde.kwin.Scripting", "loadScript", "ss",
+                        (self.script_file, self.PLUGIN_NAME))
+        # start() запускает все загруженные, но ещё не запущенные скрипты
+        self._call_kwin("/Scripting", "org.kde.kwin.Scripting", "start")
+        # Вызовы скрипта, пришедшие во время send_and_get_reply, фильтр уже положил в очередь:
+        # сокет из-за них читаемым не станет, поэтому разбираем их сразу
+        self._drain_calls()
+
+    def _drain_calls(self):
+        """ Отвечает на накопленные вызовы скрипта KWin и запоминает активное окно. """
+        from jeepney import new_method_return
+
+        while self._calls:
+            message = self._calls.popleft()
+            self.connection.send(new_method_return(message))
+            if len(message.body) >= 2:
+                pid = int(message.body[0]) or None
+                self._pid = pid
+                self._events.append(FocusEvent(pid, str(message.body[1])))
+
+    def open(self):
+        try:
+            from jeepney import MatchRule
+            from jeepney.bus_messages import message_bus
+            from jeepney.io.blocking import open_dbus_connection
+        except ImportError:
+            raise FocusSourceUnavailable("jeepney is not installed")
+
+        try:
+            self.connection = open_dbus_connection(bus="SESSION")
+            reply = self.connection.send_and_get_reply(
+                message_bus.RequestName(self.SERVICE, 4), timeout=self.timeout)  # 4 = DO_NOT_QUEUE
+            if reply.body[0] != 1:
+                raise FocusSourceUnavailable(f"D-Bus name {self.SERVICE} is already taken")
+
+            # Вызовы от скрипта KWin могут прийти, пока мы ждём ответы на свои запросы,
+            # поэтому фильтры ставим до загрузки скрипта
+            self.connection.filter(MatchRule(type="method_call", interface=self.INTERFACE),
+                                   queue=self._calls)
+            owner_rule = MatchRule(type="signal", sender="org.freedesktop.DBus",
+                                   interface="org.freedesktop.DBus", member="NameOwnerChanged")
+            owner_rule.add_arg_condition(0, "org.kde.KWin")
+            self.connection.filter(owner_rule, queue=self._owner_changes)
+            self.connection.send_and_get_reply(message_bus.AddMatch(owner_rule), timeout=self.timeout)
+
+            fd, self.script_file = tempfile.mkstemp(prefix="gfm-focus-", suffix=".js")
+            with os.fdopen(fd, "w") as f:
+                f.write(KWIN_SCRIPT % {"service": self.SERVICE, "path": self.OBJECT_PATH,
+                                       "interface": self.INTERFACE})
+            self._install_script()
+        except FocusSourceUnavailable:
+            self.close()
+            raise
+        except Exception as e:
+            # Нет сессионной шины, нет KWin или он отказал - работаем без событий
+            self.close()
+            raise FocusSourceUnavailable(f"KWin D-Bus focus tracking unavailable: {e}")
+
+    def suspend(self):
+        # Выгружаем скрипт: KWin перестаёт вызывать нас на каждое переключение окна
+        if self.connection is not None and not self._suspended:
+            self._suspended = True
+            try:
+                self._call_kwin("/Scripting", "org.kde.kwin.Scripting", "unloadScript", "s",
+                                (self.PLUGIN_NAME,))
+            except Exception:
+                pass
+
+    def resume(self):
+        if self.connection is not None and self._suspended:
+            self._suspended = False
+            try:
+                # Скрипт при загрузке сообщает текущее активное окно
+                self._install_script()
+            except Exception as e:
+                raise FocusSourceUnavailable(f"Failed to reload the KWin script: {e}")
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self._call_kwin("/Scripting", "org.kde.kwin.Scripting", "unloadScript", "s",
+                                (self.PLUGIN_NAME,))
+            except Exception:
+                pass
+            self.connection.close()
+            self.connection = None
+        if self.script_file:
+            try:
+                os.unlink(self.script_file)
+            except OSError:
+                pass
+            self.script_file = None
+
+    def fileno(self):
+        return self.connection.sock.fileno()
+
+    def active_pid(self):
+        return self._pid
+
+    def read_events(self) -> list:
+        # Забираем всё, что уже лежит в сокете; фильтры раскладывают сообщения по очередям
+        try:
+            while True:
+                self.connection.recv_messages(timeout=0)
+        except TimeoutError:
+            pass
+        except (OSError, EOFError) as e:
+            raise FocusSourceUnavailable(f"D-Bus connection lost: {e}")
+
+        self._drain_calls()
+        # KWin перезапустился - наш скрипт пропал вместе с ним
+        while self._owner_changes:
+            _, _, new_owner = self._owner_changes.popleft().body
+            if new_owner and not self._suspended:
+                self._install_script()
+        events, self._events = self._events, []
+        return events
+
+
+class FakeFocusSource(FocusSource):
+    """
+    In-memory focus source for tests: the active PID is whatever was last
+    passed to set_active().
+    """
+
+    def __init__(self, pid=None):
+        self.pid = pid
+
+    def set_active(self, pid):
+        self.pid = pid
+
+    def active_pid(self):
+        return self.pid
+
+
+class LocalFocusEmitter(FocusSource):
+    """
+    Event-driven stand-in for the KWin source. emit() timestamps the event
+    and wakes the worker through a pipe, exactly like a D-Bus message would,
+    so focus-change-to-limit-applied latency can be measured without KWin.
+    """
+
+    event_driven = True
+
+    def __init__(self, pid=None):
+        self.pid = pid
+        self._pending = deque()
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def emit(self, pid, window_class: str = "", timestamp: float = None) -> FocusEvent:
+        """ Сообщает о смене фокуса; можно вызывать из другого потока. """
+        event = FocusEvent(pid, window_class) if timestamp is None else FocusEvent(pid, window_class, timestamp)
+        self._pending.append(event)
+        try:
+            os.write(self._write_fd, b"\0")
+        except BlockingIOError:
+            pass  # Канал и так переполнен - воркер уже будет разбужен
+        return event
+
+    def close(self):
+        for fd in (self._read_fd, self._write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def fileno(self):
+        return self._read_fd
+
+    def active_pid(self):
+        return self.pid
+
+    def read_events(self) -> list:
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        events = []
+        while self._pending:
+            event = self._pending.popleft()
+            self.pid = event.pid
+            events.append(event)
+        return events
+
+
+def open_focus_source(log=None) -> FocusSource:
+    """
+    Открывает лучший доступный источник фокуса: события KWin по D-Bus,
+    а если они недоступны - опрос через kdotool.
+    """
+    source = KWinDBusFocusSource()
+    try:
+        source.open()
+        return source
+    except FocusSourceUnavailable as e:
+        if log is not None:
+            log("INFO", f"{e}; falling back to kdotool polling.")
+
+    source = KdotoolFocusSource()
+    source.open()
+    return source
@@ -0,0 +1,166 @@
+# --- PATH: GameFocusManager/src/freezer.py ---
+
+import json
+import os
+import signal
+from pathlib import Path
+
+from src.fsutil import write_textfile
+
+
+class ProcessFreezer:
+    """
+    Suspends a game completely once it has been in the background long
+    enough, and resumes it on refocus.
+
+    With the "cgroup" method the cgroup v2 freezer (cgroup.freeze) is used,
+    but only if the game's cgroup holds nothing but the game's own process
+    tree. A Steam game usually shares its scope with the Steam client, and
+    freezing that would freeze Steam too. Otherwise the game's process tree
+    is stopped with SIGSTOP and resumed with SIGCONT, checking each PID's
+    start time so that a reused PID is never signalled.
+
+    `cgroup_root` and the ProcFS root are injectable, so the freezer can run
+    against fixture directories. What is frozen is also written to
+    `state_file`, and recover() thaws it after a crash.
+    """
+
+    def __init__(self, procfs, cgroup_root="/sys/fs/cgroup", method: str = "cgroup",
+                 state_file=None, max_processes: int = 256):
+        self.procfs = procfs
+        self.cgroup_root = Path(cgroup_root)
+        self.method = method
+        self.state_file = Path(state_file) if state_file else None
+        self.max_processes = max_processes
+        # pid игры -> {"method", "cgroup", "members": [[pid, starttime], ...]}
+        self.frozen = {}
+
+    # --- Дерево процессов и cgroup ---
+
+    def process_tree(self, pid: int) -> list:
+        """ Процесс и все его потомки: [(pid, starttime)]. """
+        return self.procfs.process_tree(pid, self.max_processes)
+
+    def cgroup_of(self, pid: int):
+        """ Каталог cgroup v2 процесса с поддержкой freezer или None. """
+        relative = self.procfs.cgroup(pid)
+        if relative is None:
+            return None
+        path = self.cgroup_root / relative.lstrip("/")
+        return path if (path / "cgroup.freeze").exists() else None
+
+    @staticmethod
+    def _cgroup_pids(path: Path) -> set:
+        pids = set()
+        for directory, _, files in os.walk(path):
+            if "cgroup.procs" in files:
+                try:
+                    pids.update(int(line) for line in Path(directory, "cgroup.procs").read_text().split())
+                except (OSError, ValueError):
+                    return None
+        return pids
+
+    def _exclusive_cgroup(self, pid: int, members: list):
+        """ cgroup игры, если в нём (и его потомках) нет чужих процессов, иначе None. """
+        path = self.cgroup_of(pid)
+        if path is None or path == self.cgroup_root:
+            return None
+        pids = self._cgroup_pids(path)
+        if not pids or not pids <= {member for member, _ in members}:
+            return None
+        return path
+
+    # --- Заморозка ---
+
+    def freeze(self, pid: int):
+        """ Замораживает игру. Возвращает использованный способ ("cgroup"/"signal") или None. """
+        if pid in self.frozen:
+            return self.frozen[pid]["method"]
+        members = self.process_tree(pid)
+        if not members:
+            return None
+
+        cgroup = self._exclusive_cgroup(pid, members) if self.method == "cgroup" else None
+        if cgroup is not None:
+            try:
+                (cgroup / "cgroup.freeze").write_text("1")
+                entry = {"method": "cgroup", "cgroup": str(cgroup), "members": members}
+            except OSError:
+                cgroup = None
+        if cgroup is None:
+            stopped = [(member, starttime) for member, starttime in members
+                       if self._signal(member, signal.SIGSTOP)]
+            if not stopped:
+                return None
+            entry = {"method": "signal", "cgroup": None, "members": stopped}
+
+        self.frozen[pid] = entry
+        self._save_state()
+        return entry["method"]
+
+    def thaw(self, pid: int) -> bool:
+        """ Размораживает игру. False - она не была заморожена. """
+        entry = self.frozen.pop(pid, None)
+        if entry is None:
+            return False
+        self._thaw_entry(entry)
+        self._save_state()
+        return True
+
+    def thaw_all(self):
+        for pid in list(self.frozen):
+            self.thaw(pid)
+
+    def forget(self, pid: int):
+        """ Игра завершилась - размораживать больше нечего. """
+        if self.frozen.pop(pid, None) is not None:
+            self._save_state()
+
+    def is_frozen(self, pid: int) -> bool:
+        return pid in self.frozen
+
+    def _thaw_entry(self, entry: dict):
+        if entry["method"] == "cgroup":
+            try:
+                Path(entry["cgroup"], "cgroup.freeze").write_text("0")
+                return
+            except OSError:
+                pass  # cgroup уже исчез - досылаем SIGCONT на всякий случай
+        for member, starttime in entry["members"]:
+            stat = self.procfs.stat(member)
+            if stat is not None and stat.starttime == starttime:
+                self._signal(member, signal.SIGCONT)
+
+    @staticmethod
+    def _signal(pid: int, sig) -> bool:
+        try:
+            os.kill(pid, sig)
+            return True
+        except (ProcessLookupError, PermissionError):
+            return False
+
+    # --- Восстановление после аварии ---
+
+    def _save_state(self):
+        if self.state_file is None:
+            return
+        try:
+            if not self.frozen:
+                self.state_file.unlink(missing_ok=True)
+                return
+            write_textfile(self.state_file, json.dumps({str(pid): entry for pid, entry in self.frozen.items()}))
+        except OSError:
+            pass
+
+    def recover(self) -> int:
+        """ Размораживает то, что осталось замороженным после аварийного завершения. Возвращает их число. """
+        if self.state_file is None:
+            return 0
+        try:
+            entries = json.loads(self.state_file.read_text())
+        except (OSError, ValueError):
+            return 0
+        for entry in entries.values():
+            self._thaw_entry(entry)
+        self.state_file.unlink(missing_ok=True)
+        return len(entries)
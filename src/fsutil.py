@@ -0,0 +1,42 @@
+# --- PATH: GameFocusManager/src/fsutil.py ---
+
+import os
+import stat
+import tempfile
+from pathlib import Path
+
+
+def write_textfile(path, text: str, fsync: bool = False, mode: int = 0o644):
+    """
+    Атомарно заменяет файл (временный файл рядом и rename), чтобы читатель никогда
+    не видел его наполовину записанным. Права существующего файла сохраняются,
+    новый файл получает mode. fsync=True - ещё и сбросить на диск данные до
+    переименования и каталог после него (для файлов, которые нельзя потерять).
+    """
+    path = Path(path)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        pass
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            os.fchmod(f.fileno(), mode)
+            f.write(text)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if fsync:
+        # Без этого после сбоя питания rename может не дойти до диска
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,148 @@
+# --- PATH: GameFocusManager/src/game_state.py ---
+
+import re
+from dataclasses import dataclass
+
+
+def mangohud_app_name(procfs, pid) -> str:
+    """
+    Имя программы, под которым MangoHud ищет per-app конфиг: для Wine/Proton -
+    имя .exe из comm или argv[0], для нативных игр - имя исполняемого файла.
+    """
+    comm = procfs.comm(pid) or ""
+    if comm.lower().endswith(".exe"):
+        return comm
+    argv = procfs.cmdline(pid)
+    if argv and argv[0]:
+        name = re.split(r"[\\/]", argv[0])[-1]
+        if name.lower().endswith(".exe"):
+            return name
+    return procfs.exe_name(pid) or comm
+
+
+@dataclass
+class GameInstance:
+    """ One running watched game (its top-most matching process). """
+    pid: int
+    game: str
+    starttime: int
+    app: str
+    focused: bool = False
+    applied_limit: int = None
+    last_transition: float = 0.0
+    # Когда воркер узнал о запуске игры (по его часам)
+    started_at: float = 0.0
+    frozen: bool = False
+    # Применённое понижение (src.demotion.Demotion) или None
+    demotion: object = None
+    # Добавлен через add() (процесс признал игрой классификатор, скан его не находит)
+    resolved: bool = False
+
+
+class GameTable:
+    """
+    Live watched game instances keyed by PID.
+
+    refresh() scans /proc for processes matching the config. Only the
+    top-most process of each game is kept, so helper processes of CS2 or
+    a Proton game do not show up as separate instances. Instances added
+    for a process the classifier resolved survive refresh() while that
+    process is alive.
+    """
+
+    def __init__(self, procfs):
+        self.procfs = procfs
+        self.instances = {}
+
+    def __iter__(self):
+        return iter(self.instances.values())
+
+    def __len__(self):
+        return len(self.instances)
+
+    def refresh(self, matcher) -> tuple:
+        """ Пересобирает таблицу. Возвращает (добавленные, удалённые) экземпляры. """
+        matched = {}
+        if matcher:
+            for pid in self.procfs.pids():
+                game = matcher.match_process(self.procfs, pid)
+                if game is not None:
+                    stat = self.procfs.stat(pid)
+                    if stat is not None:
+                        matched[pid] = (game, stat)
+
+        added, current = [], {}
+        for pid, (game, stat) in matched.items():
+            parent = matched.get(stat.ppid)
+            if parent is not None and parent[0] == game:
+                continue  # вспомогательный процесс уже учтённой игры
+            instance = self.instances.get(pid)
+            if instance is None or instance.starttime != stat.starttime or instance.game != game:
+                instance = GameInstance(pid, game, stat.starttime, mangohud_app_name(self.procfs, pid))
+                added.append(instance)
+            current[pid] = instance
+
+        # Экземпляры из add() скан не находит: держим их, пока процесс жив и игра в списке.
+        # Если скан нашёл предка той же игры, экземпляр переходит к нему вместе с фокусом.
+        games = set(matcher.names) if matcher else set()
+        for pid, instance in self.instances.items():
+            if not instance.resolved or pid in current or instance.game not in games \
+                    or not self.is_alive(instance):
+                continue
+            owner = self._ancestor_in(current, pid, instance.game)
+            if owner is None:
+                current[pid] = instance
+            elif owner in added:
+                added.remove(owner)
+                owner.focused, owner.started_at = instance.focused, instance.started_at
+                owner.last_transition = instance.last_transition
+
+        removed = [instance for pid, instance in self.instances.items() if current.get(pid) is not instance]
+        self.instances = current
+        return added, removed
+
+    def _ancestor_in(self, instances: dict, pid: int, game: str):
+        """ Ближайший предок процесса среди instances, если это экземпляр той же игры. """
+        current = pid
+        for _ in range(8):
+            stat = self.procfs.stat(current)
+            if stat is None or stat.ppid <= 1:
+                return None
+            current = stat.ppid
+            instance = instances.get(current)
+            if instance is not None:
+                return instance if instance.game == game else None
+        return None
+
+    def is_alive(self, instance) -> bool:
+        """ Жив ли ещё процесс экземпляра (PID не занят другим процессом). """
+        stat = self.procfs.stat(instance.pid)
+        return stat is not None and stat.starttime == instance.starttime
+
+    def instance_for(self, pid, game):
+        """
+        Находит экземпляр игры, которому принадлежит окно процесса pid:
+        сам процесс, его предок из таблицы или (для обёрток) любой экземпляр этой игры.
+        """
+        current = pid
+        for _ in range(8):
+            instance = self.instances.get(current)
+            if instance is not None:
+                return instance
+            stat = self.procfs.stat(current)
+            if stat is None or stat.ppid <= 1:
+                break
+            current = stat.ppid
+        for instance in self.instances.values():
+            if instance.game == game:
+                return instance
+        return None
+
+    def add(self, pid, game):
+        """ Добавляет процесс, который классификатор признал игрой, но скан не нашёл. """
+        stat = self.procfs.stat(pid)
+        if stat is None:
+            return None
+        instance = GameInstance(pid, game, stat.starttime, mangohud_app_name(self.procfs, pid), resolved=True)
+        self.instances[pid] = instance
+        return instance
@@ -1,10 +1,22 @@
 # --- PATH: GameFocusManager/src/info_tab.py ---
 
+import html
+import json
 import os
+from collections import deque
 from pathlib import Path
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QTabWidget, QTextBrowser,
-                               QPlainTextEdit)
-from PySide6.QtCore import QFileSystemWatcher, Slot
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget, QTextBrowser,
+                               QPlainTextEdit, QCheckBox)
+from PySide6.QtCore import QFileSystemWatcher, QTimer, Slot
+
+from src.eventlog import format_record
+from src.log_tail import LogTailer
+from src.paths import event_log_file, telemetry_file
+
+# Сколько последних строк лога держим в памяти и в окне просмотра
+MAX_LOG_LINES = 5000
+# Категории строк лога, которые можно скрывать
+LOG_TAGS = ("[EVENT]", "[ACTION]", "[ERROR]", "[INFO]")
 
 
 class InfoTab(QWidget):
@@ -15,9 +27,12 @@ class InfoTab(QWidget):
     def __init__(self):
         super().__init__()
 
-        # --- Определяем путь к лог-файлу ---
-        # Этот путь должен совпадать с тем, что используется в focus_worker.sh
-        self.log_file = Path("/tmp/game_focus_manager.log")
+        # --- Определяем путь к журналу событий ---
+        # Воркер пишет его в формате JSONL (src/eventlog.py), здесь показываем в виде текста
+        self.log_file = event_log_file()
+        self.log_tailer = LogTailer(self.log_file)
+        # Все прочитанные строки (без фильтра), чтобы менять фильтр без перечитывания файла
+        self.log_lines = deque(maxlen=MAX_LOG_LINES)
 
         # --- Создание элементов интерфейса ---
 
@@ -41,26 +56,61 @@ class InfoTab(QWidget):
         self.log_viewer = QPlainTextEdit()
         self.log_viewer.setReadOnly(True)  # Только для чтения
         self.log_viewer.setStyleSheet("font-family: monospace;")  # Моноширинный шрифт
+        self.log_viewer.setMaximumBlockCount(MAX_LOG_LINES)  # Старые строки вытесняются
+
+        # Фильтр по категориям строк
+        filter_layout = QHBoxLayout()
+        self.tag_checkboxes = {}
+        for tag in LOG_TAGS:
+            checkbox = QCheckBox(tag)
+            checkbox.setChecked(True)
+            checkbox.toggled.connect(self.apply_log_filter)
+            filter_layout.addWidget(checkbox)
+            self.tag_checkboxes[tag] = checkbox
+        filter_layout.addStretch()
+
+        log_layout.addLayout(filter_layout)
         log_layout.addWidget(self.log_viewer)
 
+        # --- Вкладка "Энергопотребление" ---
+        # Сводку пишет воркер (src/telemetry.py) в telemetry.json, пока запущена игра
+        self.telemetry_file = telemetry_file()
+        self.telemetry_mtime = None
+        self.telemetry_browser = QTextBrowser()
+
         # Добавляем вложенные вкладки в основной виджет
         tab_widget.addTab(help_widget, "Справка")
         tab_widget.addTab(log_widget, "Логи")
+        tab_widget.addTab(self.telemetry_browser, "Энергопотребление")
 
         main_layout.addWidget(tab_widget)
 
         # --- Логика для обновления логов ---
 
-        # Создаем "наблюдателя" за файловой системой
-        self.file_watcher = QFileSystemWatcher()
+        # Пачку уведомлений об изменении файла обрабатываем одним чтением
+        self.log_update_timer = QTimer(self)
+        self.log_update_timer.setSingleShot(True)
+        self.log_update_timer.setInterval(200)
+        self.log_update_timer.timeout.connect(self.update_log_viewer)
 
-        # Если лог-файл уже существует, добавляем его под наблюдение
+        # Создаем "наблюдателя" за файловой системой. Следим и за каталогом,
+        # чтобы заметить появление файла или его замену при ротации
+        self.file_watcher = QFileSystemWatcher()
+        self.file_watcher.addPath(str(self.log_file.parent))
         if self.log_file.exists():
             self.file_watcher.addPath(str(self.log_file))
-            self.update_log_viewer()  # И сразу загружаем текущее содержимое
 
-        # Подключаем сигнал изменения файла к нашему методу обновления
-        self.file_watcher.fileChanged.connect(self.update_log_viewer)
+        # Подключаем сигналы изменения к отложенному обновлению
+        self.file_watcher.fileChanged.connect(self.schedule_log_update)
+        self.file_watcher.directoryChanged.connect(self.schedule_log_update)
+
+        # Файл телеметрии заменяется атомарно - следим за его каталогом
+        self.telemetry_watcher = QFileSystemWatcher([str(self.telemetry_file.parent)])
+        self.telemetry_watcher.directoryChanged.connect(self.update_telemetry)
+
+        # Сразу загружаем текущее содержимое
+        self.update_log_viewer()
+        self.update_telemetry()
 
     def populate_help_text(self):
         """ Заполняет вкладку "Справка" HTML-текстом. """
@@ -70,8 +120,8 @@ class InfoTab(QWidget):
 
         <h4>Как это работает:</h4>
         <ol>
-            <li><b>Воркер:</b> Фоновый скрипт (<code>focus_worker.sh</code>) отслеживает, какая игра запущена и находится ли она в фокусе.</li>
-            <li><b>Управление:</b> Когда игра теряет фокус, скрипт изменяет конфигурационный файл MangoHud, устанавливая низкий лимит FPS. Когда игра возвращает фокус, лимит снимается.</li>
+            <li><b>Воркер:</b> Фоновый процесс (<code>src/worker.py</code>) отслеживает, какая игра запущена и находится ли она в фокусе.</li>
+            <li><b>Управление:</b> Когда игра теряет фокус, воркер изменяет конфигурационный файл MangoHud, устанавливая низкий лимит FPS. Когда игра возвращает фокус, лимит снимается.</li>
             <li><b>Интерфейс:</b> Это приложение позволяет вам запускать/останавливать воркер и настраивать список отслеживаемых игр.</li>
         </ol>
 
@@ -79,34 +129,118 @@ class InfoTab(QWidget):
         <ul>
             <li><b>MangoHud:</b> Должен быть установлен (<code>sudo dnf install mangohud</code>).</li>
             <li><b>kdotool:</b> Необходим для отслеживания окон в Wayland (<code>sudo dnf install kdotool</code>).</li>
-            <li><b>jq:</b> Необходим для чтения JSON-конфига (<code>sudo dnf install jq</code>).</li>
+            <li><b>jeepney</b> (необязательно): Позволяет получать смену фокуса от KWin по D-Bus мгновенно, без опроса (<code>pip install jeepney</code>).</li>
+            <li><b>nvidia-ml-py</b> (необязательно): Мощность GPU NVIDIA с проприетарным драйвером для вкладки "Энергопотребление" (<code>pip install nvidia-ml-py</code>). Для AMD и Intel данные берутся из hwmon.</li>
         </ul>
 
         <p>Разработано с помощью Python и PySide6. Автор идеи и основной разработчик: <b>sp1rit</b>.</p>
         """
         self.help_browser.setHtml(help_html)
 
+    @staticmethod
+    def format_telemetry_state(state: dict) -> str:
+        """ Ячейки таблицы для одного состояния: время, средняя мощность, загрузка ЦП. """
+        watts = "—" if state.get("watts") is None else f"{state['watts']:.1f} Вт"
+        cpu = "—" if state.get("cpu_percent") is None else f"{state['cpu_percent']:.1f}%"
+        return f"<td>{state.get('seconds', 0):.0f} с</td><td>{watts}</td><td>{cpu}</td>"
+
+    @Slot()
+    def update_telemetry(self, _path=None):
+        """ Перечитывает сводку телеметрии, если воркер её обновил. """
+        try:
+            mtime = self.telemetry_file.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self.telemetry_mtime and mtime is not None:
+            return
+        self.telemetry_mtime = mtime
+        try:
+            data = json.loads(self.telemetry_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.telemetry_browser.setHtml("<p>Данных пока нет. Воркер собирает их, пока запущена "
+                                           "отслеживаемая игра.</p>")
+            return
+
+        rows = []
+        for game in data.get("games", []):
+            saved = game.get("saved_watts")
+            rows.append(f"<tr><td><b>{html.escape(game['game'])}</b></td>{self.format_telemetry_state(game['focused'])}"
+                        f"{self.format_telemetry_state(game['unfocused'])}"
+                        f"<td>{'—' if saved is None else f'{saved:.1f} Вт'}</td></tr>")
+        sources = ", ".join(data.get("sources", [])) or "нет"
+        self.telemetry_browser.setHtml(
+            "<p>Средняя мощность системы (GPU и ЦП, если доступны) и загрузка ЦП игрой "
+            "в фокусе и в фоне. 100% - одно ядро целиком.</p>"
+            "<table border='1' cellpadding='4' cellspacing='0'>"
+            "<tr><th rowspan='2'>Игра</th><th colspan='3'>В фокусе</th><th colspan='3'>В фоне</th>"
+            "<th rowspan='2'>Экономия</th></tr>"
+            "<tr><th>Время</th><th>Мощность</th><th>ЦП</th><th>Время</th><th>Мощность</th><th>ЦП</th></tr>"
+            + "".join(rows) + "</table>"
+            f"<p style='color: gray;'>Источники: {sources}. Замеров в буфере: {data.get('samples', 0)} "
+            f"из {data.get('capacity', 0)}.</p>")
+
     @Slot(str)  # Декоратор, явно указывающий, что это слот PySide6
+    def schedule_log_update(self, _path=None):
+        """ Откладывает чтение лога, объединяя серию уведомлений в одно. """
+        if not self.log_update_timer.isActive():
+            self.log_update_timer.start()
+
+    @staticmethod
+    def format_log_line(line: str) -> str:
+        """ Превращает запись JSONL в строку вида [EVENT] [HH:MM:SS] сообщение. """
+        try:
+            return format_record(json.loads(line))
+        except (ValueError, AttributeError):
+            return line  # не JSON - показываем как есть
+
+    def is_line_visible(self, line: str) -> bool:
+        """ Строка проходит фильтр, если её категория включена (строки без категории видны всегда). """
+        for tag, checkbox in self.tag_checkboxes.items():
+            if line.startswith(tag):
+                return checkbox.isChecked()
+        return True
+
+    @Slot()
+    def apply_log_filter(self):
+        """ Перестраивает окно из строк в памяти, не читая файл заново. """
+        self.log_viewer.setPlainText("\n".join(line for line in self.log_lines if self.is_line_visible(line)))
+        self.log_viewer.verticalScrollBar().setValue(self.log_viewer.verticalScrollBar().maximum())
+
+    @Slot()
     def update_log_viewer(self):
-        """ Читает лог-файл и обновляет текстовое поле. """
+        """ Дочитывает из лог-файла только новые строки и добавляет их в окно. """
         try:
+            lines, restarted = self.log_tailer.read_new_lines()
+
             # Проверяем, не был ли файл удален (например, при очистке /tmp)
-            if not self.log_file.exists():
+            if lines is None:
+                self.log_lines.clear()
                 self.log_viewer.setPlainText("Лог-файл не найден. Он будет создан при запуске воркера.")
-                # Если файла нет, удаляем его из наблюдения
-                paths = self.file_watcher.files()
-                if paths:
-                    self.file_watcher.removePaths(paths)
                 return
 
-            # Если файл есть, но его нет под наблюдением, добавляем
+            # Файл есть, но его нет под наблюдением (появился или был заменён) - добавляем
             if str(self.log_file) not in self.file_watcher.files():
                 self.file_watcher.addPath(str(self.log_file))
 
-            # Читаем содержимое и отображаем
-            content = self.log_file.read_text()
-            self.log_viewer.setPlainText(content)
-            # Автоматически прокручиваем в самый конец
-            self.log_viewer.verticalScrollBar().setValue(self.log_viewer.verticalScrollBar().maximum())
+            if restarted or not self.log_lines:
+                # Ротация или усечение: начинаем окно заново
+                self.log_lines.clear()
+                self.log_viewer.clear()
+            if not lines:
+                return
+
+            scrollbar = self.log_viewer.verticalScrollBar()
+            at_bottom = scrollbar.value() == scrollbar.maximum()
+
+            lines = [self.format_log_line(line) for line in lines]
+            self.log_lines.extend(lines)
+            visible = [line for line in lines[-MAX_LOG_LINES:] if self.is_line_visible(line)]
+            if visible:
+                self.log_viewer.appendPlainText("\n".join(visible))
+
+            # Прокручиваем в конец, только если пользователь и так был внизу
+            if at_bottom:
+                scrollbar.setValue(scrollbar.maximum())
         except Exception as e:
-            self.log_viewer.setPlainText(f"Ошибка чтения лог-файла:\n{e}")
\ No newline at end of file
+            self.log_tailer.reset()
+            self.log_viewer.setPlainText(f"Ошибка чтения лог-файла:\n{e}")
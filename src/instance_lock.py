@@ -0,0 +1,71 @@
+# --- PATH: GameFocusManager/src/instance_lock.py ---
+
+import errno
+import fcntl
+import os
+
+# Код выхода воркера, который не стал запускаться, потому что уже работает другой
+ALREADY_RUNNING_EXIT_CODE = 3
+
+
+class InstanceLock:
+    """
+    Single-instance lock for the worker: an exclusive flock on a file in
+    the per-user runtime dir, with the owner's PID written inside. The
+    kernel drops the lock when the process dies, so unlike a pid file it
+    can never go stale or point at an unrelated, reused PID.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._fd = None
+
+    def acquire(self) -> bool:
+        """ Берёт блокировку без ожидания. False - её держит другой процесс. """
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            os.close(fd)
+            if e.errno in (errno.EWOULDBLOCK, errno.EAGAIN):
+                return False
+            raise
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        # Файл не удаляем: иначе новый воркер мог бы заблокировать другой inode
+        os.ftruncate(self._fd, 0)
+        os.close(self._fd)
+        self._fd = None
+
+    @staticmethod
+    def holder(path):
+        """
+        PID процесса, который держит блокировку, или None, если её никто не держит.
+        Если PID ещё не записан, возвращает -1.
+        """
+        try:
+            fd = os.open(str(path), os.O_RDONLY | os.O_CLOEXEC)
+        except FileNotFoundError:
+            return None
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except OSError as e:
+                if e.errno not in (errno.EWOULDBLOCK, errno.EAGAIN):
+                    raise
+            else:
+                # Удалось взять - значит, никто не держит
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                return None
+            try:
+                return int(os.pread(fd, 32, 0).strip())
+            except ValueError:
+                return -1
+        finally:
+            os.close(fd)
@@ -0,0 +1,267 @@
+# --- PATH: GameFocusManager/src/lifecycle.py ---
+
+import errno
+import os
+import select
+import socket
+import struct
+from collections import namedtuple
+
+# Netlink proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_COMM = 0x00000200
+PROC_EVENT_EXIT = 0x80000000
+CAP_NET_ADMIN = 12
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_CN_MSG = struct.Struct("=IIIIHH")
+_PROC_EVENT = struct.Struct("=IIQ")
+_EVENT_PIDS = struct.Struct("=II")
+
+# kind: "exec" (процесс запустил программу), "comm" (сменил имя - так делает Wine),
+# "exit" (процесс завершился) или "resync" (события потеряны, нужен полный пересмотр)
+ProcessEvent = namedtuple("ProcessEvent", "kind pid")
+
+
+class ProcessMonitorUnavailable(Exception):
+    """ Источник событий о процессах недоступен (нет прав, не Linux и т.п.). """
+
+
+def _has_capability(bit: int) -> bool:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("CapEff:"):
+                    return bool(int(line.split()[1], 16) >> bit & 1)
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+class ProcessMonitor:
+    """
+    Base interface for anything that tells the worker when processes start
+    and exit. Event-driven monitors expose a descriptor and read_events();
+    scanning monitors are called through scan() every `interval` seconds.
+    """
+
+    event_driven = False
+    interval = None
+
+    def open(self):
+        """ Вызывается один раз перед началом работы воркера. """
+
+    def close(self):
+        """ Вызывается при остановке воркера. """
+
+    def fileno(self):
+        return None
+
+    def read_events(self) -> list:
+        """ Забирает накопленные события (список ProcessEvent). """
+        return []
+
+    def scan(self) -> list:
+        """ Для сканирующих мониторов: события с прошлого сканирования. """
+        return []
+
+
+class ProcConnectorMonitor(ProcessMonitor):
+    """
+    Exec, comm and exit notifications from the kernel's netlink proc
+    connector. The worker sleeps in select() until a process actually
+    starts or exits. Subscribing needs CAP_NET_ADMIN in the initial network
+    namespace, and the kernel silently ignores a request it does not allow.
+    So open() checks for the capability and then confirms that the
+    subscription works with a short-lived child process.
+    """
+
+    event_driven = True
+
+    def __init__(self, verify_timeout: float = 0.5):
+        self.verify_timeout = verify_timeout
+        self.sock = None
+
+    def open(self):
+        if os.geteuid() != 0 and not _has_capability(CAP_NET_ADMIN):
+            raise ProcessMonitorUnavailable("the proc connector needs CAP_NET_ADMIN")
+        try:
+            self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM | socket.SOCK_NONBLOCK,
+                                      NETLINK_CONNECTOR)
+            self.sock.bind((0, CN_IDX_PROC))
+            self._send_control(PROC_CN_MCAST_LISTEN)
+        except (AttributeError, OSError) as e:
+            self.close()
+            raise ProcessMonitorUnavailable(f"proc connector unavailable: {e}")
+        if not self._verify():
+            self.close()
+            raise ProcessMonitorUnavailable("proc connector does not deliver events "
+                                            "(not permitted in this namespace?)")
+
+    def _send_control(self, op: int):
+        payload = struct.pack("=I", op)
+        cn_msg = _CN_MSG.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid())
+        self.sock.send(header + cn_msg)
+
+    def _verify(self) -> bool:
+        """ Запускает и сразу завершает дочерний процесс и ждёт событие о его выходе. """
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0)
+        os.waitpid(pid, 0)
+        while select.select([self.sock], [], [], self.verify_timeout)[0]:
+            if ProcessEvent("exit", pid) in self.read_events():
+                return True
+        return False
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self._send_control(PROC_CN_MCAST_IGNORE)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def read_events(self) -> list:
+        events = []
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # Буфер сокета переполнился и часть событий потеряна
+                    events.append(ProcessEvent("resync", 0))
+                    continue
+                raise
+            self._parse(data, events)
+        return events
+
+    @staticmethod
+    def _parse(data: bytes, events: list):
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length = _NLMSGHDR.unpack_from(data, offset)[0]
+            if length < _NLMSGHDR.size:
+                break
+            start = offset + _NLMSGHDR.size + _CN_MSG.size
+            if start + _PROC_EVENT.size + _EVENT_PIDS.size <= offset + length:
+                what = _PROC_EVENT.unpack_from(data, start)[0]
+                pid, tgid = _EVENT_PIDS.unpack_from(data, start + _PROC_EVENT.size)
+                # Интересуют только процессы целиком, а не отдельные потоки
+                if pid == tgid:
+                    if what == PROC_EVENT_EXEC:
+                        events.append(ProcessEvent("exec", tgid))
+                    elif what == PROC_EVENT_COMM:
+                        events.append(ProcessEvent("comm", tgid))
+                    elif what == PROC_EVENT_EXIT:
+                        events.append(ProcessEvent("exit", tgid))
+            offset += (length + 3) & ~3
+
+
+class ProcScanMonitor(ProcessMonitor):
+    """
+    Fallback for when the proc connector is not permitted. Every `interval`
+    seconds it lists /proc and diffs the PID set against the previous scan.
+    That is one listdir and two set differences, with no per-process reads.
+    New PIDs are reported twice, on the scan that finds them and on the
+    next one, because Wine renames a process only after it has started.
+    A PID that exits and is reused between two scans is not reported; the
+    worker checks the start times of its running games itself.
+    """
+
+    def __init__(self, procfs, interval: float = 2.0):
+        self.procfs = procfs
+        self.interval = interval
+        self._pids = None
+        self._recent = set()
+
+    def open(self):
+        self._pids = set(self.procfs.pids())
+
+    def scan(self) -> list:
+        try:
+            pids = set(self.procfs.pids())
+        except OSError:
+            return [ProcessEvent("resync", 0)]
+        if self._pids is None:
+            self._pids = pids
+            return []
+        started = pids - self._pids
+        events = [ProcessEvent("exit", pid) for pid in self._pids - pids]
+        events += [ProcessEvent("exec", pid) for pid in started]
+        events += [ProcessEvent("comm", pid) for pid in self._recent & pids]
+        self._pids, self._recent = pids, started
+        return events
+
+
+class LocalProcessMonitor(ProcessMonitor):
+    """
+    Event-driven stand-in for the proc connector: emit() queues an event and
+    wakes the worker through a pipe, so tests and benchmarks can report
+    process starts and exits without CAP_NET_ADMIN.
+    """
+
+    event_driven = True
+
+    def __init__(self):
+        self._pending = []
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+
+    def emit(self, kind: str, pid: int):
+        self._pending.append(ProcessEvent(kind, pid))
+        try:
+            os.write(self._write_fd, b"\0")
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        for fd in (self._read_fd, self._write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def fileno(self):
+        return self._read_fd
+
+    def read_events(self) -> list:
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        events, self._pending = self._pending, []
+        return events
+
+
+def open_process_monitor(procfs, log=None, scan_interval: float = 2.0) -> ProcessMonitor:
+    """
+    Открывает лучший доступный монитор процессов: proc connector, если он
+    разрешён и воркер смотрит в настоящий /proc, иначе сканирование /proc.
+    """
+    if getattr(procfs, "root", "/proc") == "/proc":
+        monitor = ProcConnectorMonitor()
+        try:
+            monitor.open()
+            return monitor
+        except ProcessMonitorUnavailable as e:
+            if log is not None:
+                log("INFO", f"{e}; falling back to scanning /proc every {scan_interval:g} s.")
+    monitor = ProcScanMonitor(procfs, scan_interval)
+    monitor.open()
+    return monitor
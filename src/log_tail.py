@@ -0,0 +1,64 @@
+# --- PATH: GameFocusManager/src/log_tail.py ---
+
+import os
+
+
+class LogTailer:
+    """
+    Follows an append-only log file like `tail -F`: remembers the byte
+    offset and the inode, reads only newly appended bytes, and starts over
+    when the file is truncated or replaced by rotation. The first read of a
+    large file only takes its last `initial_bytes`.
+    """
+
+    def __init__(self, path, initial_bytes: int = 256 * 1024):
+        self.path = str(path)
+        self.initial_bytes = initial_bytes
+        self.offset = 0
+        self.inode = None
+        self._partial = b""
+
+    def reset(self):
+        self.offset = 0
+        self.inode = None
+        self._partial = b""
+
+    def read_new_lines(self):
+        """
+        Возвращает (новые строки, был ли файл начат заново).
+        Если файла нет, возвращает (None, читался ли он до этого).
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            restarted = self.inode is not None
+            self.reset()
+            return None, restarted
+
+        restarted = False
+        if self.inode is None or st.st_ino != self.inode or st.st_size < self.offset:
+            # Первое открытие, ротация или усечение - читаем заново
+            restarted = self.inode is not None
+            self.inode = st.st_ino
+            self._partial = b""
+            self.offset = max(0, st.st_size - self.initial_bytes)
+            skip_partial_line = self.offset > 0
+        else:
+            skip_partial_line = False
+
+        if st.st_size == self.offset:
+            return [], restarted
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        self.offset += len(data)
+
+        data = self._partial + data
+        if skip_partial_line:
+            # Начали с середины файла - первая строка обрезана
+            data = data.partition(b"\n")[2]
+        chunks = data.split(b"\n")
+        # Последний кусок без перевода строки дописывается - ждём его окончания
+        self._partial = chunks.pop()
+        return [chunk.decode(errors="replace") for chunk in chunks], restarted
@@ -1,13 +1,42 @@
 # --- PATH: GameFocusManager/src/main_window.py ---
 
-from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget
+from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
 from PySide6.QtGui import QIcon
 
-# Импортируем все наши компоненты
+# Импортируем все наши компоненты. Вкладки "Настройки" и "Информация"
+# импортируются и создаются при первом открытии (см. LazyTab)
 from src.worker_manager import WorkerManager
 from src.status_tab import StatusTab
-from src.settings_tab import SettingsTab
-from src.info_tab import InfoTab
+
+
+class LazyTab(QWidget):
+    """
+    Placeholder page of the tab widget that builds the real tab on first
+    activation, so the window can appear before every tab is constructed.
+    """
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def ensure_built(self):
+        if self.widget is None:
+            self.widget = self.factory()
+            self.layout().addWidget(self.widget)
+        return self.widget
+
+
+def create_settings_tab():
+    from src.settings_tab import SettingsTab
+    return SettingsTab()
+
+
+def create_info_tab():
+    from src.info_tab import InfoTab
+    return InfoTab()
 
 
 class MainWindow(QMainWindow):
@@ -36,16 +65,19 @@ class MainWindow(QMainWindow):
         # --- Создание и наполнение вкладок ---
 
         # Создаем виджет для управления вкладками
-        tab_widget = QTabWidget()
-        self.setCentralWidget(tab_widget)
+        self.tab_widget = QTabWidget()
+        self.setCentralWidget(self.tab_widget)
 
-        # Создаем экземпляры каждой нашей вкладки
+        # Вкладка состояния видна сразу - создаём её сейчас.
         # Передаем WorkerManager в StatusTab, так как он ему нужен
         status_widget = StatusTab(self.worker_manager)
-        settings_widget = SettingsTab()  # Эта вкладка теперь независима
-        info_widget = InfoTab()  # Эта вкладка тоже независима
+        self.tab_widget.addTab(status_widget, "Состояние")
+        # Остальные вкладки независимы и строятся при первом переключении на них
+        self.tab_widget.addTab(LazyTab(create_settings_tab), "Настройки")
+        self.tab_widget.addTab(LazyTab(create_info_tab), "Информация")
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
 
-        # Добавляем созданные виджеты-вкладки в QTabWidget
-        tab_widget.addTab(status_widget, "Состояние")
-        tab_widget.addTab(settings_widget, "Настройки")
-        tab_widget.addTab(info_widget, "Информация")
\ No newline at end of file
+    def on_tab_changed(self, index: int):
+        page = self.tab_widget.widget(index)
+        if isinstance(page, LazyTab):
+            page.ensure_built()
@@ -0,0 +1,100 @@
+# --- PATH: GameFocusManager/src/metrics.py ---
+
+import bisect
+
+METRIC_PREFIX = "gamefocus_"
+
+# Границы корзин гистограммы задержки решения (секунды). Потеря фокуса
+# включает задержку debounce, поэтому верхние корзины покрывают и её.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Имя значения в снимке -> (имя в Prometheus, тип, описание)
+METRICS = {
+    "loop_iterations": ("loop_iterations_total", "counter", "Worker loop iterations."),
+    "focus_events": ("focus_events_total", "counter", "Focus notifications received from the focus source."),
+    "focus_changes": ("focus_changes_total", "counter", "Focus changes handled (a new window PID)."),
+    "classifier_hits": ("classifier_cache_hits_total", "counter", "Process classification cache hits."),
+    "classifier_misses": ("classifier_cache_misses_total", "counter", "Process classification cache misses."),
+    "config_reloads": ("config_reloads_total", "counter", "Configuration reloads after the worker started."),
+    "config_generation": ("config_generation", "gauge", "Generation of the loaded configuration."),
+    "mangohud_writes": ("mangohud_writes_total", "counter", "MangoHud config files rewritten."),
+    "suppressed_transitions": ("suppressed_transitions_total", "counter",
+                               "Focus transitions suppressed by the debounce and ignored window classes."),
+    "running_games": ("running_games", "gauge", "Watched games currently running."),
+    "process_events": ("process_events_total", "counter", "Process exec/exit notifications from the process monitor."),
+    "focus_tracking": ("focus_tracking", "gauge", "1 while focus is tracked (a watched game is running), else 0."),
+}
+HISTOGRAMS = {
+    "decision_latency": ("decision_latency_seconds", "Time from a focus event to the FPS limit being applied."),
+}
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram in the Prometheus sense. observe() is a bisect
+    and two additions, so it is cheap enough for the worker's hot path.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # последняя - +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        histogram = cls(data.get("buckets", LATENCY_BUCKETS))
+        counts = data.get("counts")
+        if counts and len(counts) == len(histogram.counts):
+            histogram.counts = list(counts)
+        histogram.count = data.get("count", sum(histogram.counts))
+        histogram.sum = data.get("sum", 0.0)
+        return histogram
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float):
+        """ Верхняя граница корзины, в которую попадает квантиль q (None, если данных нет). """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "count": self.count,
+                "sum": round(self.sum, 6)}
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(values: dict, histograms: dict) -> str:
+    """ Текстовый формат экспозиции Prometheus для снимка значений и гистограмм. """
+    lines = []
+    for key, value in values.items():
+        if key not in METRICS or value is None:
+            continue
+        name, kind, help_text = METRICS[key]
+        name = METRIC_PREFIX + name
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"]
+    for key, histogram in histograms.items():
+        name, help_text = HISTOGRAMS[key]
+        name = METRIC_PREFIX + name
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{le="{_format_value(float(bound))}"}} {cumulative}')
+        lines += [f"{name}_sum {_format_value(float(histogram.sum))}", f"{name}_count {histogram.count}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,102 @@
+# --- PATH: GameFocusManager/src/paths.py ---
+
+import os
+import sys
+from pathlib import Path
+
+APP_DIR_NAME = "GameFocusManager"
+
+
+def app_dir() -> Path:
+    """ Каталог программы: рядом с собранным бинарником или корень проекта (где main.py). """
+    if getattr(sys, "frozen", False):
+        return Path(sys.executable).resolve().parent
+    return Path(__file__).resolve().parent.parent
+
+
+def default_config_file() -> Path:
+    """ Поставляемый games.json - образец для конфига пользователя. """
+    return app_dir() / "games.json"
+
+
+def config_dir() -> Path:
+    """ Каталог настроек: $XDG_CONFIG_HOME/GameFocusManager. """
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    path = Path(base) / APP_DIR_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def config_file() -> Path:
+    """ games.json пользователя; общий для GUI, --headless и воркера, не зависит от текущего каталога. """
+    return config_dir() / "games.json"
+
+
+def state_dir() -> Path:
+    """ Каталог для долгоживущих данных воркера (журнал событий): $XDG_STATE_HOME/GameFocusManager. """
+    base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    path = Path(base) / APP_DIR_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cache_dir() -> Path:
+    """ Каталог для данных, которые можно пересоздать (индекс библиотеки Steam): $XDG_CACHE_HOME/GameFocusManager. """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = Path(base) / APP_DIR_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def steam_index_file() -> Path:
+    """ Индекс установленных игр Steam и их исполняемых файлов. """
+    return cache_dir() / "steam_index.json"
+
+
+def event_log_file() -> Path:
+    """ Журнал событий воркера (JSONL с ротацией). """
+    return state_dir() / "events.jsonl"
+
+
+def runtime_dir() -> Path:
+    """
+    Каталог для сокетов и прочих файлов текущей сессии: $XDG_RUNTIME_DIR/GameFocusManager
+    (или личный каталог в /tmp, если XDG_RUNTIME_DIR не задан). Доступен только владельцу.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base:
+        path = Path(base) / APP_DIR_NAME
+    else:
+        path = Path("/tmp") / f"{APP_DIR_NAME}-{os.getuid()}"
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return path
+
+
+def control_socket_file() -> Path:
+    """ Unix-сокет управления воркером. """
+    return runtime_dir() / "control.sock"
+
+
+def worker_lock_file() -> Path:
+    """ Блокировка единственного экземпляра воркера; внутри - PID владельца. """
+    return runtime_dir() / "worker.lock"
+
+
+def metrics_file() -> Path:
+    """ Метрики воркера в текстовом формате Prometheus. """
+    return runtime_dir() / "metrics.prom"
+
+
+def frozen_state_file() -> Path:
+    """ Какие игры воркер заморозил - чтобы разморозить их после аварийного завершения. """
+    return runtime_dir() / "frozen.json"
+
+
+def demoted_state_file() -> Path:
+    """ Какие игры воркер перевёл на E-ядра и понизил в приоритете - чтобы вернуть их после аварии. """
+    return runtime_dir() / "demoted.json"
+
+
+def telemetry_file() -> Path:
+    """ Сводка телеметрии воркера: средняя мощность и ЦП игр в фокусе и в фоне. """
+    return runtime_dir() / "telemetry.json"
@@ -0,0 +1,100 @@
+# --- PATH: GameFocusManager/src/policy.py ---
+
+import bisect
+from dataclasses import dataclass
+
+FREEZE_METHODS = ("cgroup", "signal")
+
+
+@dataclass(frozen=True)
+class Tier:
+    """ A background stage: `after` seconds out of focus, switch to fps_limit or freeze the game. """
+    after: float
+    fps_limit: int = None
+    freeze: bool = False
+
+    def to_dict(self) -> dict:
+        # Целые секунды пишем без ".0", как их обычно и задают в games.json
+        data = {"after": int(self.after) if self.after == int(self.after) else self.after}
+        if self.freeze:
+            data["freeze"] = True
+        else:
+            data["fps_limit"] = self.fps_limit
+        return data
+
+
+def parse_tiers(items) -> tuple:
+    """
+    Разбирает список ступеней из games.json:
+    [{"after": 60, "fps_limit": 1}, {"after": 2400, "freeze": true}].
+    Возвращает кортеж Tier по возрастанию `after`; ошибки - ValueError.
+    """
+    if not isinstance(items, list):
+        raise ValueError("background_tiers must be a list")
+    tiers = []
+    for item in items:
+        if not isinstance(item, dict) or "after" not in item:
+            raise ValueError(f"Invalid background tier: {item!r}")
+        after = float(item["after"])
+        if after < 0:
+            raise ValueError(f"Background tier delay must not be negative: {item!r}")
+        if item.get("freeze"):
+            tiers.append(Tier(after, freeze=True))
+        elif "fps_limit" in item:
+            tiers.append(Tier(after, fps_limit=int(item["fps_limit"])))
+        else:
+            raise ValueError(f"Background tier needs fps_limit or freeze: {item!r}")
+    return tuple(sorted(tiers, key=lambda tier: tier.after))
+
+
+def parse_tier_spec(text: str) -> tuple:
+    """ Краткая запись для интерфейса: "60:5, 600:1, 2400:freeze" (секунды:FPS или freeze). """
+    items = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        after, sep, action = part.partition(":")
+        if not sep:
+            raise ValueError(f"Expected <seconds>:<fps|freeze>, got {part!r}")
+        action = action.strip().lower()
+        if action == "freeze":
+            items.append({"after": after.strip(), "freeze": True})
+        else:
+            items.append({"after": after.strip(), "fps_limit": action})
+    return parse_tiers(items)
+
+
+def format_tier_spec(tiers) -> str:
+    def number(value):
+        return f"{value:g}"
+    return ", ".join(f"{number(tier.after)}:{'freeze' if tier.freeze else tier.fps_limit}" for tier in tiers)
+
+
+class BackgroundPolicy:
+    """
+    What an unfocused game should get as a function of how long it has been
+    out of focus: fps_limit_inactive right away, then each tier in turn.
+    The last FPS tier stays in effect while the game is frozen, so it comes
+    back at a low limit until the active limit is applied.
+    """
+
+    def __init__(self, inactive_limit: int, tiers=()):
+        self.inactive_limit = inactive_limit
+        self.tiers = tuple(tiers)
+        self._afters = [tier.after for tier in self.tiers]
+
+    def state(self, elapsed: float) -> tuple:
+        """ (лимит FPS, заморозить ли) после elapsed секунд вне фокуса. """
+        limit, freeze = self.inactive_limit, False
+        for tier in self.tiers[:bisect.bisect_right(self._afters, elapsed)]:
+            if tier.freeze:
+                freeze = True
+            else:
+                limit = tier.fps_limit
+        return limit, freeze
+
+    def next_change(self, elapsed: float):
+        """ Через сколько секунд вне фокуса наступит следующая ступень (None - больше не будет). """
+        index = bisect.bisect_right(self._afters, elapsed)
+        return self._afters[index] if index < len(self._afters) else None
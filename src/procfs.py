@@ -0,0 +1,120 @@
+# --- PATH: GameFocusManager/src/procfs.py ---
+
+import os
+from collections import namedtuple
+
+# Поля /proc/<pid>/stat, которые нужны воркеру (времена в тиках ядра)
+ProcStat = namedtuple("ProcStat", "pid comm state ppid utime stime starttime")
+
+
+class ProcFS:
+    """
+    Minimal reader for /proc. Replaces the `ps -p PID -o cmd=` calls of the
+    old shell worker. The root directory is injectable, so the worker can be
+    pointed at a fixture tree instead of the live system.
+    """
+
+    def __init__(self, root: str = "/proc"):
+        self.root = root
+
+    def _path(self, pid: int, name: str) -> str:
+        return os.path.join(self.root, str(pid), name)
+
+    def _read(self, pid: int, name: str):
+        """ Читает файл процесса целиком. Возвращает None, если процесса уже нет. """
+        try:
+            with open(self._path(pid, name), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def pids(self) -> list:
+        """ PID всех процессов в системе. """
+        return [int(name) for name in os.listdir(self.root) if name.isdigit()]
+
+    def exists(self, pid: int) -> bool:
+        return os.path.isdir(os.path.join(self.root, str(pid)))
+
+    def comm(self, pid: int):
+        """ Короткое имя процесса (до 15 символов), как его видит ядро. """
+        data = self._read(pid, "comm")
+        if data is None:
+            return None
+        return data.decode(errors="replace").rstrip("\n")
+
+    def cmdline(self, pid: int) -> list:
+        """ Аргументы командной строки процесса (пустой список для потоков ядра). """
+        data = self._read(pid, "cmdline")
+        if not data:
+            return []
+        return [arg.decode(errors="replace") for arg in data.rstrip(b"\0").split(b"\0")]
+
+    def exe_name(self, pid: int):
+        """ Имя исполняемого файла из ссылки /proc/<pid>/exe (может быть недоступно). """
+        try:
+            target = os.readlink(self._path(pid, "exe"))
+        except OSError:
+            return None
+        # Для удалённого бинарника ядро дописывает " (deleted)"
+        if target.endswith(" (deleted)"):
+            target = target[:-len(" (deleted)")]
+        return os.path.basename(target)
+
+    def cgroup(self, pid: int):
+        """ Путь cgroup v2 процесса (строка "0::/путь" в /proc/<pid>/cgroup) или None. """
+        data = self._read(pid, "cgroup")
+        if not data:
+            return None
+        for line in data.decode(errors="replace").splitlines():
+            if line.startswith("0::"):
+                return line[3:]
+        return None
+
+    def stat(self, pid: int):
+        """ Разбирает /proc/<pid>/stat. Возвращает ProcStat или None, если процесса нет. """
+        data = self._read(pid, "stat")
+        if not data:
+            return None
+        # comm может содержать пробелы и скобки, поэтому режем по последней ')'
+        head, _, tail = data.decode(errors="replace").rpartition(")")
+        fields = tail.split()
+        try:
+            return ProcStat(pid, head.partition("(")[2], fields[0], int(fields[1]),
+                            int(fields[11]), int(fields[12]), int(fields[19]))
+        except (IndexError, ValueError):
+            return None
+
+    def children(self, pid: int) -> list:
+        """ Прямые потомки процесса по /proc/<pid>/task/*/children. """
+        result = []
+        try:
+            tasks = os.listdir(self._path(pid, "task"))
+        except OSError:
+            return result
+        for tid in tasks:
+            data = self._read(pid, os.path.join("task", tid, "children"))
+            if data:
+                result.extend(int(child) for child in data.split())
+        return result
+
+    def tasks(self, pid: int) -> list:
+        """ ID потоков процесса из /proc/<pid>/task. """
+        try:
+            return [int(tid) for tid in os.listdir(self._path(pid, "task")) if tid.isdigit()]
+        except OSError:
+            return []
+
+    def process_tree(self, pid: int, limit: int = 256) -> list:
+        """ Процесс и все его потомки (не больше limit): [(pid, starttime)]. """
+        result, stack, seen = [], [pid], set()
+        while stack and len(result) < limit:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stat = self.stat(current)
+            if stat is None:
+                continue
+            result.append((current, stat.starttime))
+            stack.extend(self.children(current))
+        return result
@@ -0,0 +1,88 @@
+# --- PATH: GameFocusManager/src/scheduler.py ---
+
+# Окна, которые ненадолго забирают фокус и не должны считаться его потерей:
+# переключатель задач KWin, панель и уведомления Plasma, KRunner
+DEFAULT_IGNORED_WINDOW_CLASSES = [
+    "kwin_wayland", "kwin_x11", "plasmashell", "org.kde.plasmashell",
+    "krunner", "org.kde.krunner"
+]
+
+
+class TransitionScheduler:
+    """
+    Debounce between focus detection and the actuator.
+
+    Gaining focus is committed immediately. Losing focus to a non-game
+    window is only committed after `lose_focus_delay` seconds without the
+    game coming back, so a quick alt-tab or a popup causes no MangoHud
+    rewrite at all. Windows whose class is in the ignore list never count
+    as a focus change. Every transition that was swallowed or merged into
+    another one is counted in `suppressed`.
+
+    The scheduler holds no timers itself: the worker arms one for
+    `deadline` and calls fire() when it expires.
+    """
+
+    def __init__(self, lose_focus_delay: float = 0.75, ignored_classes=None):
+        self.lose_focus_delay = lose_focus_delay
+        self.ignored_classes = set()
+        self.configure(lose_focus_delay, DEFAULT_IGNORED_WINDOW_CLASSES if ignored_classes is None
+                       else ignored_classes)
+
+        self.committed = None
+        self.deadline = None
+        self.pending_event_time = None
+        self.suppressed = 0
+
+    def configure(self, lose_focus_delay: float, ignored_classes):
+        self.lose_focus_delay = max(0.0, lose_focus_delay)
+        self.ignored_classes = {name.casefold() for name in ignored_classes if name}
+
+    def is_ignored(self, window_class: str) -> bool:
+        return bool(window_class) and window_class.casefold() in self.ignored_classes
+
+    def _cancel_pending(self):
+        if self.deadline is not None:
+            self.deadline = None
+            self.pending_event_time = None
+            self.suppressed += 1
+
+    def reset(self, target=None):
+        """ Принудительно задаёт текущую цель (например, когда игра завершилась). """
+        self.committed = target
+        self.deadline = None
+        self.pending_event_time = None
+
+    def submit(self, target, now: float, event_time: float = None) -> bool:
+        """
+        Сообщает о новом владельце фокуса (экземпляр игры или None).
+        Возвращает True, если переход нужно применить немедленно.
+        """
+        if target is self.committed:
+            # Вернулись к той же игре до истечения задержки - потеря фокуса отменяется
+            self._cancel_pending()
+            return False
+
+        if target is not None or self.lose_focus_delay == 0:
+            self._cancel_pending()
+            self.committed = target
+            return True
+
+        # Фокус ушёл с игры: откладываем; повторные события только продлевают ожидание
+        if self.deadline is None:
+            self.pending_event_time = event_time if event_time is not None else now
+        self.deadline = now + self.lose_focus_delay
+        return False
+
+    def fire(self, now: float):
+        """
+        Вызывается по истечении deadline. Возвращает время исходного события,
+        если отложенная потеря фокуса применена, иначе None.
+        """
+        if self.deadline is None or now < self.deadline:
+            return None
+        event_time = self.pending_event_time
+        self.committed = None
+        self.deadline = None
+        self.pending_event_time = None
+        return event_time
@@ -1,12 +1,17 @@
 # --- PATH: GameFocusManager/src/settings_tab.py ---
 
+import dataclasses
 import json
-import os
-from pathlib import Path
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget,
                                QLineEdit, QPushButton, QLabel, QMessageBox,
-                               QFormLayout, QSpinBox)  # <-- Добавляем новые виджеты
-from PySide6.QtCore import Qt
+                               QFormLayout, QSpinBox, QComboBox, QCheckBox)  # <-- Добавляем новые виджеты
+from PySide6.QtCore import QFileSystemWatcher, Qt
+
+from src.affinity import detect_topology
+from src.demotion import Demotion, format_cpulist
+from src.config import ConfigConflict, ConfigStore, GameConfig
+from src.paths import config_file, default_config_file
+from src.policy import format_tier_spec, parse_tier_spec
 
 
 class SettingsTab(QWidget):
@@ -18,11 +23,14 @@ class SettingsTab(QWidget):
     def __init__(self):
         super().__init__()
 
-        # --- ИСПРАВЛЕНО: Определяем путь к конфигу в корне проекта ---
-        # Мы предполагаем, что приложение запускается из корня проекта.
-        self.project_root = Path(os.getcwd())
-        self.config_file = self.project_root / "games.json"
-        # --- КОНЕЦ ИСПРАВЛЕНИЯ ---
+        # Конфиг пользователя ($XDG_CONFIG_HOME/GameFocusManager/games.json) и то же
+        # хранилище, что использует воркер: атомарная запись и проверка чужих изменений
+        self.config_file = config_file()
+        self.config_store = ConfigStore(self.config_file, default_config_file())
+        # Имена из списка игр (casefold) - для проверки повторов без обхода виджета
+        self.watched_names = set()
+        # Диалог библиотеки Steam создаётся при первом открытии и потом переиспользуется
+        self.steam_dialog = None
 
         # --- Создание элементов интерфейса ---
 
@@ -38,9 +46,12 @@ class SettingsTab(QWidget):
         self.new_game_input.setPlaceholderText("Например, dota2 или witcher3.exe")
         self.add_button = QPushButton("Добавить")
         self.remove_button = QPushButton("Удалить выбранное")
+        self.steam_button = QPushButton("Из Steam...")
+        self.steam_button.setToolTip("Найти установленные игры Steam и добавить несколько сразу")
 
         add_remove_layout.addWidget(self.new_game_input)
         add_remove_layout.addWidget(self.add_button)
+        add_remove_layout.addWidget(self.steam_button)
         add_remove_layout.addWidget(self.remove_button)
 
         games_group_layout.addWidget(list_label)
@@ -61,9 +72,73 @@ class SettingsTab(QWidget):
         self.inactive_fps_spinbox.setRange(1, 1000)
         self.inactive_fps_spinbox.setSuffix(" FPS")
 
+        self.match_mode_combo = QComboBox()
+        self.match_mode_combo.addItem("Точное имя процесса", "exact")
+        self.match_mode_combo.addItem("Подстрока командной строки", "substring")
+        self.match_mode_combo.addItem("Шаблон (*, ?)", "glob")
+
         fps_group_layout.addRow(fps_label)
         fps_group_layout.addRow("Активный режим (0 = без лимита):", self.active_fps_spinbox)
         fps_group_layout.addRow("Фоновый режим:", self.inactive_fps_spinbox)
+        fps_group_layout.addRow("Сопоставление игр:", self.match_mode_combo)
+
+        self.debounce_spinbox = QSpinBox()
+        self.debounce_spinbox.setRange(0, 10000)
+        self.debounce_spinbox.setSingleStep(50)
+        self.debounce_spinbox.setSuffix(" мс")
+        self.debounce_spinbox.setSpecialValueText("Сразу")
+        self.debounce_spinbox.setToolTip("Короткие alt-tab и всплывающие окна не будут менять лимит")
+        fps_group_layout.addRow("Задержка перед фоновым лимитом:", self.debounce_spinbox)
+
+        self.ignored_classes_input = QLineEdit()
+        self.ignored_classes_input.setPlaceholderText("plasmashell, krunner")
+        self.ignored_classes_input.setToolTip("Классы окон через запятую, фокус на которых не считается уходом из игры")
+        fps_group_layout.addRow("Игнорируемые окна:", self.ignored_classes_input)
+
+        self.per_app_checkbox = QCheckBox("Отдельный конфиг MangoHud для каждой игры")
+        self.per_app_checkbox.setToolTip("Лимит пишется в ~/.config/MangoHud/<игра>.conf, "
+                                         "а не в общий MangoHud.conf")
+        fps_group_layout.addRow(self.per_app_checkbox)
+
+        # Ступени фона: через сколько секунд вне фокуса снизить лимит ещё сильнее или заморозить игру
+        self.tiers_input = QLineEdit()
+        self.tiers_input.setPlaceholderText("60:5, 600:1, 2400:freeze")
+        self.tiers_input.setToolTip("Через запятую <секунды>:<FPS> или <секунды>:freeze.\n"
+                                    "Сразу после потери фокуса действует фоновый лимит, "
+                                    "дальше - эти ступени по очереди.")
+        fps_group_layout.addRow("Ступени фона:", self.tiers_input)
+
+        self.freeze_method_combo = QComboBox()
+        self.freeze_method_combo.addItem("Freezer cgroup v2 (иначе SIGSTOP)", "cgroup")
+        self.freeze_method_combo.addItem("Только SIGSTOP", "signal")
+        fps_group_layout.addRow("Заморозка:", self.freeze_method_combo)
+
+        # Индивидуальные ступени задаются в games.json (game_overrides) - здесь только показываем
+        self.game_tiers_label = QLabel()
+        self.game_tiers_label.setWordWrap(True)
+        self.game_tiers_label.setStyleSheet("color: gray;")
+        fps_group_layout.addRow(self.game_tiers_label)
+
+        # Понижение фоновой игры: E-ядра, nice и приоритет ввода-вывода
+        topology = detect_topology()
+        self.background_cpus_input = QLineEdit()
+        self.background_cpus_input.setPlaceholderText("efficiency или 16-23 (пусто - не менять)")
+        self.background_cpus_input.setToolTip(
+            "efficiency - E-ядра гибридного ЦП: " + (format_cpulist(topology.efficiency) if topology.hybrid
+                                                      else "не найдены, привязка меняться не будет")
+            + "\nИли список ЦП в формате ядра, например 16-23.")
+        fps_group_layout.addRow("ЦП для фоновой игры:", self.background_cpus_input)
+
+        self.background_nice_spinbox = QSpinBox()
+        self.background_nice_spinbox.setRange(0, 19)
+        self.background_nice_spinbox.setSpecialValueText("Не менять")
+        fps_group_layout.addRow("nice фоновой игры:", self.background_nice_spinbox)
+
+        self.background_ioprio_combo = QComboBox()
+        self.background_ioprio_combo.addItem("Не менять", "")
+        self.background_ioprio_combo.addItem("Низкий (best-effort 7)", "be:7")
+        self.background_ioprio_combo.addItem("Только в простое (idle)", "idle")
+        fps_group_layout.addRow("Ввод-вывод фоновой игры:", self.background_ioprio_combo)
 
         self.save_fps_button = QPushButton("Сохранить лимиты FPS")
         # --- КОНЕЦ ДОБАВЛЕНИЯ ---
@@ -77,66 +152,162 @@ class SettingsTab(QWidget):
         # --- Подключение сигналов к слотам ---
         self.add_button.clicked.connect(self.add_game)
         self.remove_button.clicked.connect(self.remove_game)
-        self.save_fps_button.clicked.connect(self.save_config)  # <-- Привязываем сохранение FPS
+        self.steam_button.clicked.connect(self.add_from_steam)
+        self.save_fps_button.clicked.connect(lambda: self.save_config())  # <-- Привязываем сохранение FPS
+
+        # Изменения конфига другими программами (--headless, второе окно, правка вручную).
+        # Файл заменяется переименованием, поэтому следим за каталогом.
+        self.config_watcher = QFileSystemWatcher([str(self.config_file.parent)])
+        self.config_watcher.directoryChanged.connect(self.on_config_dir_changed)
 
         # --- Начальная загрузка данных ---
         self.load_config()
 
+    def on_config_dir_changed(self, _path):
+        """ Перечитывает конфиг, только если его изменил кто-то другой (своя запись не в счёт). """
+        try:
+            if self.config_store.reload_if_changed():
+                self.show_config(self.config_store.config)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Не удалось перечитать {self.config_file}: {e}")
+
     def load_config(self):
         """ Загружает всю конфигурацию из games.json и обновляет UI. """
-        self.games_list_widget.clear()
-
-        if not self.config_file.exists():
-            self.save_config()  # Создаст дефолтный конфиг, если его нет
-
         try:
-            with self.config_file.open("r") as f:
-                data = json.load(f)
-
-                # Загружаем список игр
-                games = data.get("games_to_watch", [])
-                self.games_list_widget.addItems(games)
-
-                # Загружаем лимиты FPS
-                self.active_fps_spinbox.setValue(data.get("fps_limit_active", 0))
-                self.inactive_fps_spinbox.setValue(data.get("fps_limit_inactive", 20))
-
+            # Нет файла - создаётся из поставляемого games.json
+            self.config_store.ensure_exists()
+            self.show_config(self.config_store.load())
         except (json.JSONDecodeError, Exception) as e:
             QMessageBox.warning(self, "Ошибка Конфигурации",
                                 f"Не удалось прочитать файл {self.config_file}:\n{e}")
 
-    def save_config(self):
-        """ Сохраняет всю конфигурацию (игры и FPS) в games.json. """
-        games = []
-        for i in range(self.games_list_widget.count()):
-            games.append(self.games_list_widget.item(i).text())
-
-        data = {
-            "games_to_watch": games,
-            "fps_limit_active": self.active_fps_spinbox.value(),
-            "fps_limit_inactive": self.inactive_fps_spinbox.value()
-        }
+    def show_config(self, config: GameConfig):
+        """ Заполняет элементы интерфейса значениями конфига. """
+        self.games_list_widget.clear()
+        # Загружаем список игр
+        self.games_list_widget.addItems(config.games_to_watch)
+        self.watched_names = {name.casefold() for name in config.games_to_watch}
+
+        # Загружаем лимиты FPS
+        self.active_fps_spinbox.setValue(config.fps_limit_active)
+        self.inactive_fps_spinbox.setValue(config.fps_limit_inactive)
+        self.match_mode_combo.setCurrentIndex(self.match_mode_combo.findData(config.match_mode))
+        self.per_app_checkbox.setChecked(config.mangohud_per_app)
+        self.debounce_spinbox.setValue(config.focus_loss_debounce_ms)
+        self.ignored_classes_input.setText(", ".join(config.ignored_window_classes))
+        self.tiers_input.setText(format_tier_spec(config.background_tiers))
+        self.freeze_method_combo.setCurrentIndex(self.freeze_method_combo.findData(config.freeze_method))
+        self.show_game_tiers(config)
+        self.background_cpus_input.setText(config.background_cpus)
+        self.background_nice_spinbox.setValue(config.background_nice)
+        if self.background_ioprio_combo.findData(config.background_ioprio) < 0:
+            self.background_ioprio_combo.addItem(config.background_ioprio, config.background_ioprio)
+        self.background_ioprio_combo.setCurrentIndex(
+            self.background_ioprio_combo.findData(config.background_ioprio))
+
+    def show_game_tiers(self, config: GameConfig):
+        lines = [f"{game}: {format_tier_spec(overrides['background_tiers']) or 'без ступеней'}"
+                 for game, overrides in config.game_overrides.items() if "background_tiers" in overrides]
+        self.game_tiers_label.setText("Свои ступени (game_overrides в games.json):\n" + "\n".join(lines)
+                                      if lines else "")
+        self.game_tiers_label.setVisible(bool(lines))
+
+    def listed_games(self) -> list:
+        """ Игры в том порядке, в каком они показаны в списке. """
+        return [self.games_list_widget.item(i).text() for i in range(self.games_list_widget.count())]
+
+    def save_config(self, games=None) -> bool:
+        """
+        Сохраняет всю конфигурацию (игры и FPS) в games.json. games - список игр вместо
+        показанного (список обновляют только после успешного сохранения). True - сохранено.
+        """
+        try:
+            tiers = parse_tier_spec(self.tiers_input.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Внимание", f"Не удалось разобрать ступени фона: {e}")
+            return False
+        try:
+            demotion = Demotion(self.background_cpus_input.text().strip(), self.background_nice_spinbox.value(),
+                                self.background_ioprio_combo.currentData())
+        except ValueError as e:
+            QMessageBox.warning(self, "Внимание", f"Неверный список ЦП: {e}")
+            return False
+
+        if games is None:
+            games = self.listed_games()
+
+        # Поля, которых нет в интерфейсе (например, game_overrides), берём из текущего конфига
+        config = dataclasses.replace(
+            self.config_store.config or GameConfig(),
+            games_to_watch=games,
+            fps_limit_active=self.active_fps_spinbox.value(),
+            fps_limit_inactive=self.inactive_fps_spinbox.value(),
+            match_mode=self.match_mode_combo.currentData(),
+            mangohud_per_app=self.per_app_checkbox.isChecked(),
+            focus_loss_debounce_ms=self.debounce_spinbox.value(),
+            ignored_window_classes=[name.strip() for name in self.ignored_classes_input.text().split(",")
+                                    if name.strip()],
+            background_tiers=tiers,
+            freeze_method=self.freeze_method_combo.currentData(),
+            background_cpus=demotion.cpus,
+            background_nice=demotion.nice,
+            background_ioprio=demotion.ioprio
+        )
 
         try:
-            with self.config_file.open("w") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            print("Конфигурация успешно сохранена.")
+            # Воркер заметит замену файла через inotify и перечитает конфиг один раз
+            generation = self.config_store.save(config)
+            print(f"Конфигурация успешно сохранена (поколение {generation}).")
+            return True
+        except ConfigConflict:
+            QMessageBox.information(self, "Настройки изменены",
+                                    "Файл настроек только что изменила другая программа. "
+                                    "Загружены актуальные настройки - повторите изменение.")
+            self.load_config()
+        except ValueError as e:
+            QMessageBox.warning(self, "Внимание", f"Неверные настройки: {e}")
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл настроек: {e}")
+        return False
+
+    def add_games(self, names) -> int:
+        """
+        Добавляет в список игры, которых там ещё нет, и сохраняет конфиг один раз.
+        Список меняется только после успешного сохранения. Возвращает число добавленных игр.
+        """
+        added, seen = [], set(self.watched_names)
+        for name in names:
+            # Воркер сравнивает имена без учёта регистра - и повторы ищем так же
+            if name.casefold() not in seen:
+                seen.add(name.casefold())
+                added.append(name)
+        if not added or not self.save_config(self.listed_games() + added):
+            return 0
+        self.watched_names = seen
+        self.games_list_widget.addItems(added)
+        return len(added)
 
     def add_game(self):
         """ Добавляет новую игру в список и сохраняет конфиг. """
         game_name = self.new_game_input.text().strip()
-        if game_name:
-            items = [self.games_list_widget.item(i).text() for i in range(self.games_list_widget.count())]
-            if game_name not in items:
-                self.games_list_widget.addItem(game_name)
-                self.save_config()
-                self.new_game_input.clear()
-            else:
-                QMessageBox.information(self, "Информация", "Эта игра уже в списке.")
-        else:
+        if not game_name:
             QMessageBox.warning(self, "Внимание", "Пожалуйста, введите имя процесса игры.")
+        elif game_name.casefold() in self.watched_names:
+            QMessageBox.information(self, "Информация", "Эта игра уже в списке.")
+        elif self.add_games([game_name]):
+            self.new_game_input.clear()
+
+    def add_from_steam(self):
+        """ Открывает диалог библиотеки Steam и добавляет отмеченные игры одним сохранением. """
+        if self.steam_dialog is None:
+            from src.steam_dialog import SteamLibraryDialog
+            self.steam_dialog = SteamLibraryDialog(self)
+        names = self.steam_dialog.choose(self.watched_names)
+        if names:
+            count = self.add_games(names)
+            print(f"Добавлено игр из Steam: {count}.")
 
     def remove_game(self):
         """ Удаляет выбранную игру из списка и сохраняет конфиг. """
@@ -145,7 +316,10 @@ class SettingsTab(QWidget):
             QMessageBox.warning(self, "Внимание", "Пожалуйста, выберите игру для удаления.")
             return
 
+        # Как и при добавлении, список меняется только после успешного сохранения
+        rows = {self.games_list_widget.row(item) for item in selected_items}
+        if not self.save_config([name for row, name in enumerate(self.listed_games()) if row not in rows]):
+            return
         for item in selected_items:
-            self.games_list_widget.takeItem(self.games_list_widget.row(item))
-
-        self.save_config()
\ No newline at end of file
+            self.watched_names.discard(item.text().casefold())
+            self.games_list_widget.takeItem(self.games_list_widget.row(item))
\ No newline at end of file
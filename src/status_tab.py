@@ -1,24 +1,55 @@
 # --- PATH: GameFocusManager/src/status_tab.py ---
 
+import threading
+import time
+
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel,
-                               QSpacerItem, QSizePolicy)
-from PySide6.QtCore import QTimer, Qt
+                               QSpacerItem, QSizePolicy, QGroupBox, QFormLayout)
+from PySide6.QtCore import QFileSystemWatcher, QSocketNotifier, Qt, Signal
 from PySide6.QtGui import QFont
 
 # Мы импортируем наш WorkerManager, чтобы использовать его
 from src.worker_manager import WorkerManager
+from src.config import CONFIG_ERROR_EXIT_CODE
+from src.paths import runtime_dir
+from src.metrics import Histogram
+
+# Строки панели метрик: ключ счётчика из статуса воркера -> подпись
+METRIC_ROWS = [
+    ("loop_iterations", "Итерации цикла"),
+    ("focus_events", "События фокуса"),
+    ("classifier_cache", "Кэш классификатора"),
+    ("config_reloads", "Перезагрузки конфига"),
+    ("mangohud_writes", "Записи MangoHud"),
+    ("suppressed_transitions", "Подавлено переходов"),
+    ("decision_latency", "Задержка p50 / p99"),
+]
+
+
+def format_seconds(value: float) -> str:
+    if value == float("inf"):
+        return "∞"
+    return f"{value * 1000:g} мс" if value < 1 else f"{value:g} с"
 
 
 class StatusTab(QWidget):
     """
     A widget for the 'Status' tab. Provides controls to start/stop the worker
-    and displays its current state.
+    and displays its current state. The state is pushed by the worker over
+    its control channel, so nothing is polled on a timer.
     """
 
+    # Из потока-наблюдателя WorkerManager: (pid, код выхода, задержка перезапуска или -1)
+    worker_exited = Signal(int, int, float)
+    # Из потока остановки: удалось ли остановить воркер
+    stop_finished = Signal(bool)
+
     def __init__(self, worker_manager: WorkerManager):
         super().__init__()
 
         self.worker_manager = worker_manager
+        self.channel = None
+        self.channel_notifier = None
 
         # --- Создание элементов интерфейса ---
 
@@ -35,6 +66,21 @@ class StatusTab(QWidget):
         self.status_label.setFont(font)
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
+        # Подробности от воркера: игра в фокусе, лимиты, счётчики
+        self.details_label = QLabel("")
+        self.details_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.details_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+
+        # Компактная панель метрик; обновляется вместе со статусом
+        self.metrics_box = QGroupBox("Метрики")
+        metrics_layout = QFormLayout(self.metrics_box)
+        self.metric_labels = {}
+        for key, title in METRIC_ROWS:
+            label = QLabel("—")
+            self.metric_labels[key] = label
+            metrics_layout.addRow(title + ":", label)
+        self.metrics_box.setVisible(False)
+
         # Кнопка-переключатель
         self.toggle_button = QPushButton("АКТИВИРОВАТЬ")
         self.toggle_button.setFixedSize(200, 60)  # Делаем кнопку большой и заметной
@@ -46,6 +92,8 @@ class StatusTab(QWidget):
         # Добавляем виджеты в лейаут
         main_layout.addWidget(self.status_label)
         main_layout.addWidget(self.toggle_button, 0, Qt.AlignmentFlag.AlignCenter)
+        main_layout.addWidget(self.details_label)
+        main_layout.addWidget(self.metrics_box, 0, Qt.AlignmentFlag.AlignCenter)
 
         # Добавляем "распорку" снизу
         main_layout.addSpacerItem(QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
@@ -55,39 +103,155 @@ class StatusTab(QWidget):
 
         # --- Логика обновления статуса ---
 
-        # Создаем таймер, который будет проверять статус воркера каждую секунду
-        self.status_timer = QTimer()
-        self.status_timer.setInterval(1000)  # 1000 мс = 1 секунда
-        self.status_timer.timeout.connect(self.update_status)
-        self.status_timer.start()
+        # Воркер, запущенный не из GUI, создаёт сокет управления в runtime-каталоге -
+        # тогда подключаемся к нему
+        self.runtime_watcher = QFileSystemWatcher([str(runtime_dir())], self)
+        self.runtime_watcher.directoryChanged.connect(self.on_runtime_dir_changed)
+
+        self.worker_exited.connect(self.on_worker_exited)
+        self.stop_finished.connect(self.on_stop_finished)
+        self.worker_manager.add_exit_listener(
+            lambda pid, code, delay: self.worker_exited.emit(pid, code, -1.0 if delay is None else delay))
 
         # Сразу же обновляем статус при запуске
         self.update_status()
 
+    def on_worker_exited(self, pid: int, returncode: int, restart_delay: float):
+        if returncode == CONFIG_ERROR_EXIT_CODE:
+            # Без перезапуска: он упал бы так же
+            self.show_inactive()
+            self.details_label.setText(f"Воркер не смог прочитать {self.worker_manager.config_file}. "
+                                       f"Исправьте файл и запустите воркер снова.")
+            return
+        if restart_delay < 0:
+            return
+        # Перезапущенный воркер создаст сокет управления, и мы подключимся к нему
+        self.show_inactive()
+        self.details_label.setText(f"Воркер (PID {pid}) аварийно завершился с кодом {returncode}. "
+                                   f"Перезапуск через {restart_delay:g} с...")
+
+    def on_stop_finished(self, stopped: bool):
+        # При успехе статус обычно уже обновлён событием "stopped" из канала
+        if not stopped:
+            self.status_label.setText("Статус: Не удалось остановить воркер")
+            self.toggle_button.setEnabled(True)
+        self.update_status()
+
+    def attach_channel(self, channel):
+        """ Начинает получать уведомления воркера из канала. """
+        self.detach_channel()
+        self.channel = channel
+        self.channel_notifier = QSocketNotifier(channel.fileno(), QSocketNotifier.Type.Read, self)
+        self.channel_notifier.activated.connect(self.read_channel)
+
+    def detach_channel(self):
+        if self.channel_notifier is not None:
+            self.channel_notifier.setEnabled(False)
+            self.channel_notifier.deleteLater()
+            self.channel_notifier = None
+        self.channel = None
+
+    def on_runtime_dir_changed(self, _path):
+        if self.channel is None:
+            self.update_status()
+
+    def read_channel(self):
+        """ Обрабатывает статус, присланный воркером. """
+        channel = self.channel
+        if channel is None:
+            return
+        for message in channel.read_messages():
+            if message.get("event") == "stopped":
+                channel.closed = True
+            elif "status" in message:
+                self.show_status(message["status"])
+        if channel.closed:
+            self.detach_channel()
+            self.worker_manager.disconnect(channel)
+            self.show_inactive()
+
     def update_status(self):
-        """ Проверяет, запущен ли воркер, и обновляет интерфейс. """
-        is_running, pid = self.worker_manager.is_running()
-
-        if is_running:
-            self.status_label.setText(f"Статус: Активен (PID: {pid})")
-            self.toggle_button.setText("ДЕАКТИВИРОВАТЬ")
-            # Устанавливаем "опасный" красный цвет для кнопки
-            self.toggle_button.setStyleSheet("background-color: #d32f2f; color: white;")
+        """ Подключается к воркеру, если он запущен; иначе показывает, что он неактивен. """
+        channel = self.worker_manager.connect()
+        if channel is None:
+            self.detach_channel()
+            self.show_inactive()
+        elif channel is not self.channel:
+            self.attach_channel(channel)
+            self.show_pending("Статус: Подключение...")
+
+    def show_status(self, status: dict):
+        self.status_label.setText(f"Статус: Активен (PID: {status.get('pid')})")
+        self.toggle_button.setText("ДЕАКТИВИРОВАТЬ")
+        self.toggle_button.setEnabled(True)
+        # Устанавливаем "опасный" красный цвет для кнопки
+        self.toggle_button.setStyleSheet("background-color: #d32f2f; color: white;")
+
+        if status.get("focus_tracking") is False:
+            lines = ["Ни одна игра не запущена — фокус не отслеживается"]
+        else:
+            lines = [f"В фокусе: {status.get('focused_game') or '—'}"]
+        for game in status.get("games", []):
+            limit = game.get("applied_limit")
+            limit_text = "без лимита" if limit == 0 else (f"{limit} FPS" if limit is not None else "—")
+            if game.get("frozen"):
+                limit_text += ", заморожена"
+            if game.get("demoted"):
+                limit_text += ", понижен приоритет"
+            if game.get("running_for") is not None:
+                # Статус приходит только при изменениях, поэтому показываем время запуска, а не длительность
+                started = time.localtime(time.time() - game["running_for"])
+                limit_text += f", запущена в {time.strftime('%H:%M', started)}"
+            lines.append(f"{game.get('game')} (PID {game.get('pid')}): {limit_text}")
+        self.details_label.setText("\n".join(lines))
+        self.show_metrics(status.get("counters", {}), status.get("decision_latency"))
+
+    def show_metrics(self, counters: dict, latency: dict = None):
+        def text(key):
+            value = counters.get(key)
+            return "—" if value is None else str(value)
+
+        for key in ("loop_iterations", "focus_events", "config_reloads", "mangohud_writes",
+                    "suppressed_transitions"):
+            self.metric_labels[key].setText(text(key))
+        self.metric_labels["classifier_cache"].setText(
+            f"{text('classifier_hits')} попаданий / {text('classifier_misses')} промахов")
+
+        histogram = Histogram.from_dict(latency) if latency else None
+        if histogram is None or not histogram.count:
+            self.metric_labels["decision_latency"].setText("—")
         else:
-            self.status_label.setText("Статус: Неактивен")
-            self.toggle_button.setText("АКТИВИРОВАТЬ")
-            # Устанавливаем "безопасный" зелёный цвет для кнопки
-            self.toggle_button.setStyleSheet("background-color: #388e3c; color: white;")
+            # Квантили по гистограмме - это верхние границы корзин
+            p50, p99 = (histogram.quantile(q) for q in (0.5, 0.99))
+            self.metric_labels["decision_latency"].setText(
+                f"≤ {format_seconds(p50)} / ≤ {format_seconds(p99)} ({histogram.count} решений)")
+        self.metrics_box.setVisible(True)
+
+    def show_pending(self, text: str):
+        self.status_label.setText(text)
+        self.toggle_button.setEnabled(False)
+
+    def show_inactive(self):
+        self.status_label.setText("Статус: Неактивен")
+        self.details_label.setText("")
+        self.metrics_box.setVisible(False)
+        self.toggle_button.setText("АКТИВИРОВАТЬ")
+        self.toggle_button.setEnabled(True)
+        # Устанавливаем "безопасный" зелёный цвет для кнопки
+        self.toggle_button.setStyleSheet("background-color: #388e3c; color: white;")
 
     def toggle_worker(self):
         """ Запускает или останавливает воркер в зависимости от его состояния. """
-        is_running, _ = self.worker_manager.is_running()
+        if self.channel is not None:
+            # stop() ждёт завершения воркера (до нескольких секунд) - не в потоке GUI
+            self.show_pending("Статус: Остановка...")
+            threading.Thread(target=lambda: self.stop_finished.emit(self.worker_manager.stop()),
+                             name="worker-stop", daemon=True).start()
+            return
 
-        if is_running:
-            self.worker_manager.stop()
+        if self.worker_manager.start():
+            # Первый статус придёт по socketpair, как только воркер будет готов
+            self.attach_channel(self.worker_manager.channel)
+            self.show_pending("Статус: Запуск...")
         else:
-            self.worker_manager.start()
-
-        # Немедленно обновляем статус после нажатия, не дожидаясь таймера
-        # Добавляем небольшую задержку, чтобы система успела обработать start/stop
-        QTimer.singleShot(500, self.update_status)
\ No newline at end of file
+            self.update_status()
@@ -0,0 +1,316 @@
+# --- PATH: GameFocusManager/src/steam.py ---
+
+import fnmatch
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.fsutil import write_textfile
+
+# Где бывает установлен Steam: обычный, симлинки ~/.steam, Flatpak и Snap
+STEAM_ROOT_CANDIDATES = (
+    "~/.steam/steam",
+    "~/.steam/root",
+    "~/.local/share/Steam",
+    "~/.var/app/com.valvesoftware.Steam/.local/share/Steam",
+    "~/snap/steam/common/.local/share/Steam",
+)
+
+# Служебные "игры" Steam, которые незачем предлагать в список
+NON_GAME_APPIDS = frozenset({228980, 1070560, 1391110, 1628350, 1493710, 2180100})
+NON_GAME_NAME = re.compile(r"^(Proton\b|Steam Linux Runtime|Steamworks (Common|SDK) Redist)", re.IGNORECASE)
+
+# Каталоги и файлы внутри игры, которые не являются самой игрой (сравнение без учёта регистра)
+SKIPPED_DIRS = ("_commonredist", "commonredist", "redist", "redistributables", "directx", "vcredist",
+                "dotnet*", "__installer", "installer*", "easyanticheat*", "battleye", "prereq*")
+SKIPPED_FILES = ("unins*", "*crashhandler*", "*crashreport*", "*crashpad*", "*setup*", "*installer*",
+                 "vc_redist*", "dxwebsetup*", "*prereq*", "*eac*launcher*", "*.so", "*.so.*")
+
+MAX_EXECUTABLES = 3       # сколько кандидатов на игру хранить (самые большие файлы)
+MAX_DEPTH = 5             # насколько глубоко спускаться в каталог игры
+MAX_ENTRIES = 20000       # сколько записей каталога просматривать на одну игру
+ELF_MAGIC = b"\x7fELF"
+
+
+def parse_vdf(text: str) -> dict:
+    """
+    Разбирает текстовый формат Valve KeyValues (libraryfolders.vdf, appmanifest_*.acf)
+    во вложенные словари. Ключи приводятся к нижнему регистру: Steam пишет их
+    по-разному ("installdir" и "InstallDir"). Ошибки формата - ValueError.
+    """
+    tokens = _vdf_tokens(text)
+    root, stack, key = {}, [], None
+    current = root
+    for token, quoted in tokens:
+        if not quoted and token == "{":
+            if key is None:
+                raise ValueError("VDF: '{' without a key")
+            child = current.setdefault(key, {})
+            if not isinstance(child, dict):
+                child = current[key] = {}
+            stack.append(current)
+            current, key = child, None
+        elif not quoted and token == "}":
+            if key is not None or not stack:
+                raise ValueError("VDF: unexpected '}'")
+            current = stack.pop()
+        elif key is None:
+            key = token.lower()
+        else:
+            current[key] = token
+            key = None
+    if stack or key is not None:
+        raise ValueError("VDF: unexpected end of file")
+    return root
+
+
+def _vdf_tokens(text: str):
+    """ Токены KeyValues: (текст, был ли в кавычках). Комментарии // и условия [$WIN32] пропускаются. """
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            i += 1
+        elif text.startswith("//", i):
+            i = text.find("\n", i)
+            i = n if i < 0 else i
+        elif ch in "{}":
+            yield ch, False
+            i += 1
+        elif ch == '"':
+            chars, i = [], i + 1
+            while i < n and text[i] != '"':
+                if text[i] == "\\" and i + 1 < n:
+                    i += 1
+                    chars.append({"n": "\n", "t": "\t"}.get(text[i], text[i]))
+                else:
+                    chars.append(text[i])
+                i += 1
+            if i >= n:
+                raise ValueError("VDF: unterminated string")
+            yield "".join(chars), True
+            i += 1
+        elif ch == "[":
+            end = text.find("]", i)
+            i = n if end < 0 else end + 1
+        else:
+            start = i
+            while i < n and not text[i].isspace() and text[i] not in '{}"':
+                i += 1
+            yield text[start:i], False
+
+
+def find_steam_roots() -> list:
+    """ Каталоги установленного Steam (без повторов через симлинки). """
+    roots, seen = [], set()
+    for candidate in STEAM_ROOT_CANDIDATES:
+        path = Path(os.path.expanduser(candidate))
+        try:
+            real = path.resolve()
+        except OSError:
+            continue
+        if real not in seen and (real / "steamapps").is_dir():
+            seen.add(real)
+            roots.append(real)
+    return roots
+
+
+def library_folders(steam_root) -> list:
+    """ Библиотеки Steam (каталоги с steamapps) из libraryfolders.vdf; сам Steam - всегда первая. """
+    steam_root = Path(steam_root)
+    folders = [steam_root]
+    try:
+        data = parse_vdf((steam_root / "steamapps" / "libraryfolders.vdf").read_text(encoding="utf-8",
+                                                                                     errors="replace"))
+    except (OSError, ValueError):
+        return folders
+    for key, value in data.get("libraryfolders", {}).items():
+        if not key.isdigit():
+            continue
+        # Новый формат: {"path": ..., "apps": {...}}; старый - просто строка с путём
+        path = value.get("path") if isinstance(value, dict) else value
+        if path:
+            folders.append(Path(path))
+    result, seen = [], set()
+    for folder in folders:
+        try:
+            real = folder.resolve()
+        except OSError:
+            continue
+        if real not in seen and (real / "steamapps").is_dir():
+            seen.add(real)
+            result.append(real)
+    return result
+
+
+def _skipped(name: str, patterns) -> bool:
+    name = name.casefold()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _is_executable(entry) -> bool:
+    """ .exe (игры под Proton) или родной ELF с битом исполнения. """
+    if entry.name.casefold().endswith(".exe"):
+        return True
+    if "." in entry.name.lstrip(".") and not entry.name.endswith((".x86_64", ".x86", ".bin")):
+        return False
+    if not os.access(entry.path, os.X_OK):
+        return False
+    try:
+        with open(entry.path, "rb") as f:
+            return f.read(4) == ELF_MAGIC
+    except OSError:
+        return False
+
+
+def find_executables(install_dir, limit: int = MAX_EXECUTABLES) -> list:
+    """
+    Ищет исполняемые файлы игры: [(имя файла, размер)], самые большие первыми -
+    основной бинарник игры почти всегда крупнее лаунчеров и вспомогательных утилит.
+    Обход ограничен по глубине и числу записей, чтобы огромные игры не тормозили сканирование.
+    """
+    found, budget = [], MAX_ENTRIES
+    pending = [(str(install_dir), 0)]
+    while pending and budget > 0:
+        path, depth = pending.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    budget -= 1
+                    if budget <= 0:
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < MAX_DEPTH and not _skipped(entry.name, SKIPPED_DIRS):
+                                pending.append((entry.path, depth + 1))
+                        elif entry.is_file() and not _skipped(entry.name, SKIPPED_FILES) \
+                                and _is_executable(entry):
+                            found.append((entry.name, entry.stat().st_size))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    found.sort(key=lambda item: (-item[1], item[0]))
+    result, seen = [], set()
+    for name, size in found:
+        if name.casefold() not in seen:
+            seen.add(name.casefold())
+            result.append((name, size))
+    return result[:limit]
+
+
+@dataclass
+class SteamGame:
+    """ One installed Steam app as recorded in the index. """
+    appid: int
+    name: str
+    install_dir: str
+    # [(имя файла, размер)], основной кандидат - первый
+    executables: list = field(default_factory=list)
+    manifest: str = ""
+    mtime_ns: int = 0
+    manifest_size: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SteamGame":
+        return cls(int(data["appid"]), data["name"], data["install_dir"],
+                   [tuple(item) for item in data.get("executables", [])],
+                   data.get("manifest", ""), int(data.get("mtime_ns", 0)), int(data.get("manifest_size", 0)))
+
+
+def read_manifest(manifest, library) -> SteamGame:
+    """ Разбирает appmanifest_<appid>.acf. None - это не игра или манифест повреждён. """
+    manifest = Path(manifest)
+    try:
+        state = parse_vdf(manifest.read_text(encoding="utf-8", errors="replace")).get("appstate", {})
+        appid = int(state.get("appid", ""))
+    except (OSError, ValueError):
+        return None
+    name = state.get("name") or f"App {appid}"
+    if appid in NON_GAME_APPIDS or NON_GAME_NAME.match(name) or not state.get("installdir"):
+        return None
+    install_dir = Path(library) / "steamapps" / "common" / state["installdir"]
+    return SteamGame(appid, name, str(install_dir), find_executables(install_dir))
+
+
+class SteamLibraryIndex:
+    """
+    Persistent index of installed Steam games and their executables.
+
+    Manifests are re-parsed and install directories walked again only when
+    the manifest's mtime or size changed (Steam rewrites it on every install
+    or update), so a rescan of an unchanged library is one stat() per game.
+    """
+
+    VERSION = 2
+
+    def __init__(self, index_file, steam_roots=None):
+        self.index_file = Path(index_file)
+        self.steam_roots = steam_roots
+        # Путь к манифесту -> SteamGame
+        self.games = {}
+        # Итог последнего сканирования: сколько взято из индекса, разобрано заново и удалено
+        self.last_scan = {"reused": 0, "parsed": 0, "removed": 0}
+        self.load()
+
+    def load(self):
+        """ Читает индекс с диска. Повреждённый или старый индекс просто игнорируется. """
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+            if data.get("version") != self.VERSION:
+                return
+            self.games = {entry["manifest"]: SteamGame.from_dict(entry) for entry in data.get("games", [])}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.games = {}
+
+    def save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        games = [asdict(game) for game in self.games.values()]
+        write_textfile(self.index_file, json.dumps({"version": self.VERSION, "games": games}, ensure_ascii=False))
+
+    def manifests(self):
+        """ Все appmanifest_*.acf во всех библиотеках всех найденных Steam: (путь, библиотека). """
+        roots = find_steam_roots() if self.steam_roots is None else [Path(root) for root in self.steam_roots]
+        seen = set()
+        for root in roots:
+            for library in library_folders(root):
+                if library in seen:
+                    continue
+                seen.add(library)
+                try:
+                    with os.scandir(library / "steamapps") as entries:
+                        for entry in entries:
+                            if entry.name.startswith("appmanifest_") and entry.name.endswith(".acf"):
+                                yield entry, library
+                except OSError:
+                    continue
+
+    def scan(self) -> list:
+        """ Обновляет индекс (инкрементально) и возвращает игры, отсортированные по названию. """
+        games, stats = {}, {"reused": 0, "parsed": 0, "removed": 0}
+        for entry, library in self.manifests():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            cached = self.games.get(entry.path)
+            if cached is not None and (cached.mtime_ns, cached.manifest_size) == (st.st_mtime_ns, st.st_size):
+                games[entry.path] = cached
+                stats["reused"] += 1
+                continue
+            stats["parsed"] += 1
+            game = read_manifest(entry.path, library)
+            # Не-игры тоже запоминаем (без исполняемых файлов), чтобы не разбирать их каждый раз
+            if game is None:
+                game = SteamGame(0, "", "")
+            game.manifest, game.mtime_ns, game.manifest_size = entry.path, st.st_mtime_ns, st.st_size
+            games[entry.path] = game
+        stats["removed"] = len(self.games.keys() - games.keys())
+        changed = stats["parsed"] or stats["removed"]
+        self.games, self.last_scan = games, stats
+        if changed:
+            self.save()
+        return sorted((game for game in games.values() if game.appid),
+                      key=lambda game: game.name.casefold())
@@ -0,0 +1,217 @@
+# --- PATH: GameFocusManager/src/steam_dialog.py ---
+
+import threading
+
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QTableView, QLabel,
+                               QDialogButtonBox, QHeaderView, QAbstractItemView, QPushButton)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Signal
+
+from src.paths import steam_index_file
+from src.steam import SteamLibraryIndex
+
+
+def format_size(size: int) -> str:
+    return f"{size / 1024 ** 2:.0f} МБ" if size >= 1024 ** 2 else f"{size / 1024:.0f} КБ"
+
+
+class SteamGamesModel(QAbstractTableModel):
+    """
+    Table of executables found in the Steam library, one row per candidate
+    file. Rows whose name is already watched are shown but cannot be checked.
+    """
+
+    COLUMNS = ("Игра", "Исполняемый файл", "Размер", "Каталог")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # (игра, имя файла, размер, основной ли это файл игры)
+        self.rows = []
+        # Отмеченные строки как (appid, имя файла): переживают пересканирование
+        self.checked = set()
+        self.watched = set()
+
+    def set_games(self, games, watched):
+        """ Заполняет модель результатами сканирования; watched - имена из списка (casefold). """
+        self.beginResetModel()
+        self.rows = [(game, name, size, i == 0)
+                     for game in games for i, (name, size) in enumerate(game.executables)]
+        self.watched = set(watched)
+        self.checked &= {self._key(row) for row in range(len(self.rows)) if not self._is_watched(row)}
+        self.endResetModel()
+
+    def _key(self, row: int) -> tuple:
+        return self.rows[row][0].appid, self.rows[row][1]
+
+    def _is_watched(self, row: int) -> bool:
+        return self.rows[row][1].casefold() in self.watched
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        game, name, size, primary = self.rows[row]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return game.name
+            if column == 1:
+                return name + (" (уже в списке)" if self._is_watched(row) else "")
+            if column == 2:
+                return format_size(size)
+            return game.install_dir
+        if role == Qt.ItemDataRole.CheckStateRole and column == 0:
+            if self._is_watched(row) or self._key(row) in self.checked:
+                return Qt.CheckState.Checked
+            return Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.ToolTipRole and column == 1 and not primary:
+            return "Дополнительный кандидат: меньше основного файла игры"
+        # Для сортировки по размеру - числом, а не строкой
+        if role == Qt.ItemDataRole.UserRole:
+            return size if column == 2 else self.data(index)
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if self._is_watched(index.row()):
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or index.column() != 0 or self._is_watched(index.row()):
+            return False
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self.checked.add(self._key(index.row()))
+        else:
+            self.checked.discard(self._key(index.row()))
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def selected_names(self) -> list:
+        """ Отмеченные имена файлов в порядке таблицы, без повторов. """
+        names, seen = [], set()
+        for row in range(len(self.rows)):
+            name = self.rows[row][1]
+            if self._key(row) in self.checked and name.casefold() not in seen:
+                seen.add(name.casefold())
+                names.append(name)
+        return names
+
+
+class SteamLibraryDialog(QDialog):
+    """
+    Bulk-add dialog: scans the Steam library in a background thread (the
+    index makes repeated scans cheap) and lets the user tick the games to
+    watch. The caller saves the chosen names once, after the dialog closes.
+    """
+
+    # Из потока сканирования: (список SteamGame, статистика) или (None, текст ошибки)
+    scan_finished = Signal(object, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Игры из библиотеки Steam")
+        self.resize(760, 480)
+        self.index = None
+        # Результат последнего сканирования и имена, уже отслеживаемые (casefold)
+        self.games = []
+        self.watched = set()
+        self._scanning = False
+
+        self.model = SteamGamesModel(self)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.proxy.setFilterKeyColumn(-1)  # поиск по всем столбцам
+        self.proxy.setSortRole(Qt.ItemDataRole.UserRole)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Поиск по названию, файлу или каталогу")
+        self.search_input.setClearButtonEnabled(True)
+        self.rescan_button = QPushButton("Пересканировать")
+
+        search_layout = QHBoxLayout()
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.rescan_button)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Interactive)
+
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("color: gray;")
+
+        self.buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setText("Добавить отмеченные")
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(search_layout)
+        layout.addWidget(self.table)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.buttons)
+
+        self.search_input.textChanged.connect(self.proxy.setFilterFixedString)
+        self.rescan_button.clicked.connect(self.start_scan)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.scan_finished.connect(self.on_scan_finished)
+
+    def choose(self, watched) -> list:
+        """ Показывает диалог и возвращает отмеченные имена ([] - ничего не выбрано или отмена). """
+        self.watched = {name.casefold() for name in watched}
+        self.model.checked.clear()
+        self.model.set_games(self.games, self.watched)
+        self.search_input.clear()
+        self.start_scan()
+        if self.exec() != QDialog.DialogCode.Accepted:
+            return []
+        return self.model.selected_names()
+
+    def start_scan(self):
+        if self._scanning:
+            return
+        self._scanning = True
+        self.rescan_button.setEnabled(False)
+        self.summary_label.setText("Сканирование библиотеки Steam...")
+        threading.Thread(target=self._scan, name="steam-scan", daemon=True).start()
+
+    def _scan(self):
+        try:
+            if self.index is None:
+                self.index = SteamLibraryIndex(steam_index_file())
+            games = self.index.scan()
+            self.scan_finished.emit(games, dict(self.index.last_scan))
+        except Exception as e:
+            self.scan_finished.emit(None, str(e))
+
+    def on_scan_finished(self, games, stats):
+        self._scanning = False
+        self.rescan_button.setEnabled(True)
+        if games is None:
+            self.summary_label.setText(f"Не удалось просканировать библиотеку: {stats}")
+            return
+        self.games = games
+        self.model.set_games(games, self.watched)
+        if not games:
+            self.summary_label.setText("Игры Steam не найдены (библиотека пуста или Steam не установлен).")
+            return
+        self.summary_label.setText(f"Игр: {len(games)}, исполняемых файлов: {self.model.rowCount()}. "
+                                   f"Из индекса: {stats['reused']}, просканировано заново: {stats['parsed']}.")
@@ -0,0 +1,408 @@
+# --- PATH: GameFocusManager/src/telemetry.py ---
+
+import math
+import os
+from array import array
+from pathlib import Path
+
+# Драйверы GPU, которые публикуют мощность или энергию через hwmon
+GPU_HWMON_DRIVERS = ("amdgpu", "nouveau", "i915", "xe")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+class TelemetryUnavailable(Exception):
+    """ Источник телеметрии недоступен (нет устройства, прав или библиотеки). """
+
+
+def _read_int(path) -> int:
+    with open(path) as f:
+        return int(f.read().strip())
+
+
+class EnergyCounter:
+    """
+    Cumulative energy counter in microjoules (RAPL energy_uj, hwmon
+    energy*_input) turned into average watts between two reads. Handles the
+    counter wrapping around at `wrap`.
+    """
+
+    def __init__(self, path, wrap: int = None):
+        self.path = path
+        self.wrap = wrap
+        self._last = None
+
+    def read(self, now: float):
+        """ Средняя мощность (Вт) с прошлого чтения; None при первом чтении. """
+        value = _read_int(self.path)
+        last, self._last = self._last, (value, now)
+        if last is None or now <= last[1]:
+            return None
+        delta = value - last[0]
+        if delta < 0:
+            if not self.wrap:
+                return None
+            delta += self.wrap
+        return delta / 1e6 / (now - last[1])
+
+
+class PowerSource:
+    """
+    Base interface for system power readings. open() raises
+    TelemetryUnavailable when the source cannot be used on this machine;
+    read() returns watts, or None when there is no value yet.
+    """
+
+    name = "power"
+
+    def open(self):
+        """ Проверяет доступность источника. """
+
+    def close(self):
+        """ Освобождает ресурсы источника. """
+
+    def read(self, now: float):
+        return None
+
+
+class HwmonPowerSource(PowerSource):
+    """
+    GPU power from hwmon: power1_average or power1_input (amdgpu, nouveau),
+    in microwatts, or the energy1_input counter (i915, xe). The root can be
+    a fixture directory laid out like /sys/class/hwmon.
+    """
+
+    name = "hwmon"
+
+    def __init__(self, root="/sys/class/hwmon", drivers=GPU_HWMON_DRIVERS):
+        self.root = Path(root)
+        self.drivers = drivers
+        # (путь к power*_input/average, None) или (None, EnergyCounter)
+        self.sensors = []
+
+    def open(self):
+        self.sensors = []
+        try:
+            devices = sorted(self.root.iterdir())
+        except OSError:
+            devices = []
+        for device in devices:
+            try:
+                driver = (device / "name").read_text().strip()
+            except OSError:
+                continue
+            if driver not in self.drivers:
+                continue
+            for name in ("power1_average", "power1_input"):
+                if os.access(device / name, os.R_OK):
+                    self.sensors.append((device / name, None))
+                    break
+            else:
+                if os.access(device / "energy1_input", os.R_OK):
+                    self.sensors.append((None, EnergyCounter(device / "energy1_input")))
+        if not self.sensors:
+            raise TelemetryUnavailable(f"no GPU power sensors in {self.root}")
+        self.name = "hwmon:" + ",".join(sorted({path.parent.name if path else counter.path.parent.name
+                                                for path, counter in self.sensors}))
+
+    def read(self, now: float):
+        total, valid = 0.0, False
+        for path, counter in self.sensors:
+            try:
+                value = _read_int(path) / 1e6 if path is not None else counter.read(now)
+            except (OSError, ValueError):
+                continue
+            if value is not None:
+                total, valid = total + value, True
+        return total if valid else None
+
+
+class RaplPowerSource(PowerSource):
+    """
+    CPU package power from the powercap RAPL counters (intel-rapl:N, which
+    AMD Zen CPUs expose too). Since Linux 5.10 energy_uj is readable only
+    by root, so for ordinary users open() reports the source unavailable.
+    """
+
+    name = "rapl"
+
+    def __init__(self, root="/sys/class/powercap"):
+        self.root = Path(root)
+        self.counters = []
+
+    def open(self):
+        self.counters = []
+        try:
+            zones = sorted(self.root.glob("intel-rapl:*"))
+        except OSError:
+            zones = []
+        for zone in zones:
+            # Только пакеты целиком (intel-rapl:0), без вложенных доменов (intel-rapl:0:0)
+            if zone.name.count(":") != 1:
+                continue
+            try:
+                wrap = _read_int(zone / "max_energy_range_uj")
+                _read_int(zone / "energy_uj")
+            except (OSError, ValueError):
+                continue
+            self.counters.append(EnergyCounter(zone / "energy_uj", wrap))
+        if not self.counters:
+            raise TelemetryUnavailable(f"no readable RAPL counters in {self.root} (root is required since Linux 5.10)")
+
+    def read(self, now: float):
+        total, valid = 0.0, False
+        for counter in self.counters:
+            try:
+                value = counter.read(now)
+            except (OSError, ValueError):
+                continue
+            if value is not None:
+                total, valid = total + value, True
+        return total if valid else None
+
+
+class NvmlPowerSource(PowerSource):
+    """
+    Power of NVIDIA GPUs through NVML, for the proprietary driver, which has
+    no hwmon sensors. Requires the optional `nvidia-ml-py` package (pynvml).
+    """
+
+    name = "nvml"
+
+    def __init__(self):
+        self.nvml = None
+        self.handles = []
+
+    def open(self):
+        try:
+            import pynvml
+        except ImportError:
+            raise TelemetryUnavailable("pynvml is not installed")
+        try:
+            pynvml.nvmlInit()
+            self.handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+        except pynvml.NVMLError as e:
+            raise TelemetryUnavailable(f"NVML: {e}")
+        self.nvml = pynvml
+        if not self.handles:
+            self.close()
+            raise TelemetryUnavailable("NVML found no GPUs")
+
+    def close(self):
+        if self.nvml is not None:
+            try:
+                self.nvml.nvmlShutdown()
+            except self.nvml.NVMLError:
+                pass
+            self.nvml = None
+
+    def read(self, now: float):
+        try:
+            # nvmlDeviceGetPowerUsage - в милливаттах
+            return sum(self.nvml.nvmlDeviceGetPowerUsage(handle) for handle in self.handles) / 1000
+        except self.nvml.NVMLError:
+            return None
+
+
+class ProcessCpuSource:
+    """ CPU time (utime + stime, in seconds) of a game's process tree from /proc/<pid>/stat. """
+
+    def __init__(self, procfs, tree_limit: int = 64):
+        self.procfs = procfs
+        self.tree_limit = tree_limit
+
+    def read(self, pid: int):
+        # Как ProcFS.process_tree, но каждый stat читается один раз
+        total, stack, seen = 0, [pid], set()
+        while stack and len(seen) < self.tree_limit:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stat = self.procfs.stat(current)
+            if stat is None:
+                continue
+            total += stat.utime + stat.stime
+            stack.extend(self.procfs.children(current))
+        return total / CLOCK_TICKS
+
+
+class SampleRing:
+    """
+    Fixed-capacity ring buffer of telemetry records kept in parallel typed
+    arrays: 35 bytes per record and no per-sample Python objects.
+    Power is NaN when no power source is available.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.time = array("d", bytes(8 * capacity))
+        self.duration = array("d", bytes(8 * capacity))
+        self.watts = array("d", bytes(8 * capacity))
+        self.cpu = array("d", bytes(8 * capacity))
+        self.game = array("H", bytes(2 * capacity))
+        self.focused = array("b", bytes(capacity))
+        self.count = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, time: float, duration: float, watts: float, cpu: float, game: int, focused: bool):
+        i = self._next
+        self.time[i], self.duration[i], self.watts[i], self.cpu[i] = time, duration, watts, cpu
+        self.game[i], self.focused[i] = game, focused
+        self._next = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def indices(self):
+        """ Номера записей от старой к новой. """
+        start = (self._next - self.count) % self.capacity
+        return ((start + k) % self.capacity for k in range(self.count))
+
+
+class TelemetrySampler:
+    """
+    Periodically samples system power and each running game's CPU time and
+    stores one ring record per game per interval, tagged with whether the game
+    was focused during that interval. The worker also samples on every focus
+    transition, so an interval never mixes the two states.
+
+    Power is system-wide: with two games running, both get the same watts
+    for an interval. The summary compares averages between a game's own
+    focused and unfocused intervals.
+    """
+
+    def __init__(self, power_sources=(), cpu_source=None, capacity: int = 4096):
+        self.power_sources = list(power_sources)
+        self.cpu_source = cpu_source
+        self.ring = SampleRing(capacity)
+        self.game_names = []
+        self._game_ids = {}
+        # (pid, starttime) -> (CPU-время, в фокусе ли) на момент прошлого замера
+        self._last = {}
+        self._last_time = None
+
+    def open(self, log=None):
+        """ Открывает источники мощности; недоступные отбрасываются. """
+        available = []
+        for source in self.power_sources:
+            try:
+                source.open()
+                available.append(source)
+            except TelemetryUnavailable as e:
+                if log is not None:
+                    log("INFO", f"Telemetry source {source.name} unavailable: {e}")
+        self.power_sources = available
+
+    def close(self):
+        for source in self.power_sources:
+            source.close()
+
+    @property
+    def source_names(self) -> list:
+        names = [source.name for source in self.power_sources]
+        if self.cpu_source is not None:
+            names.append("procstat")
+        return names
+
+    def _game_id(self, game: str) -> int:
+        game_id = self._game_ids.get(game)
+        if game_id is None:
+            game_id = self._game_ids[game] = len(self.game_names)
+            self.game_names.append(game)
+        return game_id
+
+    def _read_power(self, now: float):
+        total, valid = 0.0, False
+        for source in self.power_sources:
+            value = source.read(now)
+            if value is not None:
+                total, valid = total + value, True
+        return total if valid else math.nan
+
+    def _read_cpu(self, pid: int):
+        if self.cpu_source is None:
+            return math.nan
+        try:
+            return self.cpu_source.read(pid)
+        except OSError:
+            return math.nan
+
+    def sample(self, now: float, instances):
+        """
+        Закрывает интервал с прошлого замера: пишет по записи на каждую игру,
+        которая была и тогда, и сейчас, с её состоянием на начало интервала.
+        """
+        watts = self._read_power(now)
+        duration = None if self._last_time is None else now - self._last_time
+        current = {}
+        for instance in instances:
+            key = (instance.pid, instance.starttime)
+            cpu = self._read_cpu(instance.pid)
+            current[key] = (cpu, instance.focused)
+            previous = self._last.get(key)
+            if previous is None or not duration:
+                continue
+            cpu_used = cpu - previous[0] if cpu >= previous[0] else math.nan
+            self.ring.append(now, duration, watts, cpu_used, self._game_id(instance.game), previous[1])
+        self._last, self._last_time = current, now
+
+    def state_changed(self, instances) -> bool:
+        """ Поменялся ли набор игр или их фокус с прошлого замера (тогда нужен замер сейчас). """
+        if len(self._last) != len(instances):
+            return True
+        for instance in instances:
+            previous = self._last.get((instance.pid, instance.starttime))
+            if previous is None or previous[1] != instance.focused:
+                return True
+        return False
+
+    def stop(self, now: float, instances):
+        """ Последний замер перед паузой: следующий интервал начнётся с нового sample(). """
+        self.sample(now, instances)
+        self._last, self._last_time = {}, None
+
+    def summary(self) -> list:
+        """
+        По каждой игре: время в фокусе и в фоне, средняя мощность (Вт) и доля
+        одного ядра ЦП (%) в каждом состоянии по записям в буфере.
+        """
+        ring = self.ring
+        # [игра][в фокусе] -> [секунды, секунды с мощностью, энергия Дж, секунды с ЦП, ЦП секунды]
+        totals = {}
+        for i in ring.indices():
+            entry = totals.setdefault(ring.game[i], ([0.0] * 5, [0.0] * 5))[ring.focused[i]]
+            duration = ring.duration[i]
+            entry[0] += duration
+            if not math.isnan(ring.watts[i]):
+                entry[1] += duration
+                entry[2] += ring.watts[i] * duration
+            if not math.isnan(ring.cpu[i]):
+                entry[3] += duration
+                entry[4] += ring.cpu[i]
+
+        def state(entry):
+            seconds, power_seconds, energy, cpu_seconds_total, cpu_used = entry
+            return {"seconds": round(seconds, 1),
+                    "watts": round(energy / power_seconds, 2) if power_seconds else None,
+                    "cpu_percent": round(cpu_used / cpu_seconds_total * 100, 1) if cpu_seconds_total else None,
+                    "cpu_seconds": round(cpu_used, 2)}
+
+        result = []
+        for game_id, (unfocused, focused) in totals.items():
+            focused, unfocused = state(focused), state(unfocused)
+            saved = (round(focused["watts"] - unfocused["watts"], 2)
+                     if focused["watts"] is not None and unfocused["watts"] is not None else None)
+            result.append({"game": self.game_names[game_id], "focused": focused, "unfocused": unfocused,
+                           "saved_watts": saved})
+        return sorted(result, key=lambda item: item["game"].casefold())
+
+    def snapshot(self) -> dict:
+        """ Содержимое файла телеметрии для вкладки "Информация". """
+        return {"sources": self.source_names, "samples": len(self.ring), "capacity": self.ring.capacity,
+                "games": self.summary()}
+
+
+def default_power_sources(hwmon_root="/sys/class/hwmon", powercap_root="/sys/class/powercap") -> list:
+    """ Все источники мощности, которые стоит попробовать открыть (TelemetrySampler.open отбросит лишние). """
+    return [HwmonPowerSource(hwmon_root), RaplPowerSource(powercap_root), NvmlPowerSource()]
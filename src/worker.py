@@ -0,0 +1,945 @@
+# --- PATH: GameFocusManager/src/worker.py ---
+
+import argparse
+import json
+import os
+import sched
+import selectors
+import signal
+import sys
+import time
+from pathlib import Path
+
+from src.actuators import MangoHudActuator
+from src.affinity import AffinityActuator
+from src.classifier import ProcessClassifier
+from src.config import CONFIG_ERROR_EXIT_CODE, ConfigStore, ConfigUnreadable, open_config_watcher
+from src.control import ControlServer
+from src.eventlog import EventLogWriter
+from src.focus import FocusSourceUnavailable, KdotoolFocusSource, open_focus_source
+from src.freezer import ProcessFreezer
+from src.fsutil import write_textfile
+from src.game_state import GameTable
+from src.instance_lock import ALREADY_RUNNING_EXIT_CODE, InstanceLock
+from src.lifecycle import ProcessEvent, open_process_monitor
+from src.metrics import Histogram, render_prometheus
+from src.paths import (config_file, control_socket_file, default_config_file, demoted_state_file, event_log_file,
+                       frozen_state_file, metrics_file, telemetry_file, worker_lock_file)
+from src.procfs import ProcFS
+from src.scheduler import TransitionScheduler
+from src.telemetry import ProcessCpuSource, TelemetrySampler, default_power_sources
+
+
+class FocusWorker:
+    """
+    The focus -> FPS-limit loop, running as one long-lived Python process.
+    Replaces focus_worker.sh: the config is kept in memory, processes are
+    inspected through /proc, and the focus source and the actuator are
+    pluggable so the whole loop can run against fakes.
+
+    With an event-driven focus source the loop sleeps in select() until focus
+    actually changes. Polling sources are queried adaptively: every
+    `min_poll_interval` right after a change, backing off to
+    `max_poll_interval` while nothing happens.
+
+    Focus is only tracked while at least one watched game is running. Game
+    starts and exits come from a process monitor: the netlink proc
+    connector, or a /proc PID-set diff every `scan_interval` seconds. With
+    no game running the worker sleeps until a process event arrives.
+    """
+
+    def __init__(self, config_file, focus_source=None, actuator=None, procfs=None,
+                 min_poll_interval: float = 0.25, max_poll_interval: float = 1.0, event_log=None,
+                 control_path=None, control_fd: int = None, clock=time.monotonic, metrics_path=None,
+                 metrics_interval: float = 5.0, freezer=None, affinity=None, process_monitor=None,
+                 scan_interval: float = 2.0, telemetry=None, telemetry_path=None,
+                 telemetry_interval: float = 5.0):
+        self.config_file = Path(config_file)
+        # Монотонные часы цикла; бенчмарк подставляет виртуальное время
+        self.clock = clock
+        self.focus_source = focus_source
+        self.actuator = actuator or MangoHudActuator()
+        self.procfs = procfs or ProcFS()
+        self.classifier = ProcessClassifier(self.procfs)
+        # Заморозка игр, долго остающихся в фоне (ступени background_tiers)
+        self.freezer = freezer or ProcessFreezer(self.procfs)
+        # Перенос фоновых игр на E-ядра и понижение их nice/ioprio
+        self.affinity = affinity or AffinityActuator(self.procfs)
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.event_log = event_log
+        # Канал управления: именованный сокет и/или унаследованный конец socketpair
+        self.control_path = control_path
+        self.control_fd = control_fd
+        self.control = None
+
+        self.config_store = ConfigStore(config_file)
+        self.config_watcher = None
+        # Запуски и завершения процессов (proc connector или сканирование /proc)
+        self.process_monitor = process_monitor
+        self.scan_interval = scan_interval
+        # None - ещё не решено, False - игр нет и фокус не отслеживается
+        self.focus_tracking = None
+        # Последнее событие фокуса, пришедшее, пока отслеживание было выключено
+        self._idle_focus_event = None
+
+        # Запущенные отслеживаемые игры и их состояние
+        self.games = GameTable(self.procfs)
+        self.focused_instance = None
+        self.last_focus_pid = None
+        # Отложенная потеря фокуса (debounce) и прочие таймеры цикла
+        self.scheduler = TransitionScheduler()
+        self._timers = sched.scheduler(self.clock, time.sleep)
+        self._debounce_timer = None
+        self._tier_timer = None
+        self._scan_timer = None
+        self._flush_timer = None
+        # Цели актуатора, которым мы меняли лимит: цель -> игра (None - глобальный конфиг)
+        self._touched_targets = {}
+        # Последний применённый лимит по каждой цели
+        self._target_limits = {}
+        # Задержка от события смены фокуса до применения лимита (секунды)
+        self.last_decision_latency = None
+
+        self.poll_interval = min_poll_interval
+        self._next_poll = 0.0
+        self._selector = None
+        self._focus_fd = None
+        self._wakeup_r, self._wakeup_w = None, None
+        self._stop_requested = False
+
+        self.started_at = None
+        self.focus_changes = 0
+        self.config_reloads = 0
+        self._status_dirty = False
+
+        # Метрики: счётчики - обычные целые, экспорт в файл Prometheus не чаще
+        # раза в metrics_interval и только если что-то изменилось
+        self.loop_iterations = 0
+        self.focus_events = 0
+        self.process_events = 0
+        self.decision_latency = Histogram()
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._metrics_timer = None
+        self._metrics_exported = None
+
+        # Телеметрия (src.telemetry.TelemetrySampler): замеры раз в telemetry_interval
+        # и на каждом переходе фокуса, только пока запущена игра
+        self.telemetry = telemetry
+        self.telemetry_path = telemetry_path
+        self.telemetry_interval = telemetry_interval
+        self._telemetry_timer = None
+
+    # --- Логирование ---
+
+    def log(self, tag: str, message: str, event_type: str = None, **fields):
+        """
+        Пишет запись в структурированный журнал. tag - уровень (EVENT, ACTION,
+        ERROR, INFO), event_type - машинно-читаемый тип, fields - данные события.
+        """
+        if self.event_log is None:
+            return
+        self.event_log.write(tag, event_type or tag.lower(), message, **fields)
+        # Буфер сбрасывается пачкой раз в секунду
+        if self.event_log.pending and self._flush_timer is None:
+            self._flush_timer = self._timers.enter(1.0, 0, self._flush_event_log)
+
+    def _flush_event_log(self):
+        self._flush_timer = None
+        self.event_log.flush()
+
+    # --- Конфигурация ---
+
+    def load_config(self, force: bool = False) -> bool:
+        """
+        Перечитывает games.json, только если файл изменился.
+        Возвращает True, если конфиг был (пере)загружен.
+        """
+        try:
+            if force:
+                self.config_store.load()
+            elif not self.config_store.reload_if_changed():
+                return False
+        except FileNotFoundError:
+            raise ConfigUnreadable(f"Config file not found at {self.config_file}")
+        except (OSError, ValueError) as e:
+            # Запись атомарна, так что это ошибка в самом файле (например, правка вручную):
+            # оставляем прежний конфиг
+            if self.config_store.config is None:
+                raise ConfigUnreadable(f"Failed to read {self.config_file}: {e}")
+            self.log("ERROR", f"Failed to read {self.config_file}: {e}", "config_error")
+            return False
+
+        config = self.config_store.config
+        self.scheduler.configure(config.focus_loss_debounce_ms / 1000, config.ignored_window_classes)
+        self.freezer.method = config.freeze_method
+        return True
+
+    @property
+    def config(self):
+        return self.config_store.config
+
+    def _on_config_changed(self):
+        if self.config_watcher.changed() and self.load_config():
+            self.on_config_reloaded()
+
+    def on_config_reloaded(self):
+        self.config_reloads += 1
+        self.log("INFO", f"Config reloaded ({len(self.config.games_to_watch)} games).", "config_reloaded",
+                 generation=self.config_store.generation)
+        self.refresh_games()
+        was_tracking = self.focus_tracking
+        # При включении отслеживания фокус определяется заново, иначе - перепроверяем прежний
+        self._update_focus_tracking()
+        if was_tracking and self.focus_tracking:
+            self.handle_focus(self.last_focus_pid, force=True)
+        # Лимиты могли измениться, даже если фокус остался прежним
+        self.apply_limits()
+        self._prepare_app_configs()
+        self._status_dirty = True
+
+    # --- Определение игры ---
+
+    def match_game(self, pid):
+        """ Возвращает имя отслеживаемой игры, которой принадлежит процесс, или None. """
+        return self.classifier.classify(pid, self.config_store.matcher, self.config_store.revision)
+
+    # --- Основной цикл ---
+
+    def refresh_games(self):
+        """ Обновляет таблицу запущенных игр. """
+        added, removed = self.games.refresh(self.config_store.matcher)
+        for instance in added:
+            # Ступени фона отсчитываются от запуска, если игра ещё ни разу не была в фокусе
+            instance.started_at = instance.last_transition = self.clock()
+            self.log("EVENT", f"Game {instance.game} started (PID: {instance.pid}).", "game_started",
+                     pid=instance.pid, game=instance.game)
+        if added or removed:
+            self._status_dirty = True
+        for instance in removed:
+            if self.games.is_alive(instance):
+                self._release(instance)
+            else:
+                self.log("EVENT", f"Game {instance.game} exited (PID: {instance.pid}).", "game_exited",
+                         pid=instance.pid, game=instance.game)
+                self.freezer.forget(instance.pid)
+                self.affinity.forget(instance.pid)
+            if instance is self.focused_instance:
+                # Экземпляр мог перейти к найденному сканом предку той же игры
+                self.focused_instance = self.games.instance_for(instance.pid, instance.game) \
+                    if self.games.is_alive(instance) else None
+                self.scheduler.reset(self.focused_instance)
+        if removed:
+            # Следующий запуск завершившейся игры должен начаться с активного лимита
+            self._prepare_app_configs()
+
+    def _prepare_app_configs(self):
+        """
+        MangoHud читает per-app конфиг один раз, при запуске игры: если файла ещё нет,
+        игра весь сеанс следит за общим MangoHud.conf, который в этом режиме не трогаем.
+        Поэтому конфиги незапущенных игр держим готовыми, с активным лимитом. Только для
+        match_mode "exact": там имена из списка и есть имена программ.
+        """
+        config = self.config
+        if not config.mangohud_per_app or config.match_mode != "exact":
+            return
+        running = {self._target(instance) for instance in self.games}
+        for name in config.games_to_watch:
+            if name not in running:
+                self.actuator.apply(config.limits_for(name)[0], name)
+
+    def _release(self, instance):
+        """
+        Процесс жив, но больше не отслеживается (игру убрали из списка, сменился
+        match_mode или игру представляет теперь процесс-предок): возвращаем ему
+        всё, что воркер с ним сделал.
+        """
+        if instance.game in self.config_store.matcher.names:
+            self.log("EVENT", f"Game {instance.game} is now tracked by another process (was PID: {instance.pid}).",
+                     "game_reassigned", pid=instance.pid, game=instance.game)
+        else:
+            self.log("EVENT", f"Game {instance.game} is no longer watched (PID: {instance.pid}).",
+                     "game_unwatched", pid=instance.pid, game=instance.game)
+        if instance.frozen:
+            self._thaw(instance)
+        if instance.demotion is not None:
+            self._restore(instance)
+        target = self._target(instance)
+        # Глобальную цель выставит apply_limits; per-app цель может делить другой экземпляр
+        if target is not None and all(self._target(other) != target for other in self.games):
+            self._set_limit(target, self.config.limits_for(instance.game)[0], instance.game)
+
+    # --- Жизненный цикл процессов ---
+
+    def _on_process_events(self):
+        self._handle_process_events(self.process_monitor.read_events())
+
+    def _on_scan_timer(self):
+        self._scan_timer = self._timers.enter(self.process_monitor.interval, 0, self._on_scan_timer)
+        events = self.process_monitor.scan()
+        # Если PID игры занял новый процесс между сканами, множество PID не изменилось:
+        # сами игры проверяем по времени запуска (одно чтение stat на игру)
+        exited = {event.pid for event in events if event.kind == "exit"}
+        events += [ProcessEvent("exit", instance.pid) for instance in self.games
+                   if instance.pid not in exited and not self.games.is_alive(instance)]
+        self._handle_process_events(events)
+
+    def _handle_process_events(self, events):
+        """
+        Пересобирает таблицу игр, только если событие касается игры: запустился
+        процесс из games_to_watch или завершился процесс из таблицы.
+        """
+        if self.config_watcher is None and self.load_config():
+            # Без inotify конфиг проверяется здесь: при простое фокус не отслеживается
+            self.on_config_reloaded()
+        self.process_events += len(events)
+        matcher = self.config_store.matcher
+        changed = False
+        for event in events:
+            if event.kind == "exit":
+                self.classifier.forget(event.pid)
+                changed = changed or event.pid in self.games.instances
+            elif event.kind == "resync":
+                changed = True
+            elif not changed and matcher and matcher.match_process(self.procfs, event.pid) is not None:
+                changed = True
+        if changed:
+            self.refresh_games()
+            self.apply_limits()
+            self._update_focus_tracking()
+
+    def _update_focus_tracking(self):
+        """ Фокус отслеживается, только пока запущена хотя бы одна игра; без игр воркер спит. """
+        tracking = len(self.games) > 0
+        if tracking == self.focus_tracking:
+            return
+        self.focus_tracking = tracking
+        self._status_dirty = True
+        if not tracking:
+            self.focus_source.suspend()
+            self.last_focus_pid = None
+            self.scheduler.reset()
+            self._arm_debounce_timer()
+            self._stop_telemetry()
+            self.log("INFO", "No watched game is running; focus tracking paused.", "focus_tracking_paused")
+            return
+
+        self.log("INFO", "A watched game is running; focus tracking resumed.", "focus_tracking_resumed")
+        self._start_telemetry()
+        try:
+            self.focus_source.resume()
+        except FocusSourceUnavailable as e:
+            self.log("ERROR", f"{e}; falling back to kdotool polling.", "focus_source_error")
+            self._switch_focus_source(KdotoolFocusSource())
+        self.poll_interval = self.min_poll_interval
+        self._next_poll = self.clock()
+        if self.focus_source.event_driven:
+            event, self._idle_focus_event = self._idle_focus_event, None
+            if event is not None and event.pid == self.focus_source.active_pid():
+                # Окно игры получило фокус раньше, чем мы узнали о её запуске
+                self.handle_focus(event.pid, event.timestamp, force=True, window_class=event.window_class)
+            else:
+                self.handle_focus(self.focus_source.active_pid(), force=True)
+
+    def _target(self, instance):
+        """ Цель актуатора для игры: её per-app конфиг или общий конфиг. """
+        return instance.app if self.config.mangohud_per_app else None
+
+    def apply_limits(self, event_time: float = None):
+        """
+        Применяет лимиты ко всем целям: сфокусированная игра получает активный
+        лимит, остальные - ступень фоновой политики по времени вне фокуса
+        (фоновый лимит, затем более низкие и, возможно, заморозка) и
+        понижение (E-ядра, nice, ioprio). Если несколько игр делят одну цель
+        (глобальный конфиг), побеждает более мягкий лимит.
+        """
+        now = self.clock()
+        targets = {}
+        freeze = []
+        next_change = None
+        for instance in self.games:
+            if instance.focused:
+                limit, frozen, demotion = self.config.limits_for(instance.game)[0], False, None
+            else:
+                demotion = self.config.demotion_for(instance.game) or None
+                policy = self.config.policy_for(instance.game)
+                elapsed = now - instance.last_transition
+                limit, frozen = policy.state(elapsed)
+                after = policy.next_change(elapsed)
+                if after is not None:
+                    deadline = instance.last_transition + after
+                    next_change = deadline if next_change is None else min(next_change, deadline)
+            freeze.append((instance, frozen, demotion))
+            target = self._target(instance)
+            if target in targets:
+                previous = targets[target][0]
+                limit = 0 if 0 in (previous, limit) else max(previous, limit)
+            targets[target] = (limit, instance.game)
+        if not self.config.mangohud_per_app and None not in targets:
+            # Игр нет - снимаем лимит, чтобы не душить прочие приложения с MangoHud
+            targets[None] = (self.config.fps_limit_active, None)
+
+        # Сначала размораживаем: вернувшаяся в фокус игра должна ожить раньше всего остального
+        for instance, frozen, demotion in freeze:
+            if not frozen and instance.frozen:
+                self._thaw(instance)
+            if instance.demotion is not None and instance.demotion != demotion:
+                self._restore(instance)
+        for target, (limit, game) in targets.items():
+            self._set_limit(target, limit, game, event_time)
+        for instance in self.games:
+            instance.applied_limit = targets[self._target(instance)][0]
+        for instance, frozen, demotion in freeze:
+            if demotion is not None and instance.demotion is None:
+                self._demote(instance, demotion)
+            if frozen and not instance.frozen:
+                self._freeze(instance)
+        self._arm_tier_timer(next_change)
+        # Замер на границе интервала, чтобы он не смешивал время в фокусе и в фоне
+        if self._telemetry_timer is not None:
+            instances = list(self.games)
+            if self.telemetry.state_changed(instances):
+                self.telemetry.sample(now, instances)
+
+    def _freeze(self, instance):
+        method = self.freezer.freeze(instance.pid)
+        if method is None:
+            self.log("ERROR", f"Failed to freeze {instance.game} (PID: {instance.pid}).", "freeze_error",
+                     pid=instance.pid, game=instance.game)
+            return
+        instance.frozen = True
+        self._status_dirty = True
+        self.log("ACTION", f"Froze {instance.game} (PID: {instance.pid}) via {method}.", "game_frozen",
+                 pid=instance.pid, game=instance.game, method=method)
+
+    def _thaw(self, instance):
+        instance.frozen = False
+        self._status_dirty = True
+        if self.freezer.thaw(instance.pid):
+            self.log("ACTION", f"Thawed {instance.game} (PID: {instance.pid}).", "game_thawed",
+                     pid=instance.pid, game=instance.game)
+
+    def _demote(self, instance, demotion):
+        changed = self.affinity.demote(instance.pid, demotion)
+        # Даже если менять было нечего (например, ЦП не гибридный), повторно не пытаемся
+        instance.demotion = demotion
+        if changed:
+            self._status_dirty = True
+            self.log("ACTION", f"Demoted {instance.game} (PID: {instance.pid}): {', '.join(changed)}.",
+                     "game_demoted", pid=instance.pid, game=instance.game, changed=changed)
+
+    def _restore(self, instance):
+        instance.demotion = None
+        self._status_dirty = True
+        if self.affinity.restore(instance.pid):
+            self.log("ACTION", f"Restored CPU affinity and priority of {instance.game} (PID: {instance.pid}).",
+                     "game_restored", pid=instance.pid, game=instance.game)
+
+    def _arm_tier_timer(self, deadline):
+        """ Таймер следующей ступени фоновой политики (один на все игры). """
+        if self._tier_timer is not None:
+            if deadline is not None and self._tier_timer.time == deadline:
+                return
+            try:
+                self._timers.cancel(self._tier_timer)
+            except ValueError:
+                pass  # таймер уже сработал
+            self._tier_timer = None
+        if deadline is not None:
+            self._tier_timer = self._timers.enterabs(deadline, 0, self._on_tier_timer)
+
+    def _on_tier_timer(self):
+        self._tier_timer = None
+        self.apply_limits()
+
+    def _set_limit(self, target, limit: int, game=None, event_time: float = None) -> bool:
+        """ Применяет лимит к одной цели актуатора и записывает событие. """
+        self._touched_targets[target] = game
+        if not self.actuator.apply(limit, target):
+            return False
+        latency_ms = None
+        if event_time is not None:
+            self.last_decision_latency = self.clock() - event_time
+            self.decision_latency.observe(self.last_decision_latency)
+            latency_ms = round(self.last_decision_latency * 1000, 3)
+        old_limit = self._target_limits.get(target)
+        self._target_limits[target] = limit
+        self.log("ACTION", f"Set fps_limit={limit} " + (f"for {target}" if target else "globally"),
+                 "limit_applied", target=target, game=game, old_limit=old_limit, new_limit=limit,
+                 latency_ms=latency_ms)
+        return True
+
+    def handle_focus(self, pid, event_time: float = None, force: bool = False, window_class: str = ""):
+        """ Обрабатывает новое активное окно и передаёт переход планировщику. """
+        if self.config_watcher is None:
+            # Без inotify проверяем только mtime файла - это один stat()
+            if self.load_config():
+                self.refresh_games()
+                force = True
+        if pid == self.last_focus_pid and not force:
+            return
+        if self.scheduler.is_ignored(window_class):
+            # Переключатель задач, панель и т.п. - не считаем это сменой фокуса
+            self.scheduler.suppressed += 1
+            return
+        self.last_focus_pid = pid
+        self.focus_changes += 1
+
+        focused = None
+        game = self.match_game(pid)
+        if game is not None:
+            focused = self.games.instance_for(pid, game) or self.games.add(pid, game)
+
+        if self.scheduler.submit(focused, self.clock(), event_time):
+            self.commit_focus(focused, event_time)
+        self._arm_debounce_timer()
+
+    def _arm_debounce_timer(self):
+        if self._debounce_timer is not None:
+            try:
+                self._timers.cancel(self._debounce_timer)
+            except ValueError:
+                pass  # таймер уже сработал
+            self._debounce_timer = None
+        if self.scheduler.deadline is not None:
+            self._debounce_timer = self._timers.enterabs(self.scheduler.deadline, 0, self._on_debounce_timer)
+
+    def _on_debounce_timer(self):
+        self._debounce_timer = None
+        event_time = self.scheduler.fire(self.clock())
+        if event_time is not None:
+            self.commit_focus(None, event_time)
+
+    def commit_focus(self, focused, event_time: float = None):
+        """ Применяет решённый переход: помечает игры и выставляет лимиты. """
+        now = self.clock()
+        for instance in self.games:
+            is_focused = instance is focused
+            if instance.focused != is_focused:
+                instance.focused = is_focused
+                instance.last_transition = now
+                state = "GAINED" if is_focused else "LOST"
+                self.log("EVENT", f"Game {instance.game} (PID: {instance.pid}) {state} focus.",
+                         "focus_gained" if is_focused else "focus_lost", pid=instance.pid, game=instance.game)
+        self.focused_instance = focused
+        self.apply_limits(event_time)
+        self._status_dirty = True
+
+    def poll_focus(self):
+        """ Опрашивает неблокирующий источник и подстраивает интервал опроса. """
+        now = self.clock()
+        pid = self.focus_source.active_pid()
+        if pid != self.last_focus_pid:
+            self.focus_events += 1
+            self.poll_interval = self.min_poll_interval
+        else:
+            self.poll_interval = min(self.poll_interval * 1.5, self.max_poll_interval)
+        self.handle_focus(pid, now)
+        self._next_poll = self.clock() + self.poll_interval
+
+    def _on_focus_events(self):
+        try:
+            events = self.focus_source.read_events()
+        except FocusSourceUnavailable as e:
+            self.log("ERROR", f"{e}; falling back to kdotool polling.", "focus_source_error")
+            self._switch_focus_source(KdotoolFocusSource())
+            return
+        if not self.focus_tracking:
+            # Игр нет - смены фокуса не важны; последнюю запомним на случай запуска игры
+            if events:
+                self._idle_focus_event = events[-1]
+            return
+        self.focus_events += len(events)
+        for event in events:
+            self.handle_focus(event.pid, event.timestamp, window_class=event.window_class)
+
+    def _switch_focus_source(self, source):
+        if self._focus_fd is not None:
+            self._selector.unregister(self._focus_fd)
+            self._focus_fd = None
+        if self.focus_source is not None:
+            self.focus_source.close()
+        self.focus_source = source
+        if source.event_driven:
+            self._focus_fd = source.fileno()
+            self._selector.register(self._focus_fd, selectors.EVENT_READ, self._on_focus_events)
+        self._next_poll = 0.0
+
+    def _on_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    # --- Канал управления ---
+
+    def status(self) -> dict:
+        """ Снимок состояния для StatusTab и других клиентов канала управления. """
+        now = self.clock()
+        focused = self.focused_instance
+        latency = self.last_decision_latency
+        return {
+            "pid": os.getpid(),
+            "uptime": round(now - self.started_at, 1) if self.started_at else 0,
+            "focus_source": type(self.focus_source).__name__ if self.focus_source else None,
+            "focused_game": focused.game if focused else None,
+            "focused_pid": focused.pid if focused else None,
+            "focus_tracking": bool(self.focus_tracking),
+            "process_monitor": type(self.process_monitor).__name__ if self.process_monitor else None,
+            "games": [
+                {"pid": instance.pid, "game": instance.game, "app": instance.app,
+                 "focused": instance.focused, "applied_limit": instance.applied_limit,
+                 "frozen": instance.frozen, "demoted": self.affinity.is_demoted(instance.pid),
+                 "since_transition": round(now - instance.last_transition, 1) if instance.last_transition else None,
+                 "running_for": round(now - instance.started_at, 1) if instance.started_at else None}
+                for instance in self.games
+            ],
+            "counters": self.metric_values(),
+            "last_decision_latency_ms": round(latency * 1000, 3) if latency is not None else None,
+            "decision_latency": self.decision_latency.to_dict(),
+        }
+
+    # --- Телеметрия ---
+
+    def _start_telemetry(self):
+        if self.telemetry is None or self._telemetry_timer is not None:
+            return
+        self.telemetry.sample(self.clock(), list(self.games))
+        self._telemetry_timer = self._timers.enter(self.telemetry_interval, 0, self._on_telemetry_timer)
+
+    def _stop_telemetry(self):
+        if self._telemetry_timer is None:
+            return
+        try:
+            self._timers.cancel(self._telemetry_timer)
+        except ValueError:
+            pass
+        self._telemetry_timer = None
+        self.telemetry.stop(self.clock(), list(self.games))
+        self.export_telemetry()
+
+    def _on_telemetry_timer(self):
+        self._telemetry_timer = self._timers.enter(self.telemetry_interval, 0, self._on_telemetry_timer)
+        self.telemetry.sample(self.clock(), list(self.games))
+        self.export_telemetry()
+
+    def export_telemetry(self):
+        """ Записывает сводку телеметрии в файл, который читает вкладка "Информация". """
+        if self.telemetry_path is None:
+            return
+        snapshot = dict(self.telemetry.snapshot(), updated=time.time())
+        try:
+            write_textfile(self.telemetry_path, json.dumps(snapshot, ensure_ascii=False))
+        except OSError as e:
+            self.log("ERROR", f"Failed to write telemetry to {self.telemetry_path}: {e}", "telemetry_error")
+
+    # --- Метрики ---
+
+    def metric_values(self) -> dict:
+        """ Текущие значения счётчиков (имена - ключи src.metrics.METRICS). """
+        return {
+            "loop_iterations": self.loop_iterations,
+            "focus_events": self.focus_events,
+            "focus_changes": self.focus_changes,
+            "classifier_hits": self.classifier.hits,
+            "classifier_misses": self.classifier.misses,
+            "config_reloads": self.config_reloads,
+            "config_generation": self.config_store.generation,
+            "mangohud_writes": getattr(self.actuator, "writes", None),
+            "suppressed_transitions": self.scheduler.suppressed,
+            "running_games": len(self.games),
+            "process_events": self.process_events,
+            "focus_tracking": int(bool(self.focus_tracking)),
+        }
+
+    def _metrics_signature(self) -> tuple:
+        # Всё, кроме числа итераций (сам экспорт - тоже итерация цикла) и событий о процессах
+        # (с proc connector это каждый запуск в системе - простаивающий воркер не должен просыпаться)
+        return (self.focus_events, self.focus_changes, self.config_reloads, self.scheduler.suppressed,
+                self.decision_latency.count, getattr(self.actuator, "writes", None), len(self.games),
+                bool(self.focus_tracking))
+
+    def _maybe_schedule_metrics_export(self):
+        if (self.metrics_path is None or self._metrics_timer is not None
+                or self._metrics_signature() == self._metrics_exported):
+            return
+        self._metrics_timer = self._timers.enter(self.metrics_interval, 0, self.export_metrics)
+
+    def export_metrics(self):
+        """ Записывает метрики в текстовый файл Prometheus (для node_exporter textfile collector). """
+        self._metrics_timer = None
+        if self.metrics_path is None:
+            return
+        self._metrics_exported = self._metrics_signature()
+        # Заодно обновляем панель метрик у подписчиков
+        self._status_dirty = True
+        try:
+            write_textfile(self.metrics_path, render_prometheus(self.metric_values(),
+                                                                {"decision_latency": self.decision_latency}))
+        except OSError as e:
+            self.log("ERROR", f"Failed to write metrics to {self.metrics_path}: {e}", "metrics_error")
+
+    def handle_control(self, channel, request: dict) -> dict:
+        """ Выполняет команду, пришедшую по каналу управления. """
+        cmd = request.get("cmd")
+        if cmd == "ping":
+            return {"ok": True}
+        if cmd == "status":
+            return {"ok": True, "status": self.status()}
+        if cmd == "metrics":
+            return {"ok": True, "metrics": self.metric_values(),
+                    "histograms": {"decision_latency": self.decision_latency.to_dict()}}
+        if cmd == "subscribe":
+            channel.subscribed = True
+            return {"ok": True, "event": "status", "status": self.status()}
+        if cmd == "reload":
+            self.load_config(force=True)
+            self.on_config_reloaded()
+            return {"ok": True, "generation": self.config_store.generation}
+        if cmd == "stop":
+            self.request_stop()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command: {cmd}"}
+
+    def start(self):
+        """ Загружает конфиг и сбрасывает лимит, как это делал скрипт при старте. """
+        self.load_config(force=True)
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, self._on_wakeup)
+
+        if self.control_path or self.control_fd is not None:
+            self.control = ControlServer(self._selector, self.handle_control,
+                                         self.control_path, self.control_fd)
+
+        recovered = self.freezer.recover()
+        if recovered:
+            self.log("INFO", f"Thawed {recovered} game(s) left frozen by a previous run.", "freeze_recovered",
+                     count=recovered)
+        recovered = self.affinity.recover()
+        if recovered:
+            self.log("INFO", f"Restored affinity and priority of {recovered} game(s) left demoted by a previous run.",
+                     "demotion_recovered", count=recovered)
+
+        self.config_watcher = open_config_watcher(self.config_file)
+        if self.config_watcher is not None:
+            self._selector.register(self.config_watcher.fileno(), selectors.EVENT_READ,
+                                    self._on_config_changed)
+
+        monitor = self.process_monitor
+        if monitor is None:
+            monitor = open_process_monitor(self.procfs, self.log, self.scan_interval)
+        else:
+            monitor.open()
+        self.process_monitor = monitor
+        if monitor.event_driven:
+            self._selector.register(monitor.fileno(), selectors.EVENT_READ, self._on_process_events)
+        else:
+            self._scan_timer = self._timers.enter(monitor.interval, 0, self._on_scan_timer)
+        self.log("INFO", f"Process monitor: {type(monitor).__name__}", "process_monitor",
+                 monitor=type(monitor).__name__)
+
+        if self.telemetry is not None:
+            self.telemetry.open(self.log)
+            self.log("INFO", f"Telemetry sources: {', '.join(self.telemetry.source_names) or 'none'}",
+                     "telemetry_sources", sources=self.telemetry.source_names)
+
+        source = self.focus_source
+        if source is None:
+            source = open_focus_source(self.log)
+        else:
+            source.open()
+        self.focus_source = None
+        self._switch_focus_source(source)
+        self.log("INFO", f"Focus source: {type(source).__name__}", "focus_source",
+                 source=type(source).__name__)
+        # Сбрасываем глобальный лимит при старте, как это делал скрипт. В режиме per-app
+        # глобальный конфиг не наш: его читают и посторонние приложения с MangoHud
+        if not self.config.mangohud_per_app:
+            self._set_limit(None, self.config.fps_limit_active)
+        # Уже запущенные игры; дальше таблицу обновляют события монитора процессов
+        self.refresh_games()
+        self.apply_limits()
+        self._prepare_app_configs()
+        self._update_focus_tracking()
+        self.started_at = self.clock()
+        self._status_dirty = True
+
+    def shutdown(self):
+        """ Возвращает активный лимит и освобождает источник фокуса. """
+        self.log("INFO", f"Focus Worker stopping. Resetting FPS limit. "
+                         f"Suppressed transitions: {self.scheduler.suppressed}.", "worker_stopping",
+                 suppressed=self.scheduler.suppressed)
+        try:
+            self.load_config()
+        except RuntimeError:
+            pass
+        # Игры не должны остаться замороженными после выхода воркера
+        for instance in self.games:
+            if instance.frozen:
+                self._thaw(instance)
+        self.freezer.thaw_all()
+        for instance in self.games:
+            if instance.demotion is not None:
+                self._restore(instance)
+        self.affinity.restore_all()
+        for target, game in list(self._touched_targets.items()):
+            limit = self.config.limits_for(game)[0] if game else self.config.fps_limit_active
+            self._set_limit(target, limit, game)
+        if self.metrics_path is not None:
+            self.export_metrics()
+        self._stop_telemetry()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        self.focus_source.close()
+        self.process_monitor.close()
+        if self.config_watcher is not None:
+            self.config_watcher.close()
+        if self.control is not None:
+            self.control.publish({"event": "stopped"})
+            self.control.close()
+        self._selector.close()
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        self._wakeup_r, self._wakeup_w = None, None
+
+    def request_stop(self, *_):
+        """ Просит цикл завершиться; безопасно вызывать из обработчика сигнала и других потоков. """
+        self._stop_requested = True
+        if self._wakeup_w is not None:
+            try:
+                os.write(self._wakeup_w, b"\0")
+            except OSError:
+                pass
+
+    def next_deadline(self):
+        """ Ближайший момент по self.clock, когда у цикла есть работа без внешних событий. """
+        deadlines = [self._timers.queue[0].time] if not self._timers.empty() else []
+        if not self.focus_source.event_driven and self.focus_tracking:
+            deadlines.append(self._next_poll)
+        return min(deadlines, default=None)
+
+    def run_once(self, timeout: float = None):
+        """ Ждёт событий не дольше timeout (или до следующего опроса/таймера) и обрабатывает их. """
+        self.loop_iterations += 1
+        timer_wait = self._timers.run(blocking=False)
+        if timer_wait is not None:
+            timeout = timer_wait if timeout is None else min(timeout, timer_wait)
+
+        if not self.focus_source.event_driven and self.focus_tracking:
+            if self.clock() >= self._next_poll:
+                self.poll_focus()
+            wait = max(0.0, self._next_poll - self.clock())
+            timeout = wait if timeout is None else min(timeout, wait)
+
+        if self._status_dirty and self.control is not None:
+            timeout = 0
+
+        for key, _ in self._selector.select(timeout):
+            key.data()
+
+        # Подписчики получают одно уведомление на пачку изменений
+        if self._status_dirty:
+            self._status_dirty = False
+            if self.control is not None:
+                self.control.publish({"event": "status", "status": self.status()}, coalesce=True)
+        self._maybe_schedule_metrics_export()
+
+    def run(self):
+        self.start()
+        try:
+            while not self._stop_requested:
+                self.run_once()
+        finally:
+            self.shutdown()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Game Focus Manager worker")
+    parser.add_argument("--config", default=None,
+                        help="games.json to use (default: in $XDG_CONFIG_HOME, created from the bundled one)")
+    parser.add_argument("--lock-file", default=None,
+                        help="Single-instance lock (default: in $XDG_RUNTIME_DIR)")
+    parser.add_argument("--log-file", default=None,
+                        help="Structured event log (JSONL), rotated by size")
+    parser.add_argument("--log-max-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--log-generations", type=int, default=3)
+    parser.add_argument("--control-socket", default=None,
+                        help="Unix socket for status and control (default: in $XDG_RUNTIME_DIR)")
+    parser.add_argument("--control-fd", type=int, default=None,
+                        help="Inherited, already connected control socket (socketpair end)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Prometheus text file with worker metrics (default: in $XDG_RUNTIME_DIR)")
+    parser.add_argument("--cgroup-root", default="/sys/fs/cgroup",
+                        help="cgroup v2 mount point used to freeze games in the background")
+    parser.add_argument("--sysfs-cpu-root", default="/sys/devices/system/cpu",
+                        help="sysfs CPU directory used to detect the efficiency cores of a hybrid CPU")
+    parser.add_argument("--scan-interval", type=float, default=2.0,
+                        help="How often to scan /proc for game starts when the proc connector is not permitted")
+    parser.add_argument("--telemetry-interval", type=float, default=5.0,
+                        help="Power and CPU sampling interval while a game runs (0 disables telemetry)")
+    parser.add_argument("--telemetry-file", default=None,
+                        help="JSON summary of the telemetry (default: in $XDG_RUNTIME_DIR)")
+    parser.add_argument("--hwmon-root", default="/sys/class/hwmon",
+                        help="hwmon directory with GPU power sensors")
+    parser.add_argument("--powercap-root", default="/sys/class/powercap",
+                        help="powercap directory with RAPL energy counters")
+    parser.add_argument("--min-interval", type=float, default=0.25,
+                        help="Poll interval right after a focus change (polling fallback only)")
+    parser.add_argument("--max-interval", type=float, default=1.0,
+                        help="Poll interval while focus is stable (polling fallback only)")
+    args = parser.parse_args(argv)
+
+    lock = InstanceLock(args.lock_file or worker_lock_file())
+    if not lock.acquire():
+        print(f"Worker is already running (PID: {InstanceLock.holder(lock.path)}).", file=sys.stderr)
+        return ALREADY_RUNNING_EXIT_CODE
+
+    event_log = EventLogWriter(args.log_file or event_log_file(), max_bytes=args.log_max_bytes,
+                               generations=args.log_generations)
+
+    telemetry = None
+    if args.telemetry_interval > 0:
+        telemetry = TelemetrySampler(default_power_sources(args.hwmon_root, args.powercap_root),
+                                     ProcessCpuSource(ProcFS()))
+
+    config_path = args.config or config_file()
+    if args.config is None:
+        ConfigStore(config_path, default_config_file()).ensure_exists()
+
+    worker = FocusWorker(config_path, min_poll_interval=args.min_interval,
+                         max_poll_interval=args.max_interval, event_log=event_log,
+                         control_path=args.control_socket or control_socket_file(),
+                         control_fd=args.control_fd, metrics_path=args.metrics_file or metrics_file(),
+                         scan_interval=args.scan_interval, telemetry=telemetry,
+                         telemetry_path=args.telemetry_file or telemetry_file(),
+                         telemetry_interval=args.telemetry_interval,
+                         freezer=ProcessFreezer(ProcFS(), cgroup_root=args.cgroup_root,
+                                                state_file=frozen_state_file()),
+                         affinity=AffinityActuator(ProcFS(), sysfs_root=args.sysfs_cpu_root,
+                                                   state_file=demoted_state_file()))
+    signal.signal(signal.SIGTERM, worker.request_stop)
+    signal.signal(signal.SIGINT, worker.request_stop)
+
+    worker.log("INFO", f"Focus Worker process started (PID: {os.getpid()})", "worker_started",
+               pid=os.getpid(), config=str(config_path))
+    try:
+        worker.run()
+    except ConfigUnreadable as e:
+        worker.log("ERROR", f"{e}. Exiting.", "worker_error")
+        return CONFIG_ERROR_EXIT_CODE
+    except RuntimeError as e:
+        worker.log("ERROR", f"{e}. Exiting.", "worker_error")
+        return 1
+    finally:
+        event_log.close()
+        lock.release()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,332 @@
 import os
+import select
+import signal
+import socket
 import subprocess
-from pathlib import Path
+import sys
+import threading
+import time
+
+from src.config import CONFIG_ERROR_EXIT_CODE, ConfigStore
+from src.control import ControlChannel, ControlClient
+from src.instance_lock import ALREADY_RUNNING_EXIT_CODE, InstanceLock
+from src.paths import (app_dir, config_file, control_socket_file, default_config_file, event_log_file,
+                       metrics_file, worker_lock_file)
+
+# Перезапуск упавшего воркера: 1 с, 2 с, 4 с ... но не реже раза в минуту.
+# Если воркер проработал дольше RESTART_STABLE_AFTER, задержка сбрасывается.
+RESTART_DELAY_INITIAL = 1.0
+RESTART_DELAY_MAX = 60.0
+RESTART_STABLE_AFTER = 60.0
+# Сколько ждать, пока только что запущенный воркер запишет свой PID в файл блокировки
+LOCK_PID_WAIT = 1.0
+
+
+def open_pidfd(pid: int):
+    """ pidfd процесса (Linux 5.3+) или None, если ядро/Python его не поддерживают. """
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        return None
+
 
 class WorkerManager:
+    """
+    Starts, stops and supervises the worker process. The child is held as
+    a Popen together with its pidfd, and a watcher thread blocks in
+    waitpid, so exits are noticed immediately without polling. A worker
+    that crashes is restarted with exponential backoff. Single-instance is
+    guaranteed by the worker's flock in the runtime dir, which is also how
+    a worker started outside the GUI is found.
+    """
 
     def __init__(self):
-        self.project_root = Path(os.getcwd())
-        self.worker_script = self.project_root / "focus_worker.sh"
-        self.pid_file = Path("/tmp/game_focus_manager.pid")
+        # Каталог программы (main.py, icon.png) и конфиг - не от текущего каталога запуска
+        self.project_root = app_dir()
+        self.config_file = config_file()
+        self.lock_file = worker_lock_file()
+        self.log_file = event_log_file()
+        self.control_socket = control_socket_file()
+        self.metrics_file = metrics_file()
+        # Подписка на изменения статуса: конец socketpair запущенного нами воркера
+        # или подключение к сокету управления уже работающего воркера
+        self.channel = None
+
+        self.process = None
+        # pidfd ссылается именно на наш процесс, даже после его завершения
+        self._pidfd = None
+        self._exited = threading.Event()
+        self._lock = threading.RLock()
+        self._stopping = False
+        self._started_at = 0.0
+        self._restart_delay = RESTART_DELAY_INITIAL
+        self._restart_timer = None
+        self._exit_listeners = []
+
+    def worker_command(self) -> list:
+        """ Команда запуска Python-воркера (src/worker.py) через точку входа main.py. """
+        if getattr(sys, "frozen", False):
+            # В сборке cx_Freeze sys.executable - это сам GameFocusManager
+            command = [sys.executable, "--worker"]
+        else:
+            command = [sys.executable, str(self.project_root / "main.py"), "--worker"]
+        return command + [
+            "--config", str(self.config_file),
+            "--lock-file", str(self.lock_file),
+            "--log-file", str(self.log_file),
+            "--control-socket", str(self.control_socket),
+            "--metrics-file", str(self.metrics_file),
+        ]
+
+    def add_exit_listener(self, callback):
+        """
+        callback(pid, returncode, restart_delay) вызывается из потока-наблюдателя,
+        когда запущенный нами воркер завершился. restart_delay - через сколько секунд
+        он будет перезапущен, или None, если перезапуска не будет.
+        """
+        self._exit_listeners.append(callback)
 
     def is_running(self) -> (bool, int):
-        if not self.pid_file.exists():
-            return False, -1
-        try:
-            pid = int(self.pid_file.read_text().strip())
-            os.kill(pid, 0)
-            return True, pid
-        except (ValueError, ProcessLookupError):
-            self.pid_file.unlink(missing_ok=True)
+        pid = InstanceLock.holder(self.lock_file)
+        if pid is None:
             return False, -1
+        return True, pid
+
+    def _lock_holder(self, wait: float = LOCK_PID_WAIT):
+        """
+        PID воркера, держащего блокировку, или None. Воркер пишет PID сразу после
+        flock, поэтому -1 (ещё не записан) ждём не дольше wait; -1 остаётся, если не дождались.
+        """
+        deadline = time.monotonic() + wait
+        pid = InstanceLock.holder(self.lock_file)
+        while pid == -1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+            pid = InstanceLock.holder(self.lock_file)
+        return pid
 
     def start(self) -> bool:
+        with self._lock:
+            self._stopping = False
+            self._cancel_restart()
+            return self._spawn()
+
+    def _spawn(self) -> bool:
         if self.is_running()[0]:
             print("Worker is already running.")
             return False
 
-        if not self.worker_script.is_file():
-            print(f"Error: Worker script not found at {self.worker_script}")
+        try:
+            ConfigStore(self.config_file, default_config_file()).ensure_exists()
+        except OSError as e:
+            print(f"Error: Cannot create config file {self.config_file}: {e}")
             return False
 
-        self.worker_script.chmod(0o755)
-
+        self.disconnect()
+        parent_end, child_end = socket.socketpair()
         try:
             # Запускаем воркер, передавая ему полное окружение для доступа к системным утилитам.
-            subprocess.Popen(
-                [str(self.worker_script)],
+            # Второй конец socketpair воркер сразу считает подписчиком - первый статус
+            # придёт, как только он будет готов, без опроса.
+            process = subprocess.Popen(
+                self.worker_command() + ["--control-fd", str(child_end.fileno())],
+                cwd=str(self.project_root),
                 start_new_session=True,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL,
-                env=os.environ.copy()
+                env=os.environ.copy(),
+                pass_fds=(child_end.fileno(),)
             )
-            # Воркер сам создаст PID-файл почти мгновенно.
-            print("Start command sent to worker.")
-            return True
         except Exception as e:
+            parent_end.close()
             print(f"Failed to start worker: {e}")
             return False
+        finally:
+            child_end.close()
+
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+        self.channel = ControlChannel(parent_end)
+        self.process = process
+        self._pidfd = open_pidfd(process.pid)
+        self._exited = threading.Event()
+        self._started_at = time.monotonic()
+        threading.Thread(target=self._watch, args=(process, self._exited),
+                         name="worker-watcher", daemon=True).start()
+        print(f"Worker started (PID: {process.pid}).")
+        return True
+
+    def _watch(self, process, exited: threading.Event):
+        """ Поток-наблюдатель: ждёт завершения воркера в waitpid, без опроса. """
+        returncode = process.wait()
+        exited.set()
+
+        with self._lock:
+            if process is not self.process:
+                return
+            self.process = None
+
+            restart_delay = None
+            # 0 - штатная остановка (например, командой stop), 3 - уже работает другой воркер,
+            # 4 - games.json не читается: перезапуск упадёт так же, пока файл не исправят
+            crashed = returncode not in (0, ALREADY_RUNNING_EXIT_CODE, CONFIG_ERROR_EXIT_CODE)
+            if crashed and not self._stopping:
+                if time.monotonic() - self._started_at >= RESTART_STABLE_AFTER:
+                    self._restart_delay = RESTART_DELAY_INITIAL
+                restart_delay = self._restart_delay
+                self._restart_delay = min(self._restart_delay * 2, RESTART_DELAY_MAX)
+                self._restart_timer = threading.Timer(restart_delay, self._restart)
+                self._restart_timer.daemon = True
+                self._restart_timer.start()
 
-    def stop(self) -> bool:
-        is_running, pid = self.is_running()
-        if not is_running:
-            print("Worker is not running.")
+        print(f"Worker (PID: {process.pid}) exited with code {returncode}."
+              + (f" Restarting in {restart_delay:g} s." if restart_delay is not None else "")
+              + (" Fix games.json and start it again." if returncode == CONFIG_ERROR_EXIT_CODE else ""))
+        for callback in self._exit_listeners:
+            callback(process.pid, returncode, restart_delay)
+
+    def _restart(self):
+        with self._lock:
+            self._restart_timer = None
+            if not self._stopping and self.process is None:
+                self._spawn()
+
+    def _cancel_restart(self):
+        if self._restart_timer is not None:
+            self._restart_timer.cancel()
+            self._restart_timer = None
+
+    def connect(self):
+        """
+        Возвращает канал с изменениями статуса. Если воркер запущен не нами,
+        подписывается через его сокет управления. None - воркер недоступен.
+        """
+        channel = self.channel
+        if channel is not None and not channel.closed:
+            return channel
+        try:
+            self.channel = ControlClient(self.control_socket).subscribe()
+        except OSError:
+            self.channel = None
+        return self.channel
+
+    def disconnect(self, channel=None):
+        """ Закрывает канал статуса (только если это всё ещё channel, когда он указан). """
+        current = self.channel
+        if current is None or (channel is not None and channel is not current):
+            return
+        self.channel = None
+        current.close()
+
+    def request(self, cmd: str, **params):
+        """ Разовая команда воркеру через сокет управления. None, если воркер не отвечает. """
+        try:
+            return ControlClient(self.control_socket).request(cmd, **params)
+        except (OSError, ValueError):
+            return None
+
+    def status(self):
+        reply = self.request("status")
+        return reply.get("status") if reply and reply.get("ok") else None
+
+    def metrics(self):
+        """ Счётчики и гистограммы воркера: {"metrics": {...}, "histograms": {...}} или None. """
+        reply = self.request("metrics")
+        if not (reply and reply.get("ok")):
+            return None
+        return {"metrics": reply.get("metrics", {}), "histograms": reply.get("histograms", {})}
+
+    def reload(self) -> bool:
+        reply = self.request("reload")
+        return bool(reply and reply.get("ok"))
+
+    def _wait_exit(self, process, pidfd, pid: int, timeout: float) -> bool:
+        """ Ждёт завершения процесса не дольше timeout. True - процесс завершился. """
+        if process is not None:
+            # Свой процесс: его дождётся поток-наблюдатель
+            return self._exited.wait(timeout)
+        deadline = time.monotonic() + timeout
+        if pid <= 0:
+            # PID неизвестен - ждём, пока воркер отпустит блокировку
+            while time.monotonic() < deadline:
+                if InstanceLock.holder(self.lock_file) is None:
+                    return True
+                time.sleep(0.05)
             return False
+        if pidfd is not None:
+            return bool(select.select([pidfd], [], [], timeout)[0])
+        # Без pidfd остаётся только проверять, жив ли процесс
+        while time.monotonic() < deadline:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            time.sleep(0.05)
+        return False
 
+    @staticmethod
+    def _send_signal(pidfd, pid: int, sig) -> bool:
         try:
-            # Используем pkill для гарантированной остановки.
-            # `trap` в Bash-скрипте поймает сигнал и выполнит очистку.
-            subprocess.run(["pkill", "-f", str(self.worker_script)])
-            print(f"Stop signal sent to worker process (was PID: {pid})")
+            if pidfd is not None:
+                # Сигнал именно этому процессу, даже если PID уже переиспользован
+                signal.pidfd_send_signal(pidfd, sig)
+            else:
+                os.kill(pid, sig)
             return True
+        except ProcessLookupError:
+            return False
+
+    def stop(self, timeout: float = 3.0) -> bool:
+        """
+        Останавливает воркер: команда stop по каналу управления (или SIGTERM, если он
+        не отвечает), ожидание не дольше timeout, затем SIGKILL. Может ждать до
+        2 * timeout, поэтому GUI вызывает его не из главного потока.
+        """
+        with self._lock:
+            self._stopping = True
+            self._cancel_restart()
+            process = self.process
+            own_pidfd = self._pidfd
+        stopped = self._stop(process, own_pidfd, timeout)
+        if not stopped:
+            with self._lock:
+                # Воркер остался работать: если он упадёт позже, его снова нужно перезапустить
+                self._stopping = False
+        return stopped
+
+    def _stop(self, process, own_pidfd, timeout: float) -> bool:
+        if process is not None:
+            pid, pidfd = process.pid, own_pidfd
+        else:
+            pid = self._lock_holder()
+            if pid is None:
+                print("Worker is not running.")
+                return False
+            # -1: воркер запускается и ещё не записал PID - остановить его можно только командой
+            pidfd = open_pidfd(pid) if pid > 0 else None
+
+        try:
+            # Штатная остановка по каналу управления; сигнал - если воркер не отвечает
+            reply = self.request("stop")
+            if not (reply and reply.get("ok")):
+                if pid <= 0:
+                    print("Worker is starting and does not answer yet, try again.")
+                    return False
+                if not self._send_signal(pidfd, pid, signal.SIGTERM):
+                    print(f"Worker (PID: {pid}) is already gone.")
+                    return True
+            if self._wait_exit(process, pidfd, pid, timeout):
+                print(f"Worker stopped (was PID: {pid})" if pid > 0 else "Worker stopped.")
+                return True
+            if pid <= 0:
+                print(f"Worker did not stop in {timeout:g} s.")
+                return False
+
+            print(f"Worker (PID: {pid}) did not stop in {timeout:g} s, sending SIGKILL.")
+            self._send_signal(pidfd, pid, signal.SIGKILL)
+            return self._wait_exit(process, pidfd, pid, timeout)
         except Exception as e:
             print(f"Failed to stop worker: {e}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            if pidfd is not None and pidfd != own_pidfd:
+                os.close(pidfd)
@@ -0,0 +1,65 @@
+# --- PATH: GameFocusManager/tests/conftest.py ---
+
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+# Имя "игры" для тестов: копия sleep под этим именем, чтобы её нашёл GameMatcher
+DUMMY_GAME = "gfmtestgame"
+
+
+def wait_for_state(procfs, pid: int, states: str, timeout: float = 2.0) -> str:
+    """ Ждёт, пока процесс перейдёт в одно из состояний /proc/<pid>/stat (сигналы доставляются не сразу). """
+    deadline = time.monotonic() + timeout
+    state = None
+    while time.monotonic() < deadline:
+        stat = procfs.stat(pid)
+        state = stat.state if stat else None
+        if state in states:
+            break
+        time.sleep(0.01)
+    return state
+
+
+@pytest.fixture
+def spawn_dummy(tmp_path):
+    """ Запускает фиктивные дочерние процессы-"игры"; все они убиваются после теста. """
+    processes = []
+
+    def spawn(name: str = DUMMY_GAME) -> subprocess.Popen:
+        exe = tmp_path / "bin" / name
+        if not exe.exists():
+            exe.parent.mkdir(exist_ok=True)
+            shutil.copy(shutil.which("sleep"), exe)
+        process = subprocess.Popen([str(exe), "600"])
+        processes.append(process)
+        return process
+
+    yield spawn
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    """ Пишет games.json во временный каталог; ключи поверх минимального конфига. """
+    path = tmp_path / "config" / "games.json"
+
+    def write(**overrides) -> Path:
+        data = {"games_to_watch": [DUMMY_GAME], "fps_limit_active": 144, "fps_limit_inactive": 5,
+                "mangohud_per_app": True, "focus_loss_debounce_ms": 0}
+        data.update(overrides)
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return path
+
+    return write
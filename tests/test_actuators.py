@@ -0,0 +1,71 @@
+# --- PATH: GameFocusManager/tests/test_actuators.py ---
+
+import os
+import stat
+
+import pytest
+
+from src.actuators import MangoHudActuator, mangohud_app_config_name
+
+
+@pytest.fixture
+def mangohud_dir(tmp_path):
+    path = tmp_path / "MangoHud"
+    path.mkdir()
+    return path
+
+
+def test_writes_only_when_the_limit_changes(mangohud_dir):
+    actuator = MangoHudActuator(mangohud_dir / "MangoHud.conf")
+    assert actuator.apply(144)
+    assert not actuator.apply(144)
+    assert actuator.apply(5)
+    assert actuator.writes == 2
+    assert (mangohud_dir / "MangoHud.conf").read_text() == "fps_limit=5\n"
+
+
+def test_other_lines_and_mode_are_preserved(mangohud_dir):
+    config = mangohud_dir / "MangoHud.conf"
+    config.write_text("# мой конфиг\nfps_limit=60\ngpu_stats\nfps_limit=30\nposition=top-right\n")
+    os.chmod(config, 0o600)
+
+    assert MangoHudActuator(config).apply(144)
+    # Первая строка fps_limit заменена на месте, дубликат убран
+    assert config.read_text() == "# мой конфиг\nfps_limit=144\ngpu_stats\nposition=top-right\n"
+    assert stat.S_IMODE(config.stat().st_mode) == 0o600
+
+
+def test_external_edit_is_picked_up(mangohud_dir):
+    config = mangohud_dir / "MangoHud.conf"
+    actuator = MangoHudActuator(config)
+    actuator.apply(144)
+
+    # Пользователь добавил строку и сам поменял лимит
+    config.write_text("fps_limit=60\nhud_compact\n")
+    assert actuator.apply(60) is False
+    assert actuator.apply(5)
+    assert config.read_text() == "fps_limit=5\nhud_compact\n"
+    assert actuator.writes == 2
+
+
+def test_per_app_file_is_seeded_from_the_global_config(mangohud_dir):
+    global_config = mangohud_dir / "MangoHud.conf"
+    global_config.write_text("fps_limit=60\ncpu_temp\n")
+    actuator = MangoHudActuator(global_config)
+
+    assert actuator.apply(5, "witcher3.exe")
+    assert (mangohud_dir / "wine-witcher3.conf").read_text() == "cpu_temp\nfps_limit=5\n"
+    assert stat.S_IMODE((mangohud_dir / "wine-witcher3.conf").stat().st_mode) == 0o644
+    # Глобальный конфиг не тронут
+    assert global_config.read_text() == "fps_limit=60\ncpu_temp\n"
+
+    # Уже существующий per-app конфиг не пересоздаётся из глобального
+    global_config.write_text("fps_limit=60\ncpu_temp\nfull\n")
+    assert actuator.apply(144, "witcher3.exe")
+    assert (mangohud_dir / "wine-witcher3.conf").read_text() == "cpu_temp\nfps_limit=144\n"
+
+
+@pytest.mark.parametrize("game, name", [("dota2", "dota2.conf"), ("witcher3.exe", "wine-witcher3.conf"),
+                                        ("Cyberpunk2077.EXE", "wine-Cyberpunk2077.conf")])
+def test_app_config_name(game, name):
+    assert mangohud_app_config_name(game) == name
@@ -0,0 +1,104 @@
+# --- PATH: GameFocusManager/tests/test_affinity.py ---
+
+import os
+
+import pytest
+
+from src.affinity import AffinityActuator, detect_topology
+from src.demotion import Demotion, format_cpulist, parse_ioprio
+from src.procfs import ProcFS
+
+
+def make_sysfs(root, capacities: dict, atom: str = None):
+    """ Каталог, устроенный как /sys/devices/system/cpu (и cpu_atom на два уровня выше). """
+    cpu_root = root / "devices" / "system" / "cpu"
+    cpu_root.mkdir(parents=True)
+    (cpu_root / "online").write_text(format_cpulist(capacities) + "\n")
+    for cpu, capacity in capacities.items():
+        (cpu_root / f"cpu{cpu}").mkdir()
+        (cpu_root / f"cpu{cpu}" / "cpu_capacity").write_text(f"{capacity}\n")
+    if atom is not None:
+        (root / "devices" / "cpu_atom").mkdir()
+        (root / "devices" / "cpu_atom" / "cpus").write_text(atom + "\n")
+    return cpu_root
+
+
+def require_renice(actuator, pid: int):
+    if not actuator._can_renice(pid, 0):
+        pytest.skip("restoring nice needs CAP_SYS_NICE or RLIMIT_NICE")
+
+
+def test_topology_from_cpu_capacity(tmp_path):
+    cpu_root = make_sysfs(tmp_path, {0: 1024, 1: 1024, 2: 400, 3: 400})
+    topology = detect_topology(cpu_root)
+    assert topology.online == {0, 1, 2, 3}
+    assert topology.efficiency == {2, 3}
+    assert topology.hybrid
+
+
+def test_topology_prefers_cpu_atom(tmp_path):
+    cpu_root = make_sysfs(tmp_path, {0: 1024, 1: 1024, 2: 1024, 3: 1024}, atom="1-3")
+    assert detect_topology(cpu_root).efficiency == {1, 2, 3}
+
+
+def test_non_hybrid_cpu_has_no_efficiency_cores(tmp_path):
+    cpu_root = make_sysfs(tmp_path, {0: 1024, 1: 1024})
+    actuator = AffinityActuator(ProcFS(), cpu_root)
+    assert not actuator.topology.hybrid
+    assert actuator.cpus_for(Demotion(cpus="efficiency")) == frozenset()
+
+
+def test_demote_and_restore_priorities(spawn_dummy, tmp_path):
+    game = spawn_dummy()
+    actuator = AffinityActuator(ProcFS(), state_file=tmp_path / "demoted.json")
+    require_renice(actuator, game.pid)
+    original_ioprio = actuator._get_ioprio(game.pid)
+    if original_ioprio is None:
+        pytest.skip("ioprio_get is not available on this architecture")
+
+    changed = actuator.demote(game.pid, Demotion(nice=10, ioprio="idle"))
+    assert changed == ["ioprio", "nice"]
+    assert os.getpriority(os.PRIO_PROCESS, game.pid) == 10
+    assert actuator._get_ioprio(game.pid) == parse_ioprio("idle")
+    assert (tmp_path / "demoted.json").exists()
+
+    assert actuator.restore(game.pid)
+    assert os.getpriority(os.PRIO_PROCESS, game.pid) == 0
+    assert actuator._get_ioprio(game.pid) == original_ioprio
+    assert not (tmp_path / "demoted.json").exists()
+
+
+def test_demote_moves_affinity(spawn_dummy):
+    online = sorted(os.sched_getaffinity(0))
+    if len(online) < 2:
+        pytest.skip("needs at least two CPUs")
+    game = spawn_dummy()
+    actuator = AffinityActuator(ProcFS())
+
+    assert actuator.demote(game.pid, Demotion(cpus=str(online[-1]))) == ["affinity"]
+    assert os.sched_getaffinity(game.pid) == {online[-1]}
+    assert actuator.restore(game.pid)
+    assert os.sched_getaffinity(game.pid) == set(online)
+
+
+def test_recover_restores_after_crash(spawn_dummy, tmp_path):
+    game = spawn_dummy()
+    state_file = tmp_path / "demoted.json"
+    actuator = AffinityActuator(ProcFS(), state_file=state_file)
+    require_renice(actuator, game.pid)
+    assert actuator.demote(game.pid, Demotion(nice=7)) == ["nice"]
+
+    assert AffinityActuator(ProcFS(), state_file=state_file).recover() == 1
+    assert os.getpriority(os.PRIO_PROCESS, game.pid) == 0
+    assert not state_file.exists()
+
+
+def test_restore_skips_reused_pid(spawn_dummy):
+    game = spawn_dummy()
+    actuator = AffinityActuator(ProcFS())
+    require_renice(actuator, game.pid)
+    assert actuator.demote(game.pid, Demotion(nice=5)) == ["nice"]
+    # Процесс тот же, но запись указывает на другой (уже завершившийся) процесс с этим PID
+    actuator.demoted[game.pid]["starttime"] -= 1
+    assert actuator.restore(game.pid)
+    assert os.getpriority(os.PRIO_PROCESS, game.pid) == 5
@@ -0,0 +1,106 @@
+# --- PATH: GameFocusManager/tests/test_classifier.py ---
+
+import pytest
+
+from benchmarks.focus_replay import FakeProcTree
+from src.classifier import ProcessClassifier
+from src.config import GameMatcher
+from src.procfs import ProcFS
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProcTree(tmp_path / "proc")
+
+
+@pytest.fixture
+def classifier(proc):
+    return ProcessClassifier(ProcFS(str(proc.root)))
+
+
+MATCHER = GameMatcher(["dota2", "witcher3.exe"])
+
+
+def test_cache_hit_and_miss(proc, classifier):
+    proc.spawn(100, "dota2")
+    proc.spawn(200, "firefox")
+
+    assert classifier.classify(100, MATCHER, 1) == "dota2"
+    assert classifier.classify(200, MATCHER, 1) is None
+    assert (classifier.hits, classifier.misses) == (0, 2)
+    # Отрицательный ответ кэшируется так же, как положительный
+    assert classifier.classify(100, MATCHER, 1) == "dota2"
+    assert classifier.classify(200, MATCHER, 1) is None
+    assert (classifier.hits, classifier.misses) == (2, 2)
+    assert classifier.classify(None, MATCHER, 1) is None
+
+
+def test_new_generation_drops_the_cache(proc, classifier):
+    proc.spawn(100, "dota2")
+    assert classifier.classify(100, MATCHER, 1) == "dota2"
+
+    # После перезагрузки конфига dota2 больше не в списке
+    assert classifier.classify(100, GameMatcher(["cs2"]), 2) is None
+    assert classifier.misses == 2 and classifier.hits == 0
+
+
+def test_reused_pid_is_classified_again(proc, classifier):
+    proc.spawn(100, "dota2")
+    assert classifier.classify(100, MATCHER, 1) == "dota2"
+
+    proc.exit(100)
+    assert classifier.classify(100, MATCHER, 1) is None
+    # Тот же PID, другое время запуска - старый ответ не годится
+    proc.spawn(100, "firefox")
+    assert classifier.classify(100, MATCHER, 1) is None
+    assert classifier.hits == 0
+
+
+def test_helper_window_resolves_through_ancestors(proc, classifier):
+    proc.spawn(100, "dota2")
+    proc.spawn(101, "crashhandler", ppid=100)
+    proc.spawn(102, "cefhelper", ppid=101)
+
+    assert classifier.classify(102, MATCHER, 1) == "dota2"
+    assert ProcessClassifier(classifier.procfs, max_ancestors=1).classify(102, MATCHER, 1) is None
+
+
+def test_wrapper_window_resolves_through_descendants(proc, classifier):
+    # gamescope -> reaper -> wine64-preloader (witcher3.exe)
+    proc.spawn(100, "gamescope")
+    proc.spawn(101, "reaper", ppid=100)
+    proc.spawn(102, "witcher3.exe", exe="/usr/bin/wine64-preloader", ppid=101)
+
+    assert classifier.classify(100, MATCHER, 1) == "witcher3.exe"
+    assert ProcessClassifier(classifier.procfs, max_descendants=1).classify(100, MATCHER, 1) is None
+
+
+def test_descendants_of_non_wrappers_are_not_searched(proc, classifier):
+    # Окно самого Steam - не игра, хотя игра запущена под ним
+    proc.spawn(100, "steam")
+    proc.spawn(101, "dota2", ppid=100)
+    assert classifier.classify(100, MATCHER, 1) is None
+
+
+def test_prune_drops_dead_and_reused_processes(proc, classifier):
+    for pid in (100, 101, 102):
+        proc.spawn(pid, "dota2")
+        classifier.classify(pid, MATCHER, 1)
+
+    proc.exit(100)
+    proc.exit(101)
+    proc.spawn(101, "firefox")
+    classifier.prune()
+    assert set(classifier._cache) == {102}
+
+
+def test_full_cache_is_pruned_before_growing(proc):
+    classifier = ProcessClassifier(ProcFS(str(proc.root)), max_entries=2)
+    for pid in (100, 101):
+        proc.spawn(pid, "firefox")
+        classifier.classify(pid, MATCHER, 1)
+    proc.exit(100)
+
+    proc.spawn(102, "dota2")
+    assert classifier.classify(102, MATCHER, 1) == "dota2"
+    assert set(classifier._cache) == {101, 102}
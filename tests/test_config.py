@@ -0,0 +1,198 @@
+# --- PATH: GameFocusManager/tests/test_config.py ---
+
+import dataclasses
+import json
+
+import pytest
+
+from benchmarks.focus_replay import FakeProcTree
+from src.config import CONFIG_SCHEMA_VERSION, ConfigConflict, ConfigStore, GameConfig, GameMatcher, migrate_config
+from src.procfs import ProcFS
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProcTree(tmp_path / "proc")
+
+
+@pytest.fixture
+def procfs(proc):
+    return ProcFS(str(proc.root))
+
+
+def test_exact_matches_comm_exe_and_argv0(proc, procfs):
+    proc.spawn(100, "dota2", exe="/games/dota/dota2")
+    # Proton: comm - имя .exe, exe - загрузчик wine, argv[0] - путь Windows
+    proc.spawn(101, "witcher3.exe", exe="/usr/bin/wine64-preloader",
+               cmdline=["C:\\Games\\The Witcher 3\\bin\\witcher3.exe", "-dx12"])
+    # Имя видно только в argv[0]
+    proc.spawn(102, "GameThread", exe="/usr/bin/wine64-preloader", cmdline=["Z:\\games\\eldenring.exe"])
+    proc.spawn(103, "bash", cmdline=["bash", "-c", "dota2"])
+    matcher = GameMatcher(["dota2", "witcher3.exe", "eldenring.exe"])
+
+    assert matcher.match_process(procfs, 100) == "dota2"
+    assert matcher.match_process(procfs, 101) == "witcher3.exe"
+    assert matcher.match_process(procfs, 102) == "eldenring.exe"
+    # В отличие от substring, аргументы командной строки не считаются
+    assert matcher.match_process(procfs, 103) is None
+    assert matcher.match_process(procfs, 999) is None
+    assert matcher.match_process(procfs, None) is None
+
+
+def test_exact_is_case_insensitive_and_returns_the_listed_name(proc, procfs):
+    proc.spawn(100, "Cyberpunk2077.exe", exe="/usr/bin/wine64-preloader")
+    assert GameMatcher(["cyberpunk2077.EXE"]).match_process(procfs, 100) == "cyberpunk2077.EXE"
+
+
+def test_exact_matches_truncated_comm(proc, procfs):
+    # Ядро обрезает comm до 15 символов, exe и argv[0] ничего не дают
+    proc.spawn(100, "BaldursGate3_DX11.exe", exe="/usr/bin/wine64-preloader", cmdline=["wine64-preloader"])
+    assert procfs.comm(100) == "BaldursGate3_DX"
+    assert GameMatcher(["BaldursGate3_DX11.exe"]).match_process(procfs, 100) == "BaldursGate3_DX11.exe"
+
+
+def test_glob_mode(proc, procfs):
+    proc.spawn(100, "hl2_linux", exe="/games/hl2_linux")
+    proc.spawn(101, "Factorio", exe="/games/factorio/bin/x64/factorio")
+    matcher = GameMatcher(["hl2_*", "FACTORI?"], "glob")
+
+    assert matcher.match_process(procfs, 100) == "hl2_*"
+    assert matcher.match_process(procfs, 101) == "FACTORI?"
+    # Шаблон должен совпасть с именем целиком
+    assert GameMatcher(["hl2"], "glob").match_process(procfs, 100) is None
+
+
+def test_substring_mode_searches_the_command_line(proc, procfs):
+    proc.spawn(100, "reaper", exe="/steam/reaper", cmdline=["/steam/reaper", "SteamLaunch", "AppId=570", "--",
+                                                            "/games/dota 2 beta/game/bin/dota2"])
+    assert GameMatcher(["dota 2 beta"], "substring").match_process(procfs, 100) == "dota 2 beta"
+    # substring чувствителен к регистру, как grep в старом скрипте
+    assert GameMatcher(["DOTA 2 BETA"], "substring").match_process(procfs, 100) is None
+
+
+def test_empty_names_match_nothing(proc, procfs):
+    proc.spawn(100, "dota2")
+    matcher = GameMatcher(["", ""])
+    assert not matcher
+    assert matcher.match_process(procfs, 100) is None
+
+
+def test_unknown_match_mode():
+    with pytest.raises(ValueError):
+        GameMatcher(["dota2"], "regex")
+    with pytest.raises(ValueError, match="match_mode"):
+        GameConfig.from_dict({"games_to_watch": ["dota2"], "match_mode": "regex"})
+
+
+@pytest.mark.parametrize("mode", ["exact", "substring", "glob"])
+def test_match_mode_round_trip(mode):
+    config = GameConfig.from_dict({"games_to_watch": ["dota2"], "match_mode": mode})
+    assert config.compile_matcher().mode == mode
+    assert GameConfig.from_dict(config.to_dict()) == config
+    # Режим по умолчанию в файл не пишется
+    assert ("match_mode" in config.to_dict()) == (mode != "exact")
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    return tmp_path / "config" / "games.json"
+
+
+def read_json(path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_ensure_exists_migrates_the_bundled_config(tmp_path, config_file):
+    # Поставляемый games.json старого формата, без schema_version
+    bundled = tmp_path / "games.json"
+    bundled.write_text(json.dumps({"games_to_watch": ["dota2"], "fps_limit_active": 120}))
+    store = ConfigStore(config_file, bundled)
+
+    assert store.ensure_exists()
+    assert not store.ensure_exists()
+    data = read_json(config_file)
+    assert data["schema_version"] == CONFIG_SCHEMA_VERSION and data["generation"] == 1
+    assert data["games_to_watch"] == ["dota2"] and data["fps_limit_active"] == 120
+
+
+def test_migrate_config():
+    assert migrate_config({"games_to_watch": []}) == {"games_to_watch": [], "schema_version": CONFIG_SCHEMA_VERSION}
+    assert migrate_config({"schema_version": CONFIG_SCHEMA_VERSION})["schema_version"] == CONFIG_SCHEMA_VERSION
+    with pytest.raises(ValueError, match="newer version"):
+        migrate_config({"schema_version": CONFIG_SCHEMA_VERSION + 1})
+    with pytest.raises(ValueError):
+        migrate_config({"schema_version": "1"})
+
+
+def test_save_bumps_the_generation(config_file):
+    store = ConfigStore(config_file)
+    store.ensure_exists()
+    store.load()
+    revision = store.revision
+
+    config = dataclasses.replace(store.config, games_to_watch=["cs2"])
+    assert store.save(config) == 2
+    assert store.save(config) == 3
+    assert read_json(config_file)["generation"] == 3
+    assert store.config.games_to_watch == ["cs2"]
+    assert store.matcher.names == ["cs2"]
+    assert store.revision == revision + 2
+
+
+def test_stale_save_is_refused(config_file):
+    first, second = ConfigStore(config_file), ConfigStore(config_file)
+    first.ensure_exists()
+    first.load()
+    second.load()
+
+    first.save(dataclasses.replace(first.config, games_to_watch=["dota2"]))
+    with pytest.raises(ConfigConflict):
+        second.save(dataclasses.replace(second.config, games_to_watch=["cs2"]))
+    # Изменения первого не затёрты
+    assert read_json(config_file)["games_to_watch"] == ["dota2"]
+
+    # После перечитывания запись проходит; check=False - запись без проверки
+    assert second.reload_if_changed()
+    assert second.save(dataclasses.replace(second.config, games_to_watch=["cs2"])) == 3
+    assert first.save(dataclasses.replace(first.config, fps_limit_active=60), check=False) == 4
+
+
+def test_reload_if_changed(config_file):
+    writer, reader = ConfigStore(config_file), ConfigStore(config_file)
+    writer.ensure_exists()
+    assert reader.reload_if_changed()
+    assert not reader.reload_if_changed()
+
+    writer.save(dataclasses.replace(writer.config, games_to_watch=["dota2"]))
+    # Своя запись не вызывает перезагрузку, чужая - ровно одну
+    assert not writer.reload_if_changed()
+    assert reader.reload_if_changed()
+    assert not reader.reload_if_changed()
+    assert (reader.generation, reader.config.games_to_watch) == (2, ["dota2"])
+
+    # Правка вручную не меняет generation, но меняет revision
+    revision = reader.revision
+    data = read_json(config_file)
+    data["games_to_watch"].append("witcher3.exe")
+    config_file.write_text(json.dumps(data), encoding="utf-8")
+    assert reader.reload_if_changed()
+    assert reader.generation == 2 and reader.revision == revision + 1
+    assert reader.config.games_to_watch == ["dota2", "witcher3.exe"]
+
+
+def test_invalid_configs(config_file):
+    store = ConfigStore(config_file)
+    store.ensure_exists()
+    store.load()
+    generation = store.generation
+
+    # Неверное значение не попадает в файл
+    with pytest.raises(ValueError):
+        store.save(dataclasses.replace(store.config, fps_limit_inactive=0))
+    assert read_json(config_file)["generation"] == generation
+
+    config_file.write_text("{ broken", encoding="utf-8")
+    with pytest.raises(ValueError):
+        store.load()
+    # Битый файл заменяется, поколение продолжается
+    assert store.save(store.config, check=False) == generation + 1
@@ -0,0 +1,191 @@
+# --- PATH: GameFocusManager/tests/test_control.py ---
+
+import json
+import selectors
+import socket
+
+import pytest
+
+from src.control import MAX_PENDING_OUTPUT, ControlChannel, ControlServer, encode_message
+
+
+@pytest.fixture
+def pair():
+    """ (канал, второй конец) на socketpair с маленькими буферами, чтобы их было легко заполнить. """
+    ours, theirs = socket.socketpair()
+    for sock in (ours, theirs):
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    channel = ControlChannel(ours)
+    yield channel, theirs
+    channel.close()
+    theirs.close()
+
+
+def receive_all(sock) -> list:
+    """ Всё, что уже пришло в сокет, разобранное по строкам. """
+    sock.setblocking(False)
+    data = b""
+    while True:
+        try:
+            chunk = sock.recv(65536)
+        except BlockingIOError:
+            break
+        if not chunk:
+            break
+        data += chunk
+    return [json.loads(line) for line in data.splitlines()]
+
+
+def fill(channel):
+    """ Забивает буферы сокета, пока send не перестанет проходить сразу. """
+    padding = "x" * 1024
+    while channel.send({"padding": padding}):
+        pass
+
+
+def test_messages_are_split_by_lines(pair):
+    channel, peer = pair
+    peer.sendall(b'{"cmd": "status"}\n{"cmd": "pi')
+    assert channel.read_messages() == [{"cmd": "status"}]
+    # Битая строка пропускается, недописанная ждёт продолжения
+    peer.sendall(b'ng"}\nnot json\n')
+    assert channel.read_messages() == [{"cmd": "ping"}]
+    assert not channel.closed
+
+    peer.close()
+    assert channel.read_messages() == []
+    assert channel.closed
+
+
+def test_status_snapshots_are_coalesced(pair):
+    channel, peer = pair
+    fill(channel)
+    for i in range(100):
+        assert not channel.send({"event": "status", "seq": i}, coalesce=True)
+
+    # Клиент снова читает: из ста снимков до него доходит только последний
+    received = []
+    while channel.has_pending_output:
+        received += receive_all(peer)
+        channel.flush()
+    received += receive_all(peer)
+    statuses = [message for message in received if message.get("event") == "status"]
+    assert statuses == [{"event": "status", "seq": 99}]
+
+
+def test_reply_is_sent_after_the_pending_snapshot(pair):
+    channel, peer = pair
+    fill(channel)
+    channel.send({"event": "status", "seq": 1}, coalesce=True)
+    channel.send({"ok": True})
+
+    received = []
+    while channel.has_pending_output:
+        received += receive_all(peer)
+        channel.flush()
+    received += receive_all(peer)
+    assert [message for message in received if "padding" not in message] == [{"event": "status", "seq": 1},
+                                                                               {"ok": True}]
+
+
+def test_client_that_does_not_read_is_dropped(pair):
+    channel, peer = pair
+    message = {"padding": "x" * 4096}
+    sends = 0
+    while not channel.closed:
+        channel.send(message)
+        sends += 1
+    # Отключён, как только очередь превысила предел, а не копил ответы дальше
+    assert sends * len(encode_message(message)) > MAX_PENDING_OUTPUT
+    assert len(channel._outbuf) <= MAX_PENDING_OUTPUT + len(encode_message(message))
+    assert not channel.send({"ok": True})
+
+
+class Server:
+    """ ControlServer на сокете во временном каталоге и его цикл обработки событий. """
+
+    def __init__(self, path):
+        self.selector = selectors.DefaultSelector()
+        self.requests = []
+        self.server = ControlServer(self.selector, self.handle, path)
+
+    def handle(self, channel, request):
+        self.requests.append(request)
+        if request.get("cmd") == "subscribe":
+            channel.subscribed = True
+            return {"ok": True}
+        if request.get("cmd") == "fail":
+            raise ValueError("broken")
+        return {"ok": True, "echo": request.get("cmd")}
+
+    def pump(self, rounds: int = 5):
+        for _ in range(rounds):
+            for key, _ in self.selector.select(0.05):
+                key.data()
+
+    def close(self):
+        self.server.close()
+        self.selector.close()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return tmp_path / "control.sock"
+
+
+def connect(path) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(1.0)
+    sock.connect(str(path))
+    return sock
+
+
+def test_server_replies_and_publishes(socket_path):
+    server = Server(socket_path)
+    try:
+        client = connect(socket_path)
+        subscriber = connect(socket_path)
+        client.sendall(encode_message({"cmd": "ping"}) + encode_message({"cmd": "fail"}))
+        subscriber.sendall(encode_message({"cmd": "subscribe"}))
+        server.pump()
+
+        assert receive_all(client) == [{"ok": True, "echo": "ping"}, {"ok": False, "error": "broken"}]
+        assert receive_all(subscriber) == [{"ok": True}]
+
+        server.server.publish({"event": "status", "seq": 1}, coalesce=True)
+        server.pump()
+        # Статус получают только подписчики
+        assert receive_all(subscriber) == [{"event": "status", "seq": 1}]
+        assert receive_all(client) == []
+
+        client.close()
+        server.pump()
+        assert len(server.server.channels) == 1
+        subscriber.close()
+    finally:
+        server.close()
+    assert not socket_path.exists()
+
+
+def test_stale_socket_is_taken_over(socket_path):
+    # Сокет остался от воркера, который упал, не удалив его
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+    assert socket_path.exists()
+
+    server = Server(socket_path)
+    try:
+        client = connect(socket_path)
+        client.sendall(encode_message({"cmd": "ping"}))
+        server.pump()
+        assert receive_all(client) == [{"ok": True, "echo": "ping"}]
+        client.close()
+
+        # А живой сокет чужого воркера не трогаем
+        with pytest.raises(RuntimeError, match="already listening"):
+            Server(socket_path)
+        assert socket_path.exists()
+    finally:
+        server.close()
@@ -0,0 +1,112 @@
+# --- PATH: GameFocusManager/tests/test_eventlog.py ---
+
+import json
+
+import pytest
+
+from src import cli
+from src.eventlog import EventLogReader, EventLogWriter, rotated_files
+
+
+def write_records(path, timestamps, event_type="focus_changed", tail=""):
+    """ Файл журнала с записями на заданные моменты времени; tail - недописанный хвост. """
+    lines = [json.dumps({"ts": ts, "level": "EVENT", "type": event_type, "msg": f"at {ts}"}) + "\n"
+             for ts in timestamps]
+    path.write_text("".join(lines) + tail)
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    """ Три поколения по 500 записей: .2 - ts 0..499, .1 - 500..999, текущий - 1000..1499. """
+    path = tmp_path / "events.jsonl"
+    for i, file in enumerate(rotated_files(path, 2)):
+        write_records(file, range(i * 500, (i + 1) * 500))
+    return path
+
+
+def timestamps(records):
+    return [record["ts"] for record in records]
+
+
+def test_query_without_range_reads_all_generations(log_path):
+    assert timestamps(EventLogReader(log_path, 2).query()) == list(range(1500))
+
+
+@pytest.mark.parametrize("since, until", [(0, 10), (250, 260), (499, 501), (500, 500), (737, 1200),
+                                          (1490, None), (1200.5, 1203), (-5, 3)])
+def test_query_finds_the_range_across_rotated_files(log_path, since, until):
+    records = EventLogReader(log_path, 2).query(since=since, until=until)
+    expected = [ts for ts in range(1500) if ts >= since and (until is None or ts <= until)]
+    assert timestamps(records) == expected
+
+
+def test_query_outside_the_log_is_empty(log_path):
+    reader = EventLogReader(log_path, 2)
+    assert list(reader.query(since=1500)) == []
+    assert list(reader.query(until=-1)) == []
+
+
+def test_seek_since_uses_binary_search(log_path):
+    reader = EventLogReader(log_path, 2)
+    calls = []
+    record_at = reader._record_at
+
+    def counting_record_at(f, offset, size):
+        calls.append(offset)
+        return record_at(f, offset, size)
+
+    reader._record_at = counting_record_at
+    assert timestamps(reader.query(since=1498)) == [1498, 1499]
+    # Первая запись каждого файла и log2(размера) проб, а не 1500 строк подряд
+    assert len(calls) < 3 + 2 * 20
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    path = tmp_path / "events.jsonl"
+    # Воркер упал посреди записи строки
+    write_records(path, range(100), tail='{"ts": 100, "level": "EV')
+    reader = EventLogReader(path, 2)
+
+    assert timestamps(reader.query()) == list(range(100))
+    assert timestamps(reader.query(since=98)) == [98, 99]
+    assert list(reader.query(since=100)) == []
+    with open(path, "rb") as f:
+        assert reader._last_ts(f, path.stat().st_size) == 99
+
+
+def test_missing_and_empty_generations_are_skipped(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.with_name("events.jsonl.1").write_text("")
+    write_records(path, [10, 20])
+    assert timestamps(EventLogReader(path, 3).query(since=15)) == [20]
+
+
+def test_query_filters_by_type(tmp_path):
+    path = tmp_path / "events.jsonl"
+    writer = EventLogWriter(path)
+    writer.write("EVENT", "game_started", "Game dota2 started.", pid=42)
+    writer.write("ACTION", "limit_applied", "Set fps_limit=5")
+    writer.write("EVENT", "game_exited", "Game dota2 exited.", pid=42)
+    writer.close()
+
+    records = list(EventLogReader(path).query(types=["game_started", "game_exited"]))
+    assert [record["type"] for record in records] == ["game_started", "game_exited"]
+    assert records[0]["pid"] == 42
+
+
+def test_cli_log_command(tmp_path, capsys, monkeypatch):
+    path = tmp_path / "events.jsonl"
+    monkeypatch.setattr(cli.time, "time", lambda: 1000.0)
+    write_records(path, [100, 500, 950, 990])
+
+    assert cli.main(["log", "--log-file", str(path), "--since", "1m"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 and lines[0].startswith("[EVENT] ") and lines[0].endswith("at 950")
+
+    assert cli.main(["log", "--log-file", str(path), "--json", "--type", "other"]) == 0
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("text, seconds", [("90", 90), ("15m", 900), ("2h", 7200), ("1.5d", 129600)])
+def test_parse_duration(text, seconds):
+    assert cli.parse_duration(text) == seconds
@@ -0,0 +1,111 @@
+# --- PATH: GameFocusManager/tests/test_focus_latency.py ---
+
+import pytest
+
+from src.actuators import FakeActuator
+from src.focus import LocalFocusEmitter
+from src.lifecycle import ProcScanMonitor
+from src.procfs import ProcFS
+from src.worker import FocusWorker
+from tests.conftest import DUMMY_GAME
+
+
+class FakeClock:
+    """ Часы воркера, которые двигает тест. """
+
+    def __init__(self, now: float = 100.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def make_worker():
+    workers = []
+
+    def make(config_file, clock=None):
+        procfs = ProcFS()
+        worker = FocusWorker(config_file, focus_source=LocalFocusEmitter(), actuator=FakeActuator(),
+                             procfs=procfs, process_monitor=ProcScanMonitor(procfs),
+                             **({"clock": clock} if clock else {}))
+        worker.start()
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.shutdown()
+
+
+def test_focus_gain_applies_active_limit_immediately(spawn_dummy, write_config, make_worker):
+    game = spawn_dummy()
+    worker = make_worker(write_config())
+    assert worker.focus_tracking
+    # Игра запущена, но не в фокусе - фоновый лимит в её per-app конфиг
+    assert worker.actuator.applied[-1] == (5, DUMMY_GAME)
+
+    worker.focus_source.emit(game.pid)
+    worker.run_once(timeout=1.0)
+
+    assert worker.actuator.applied[-1] == (144, DUMMY_GAME)
+    assert worker.decision_latency.count == 1
+    # Событие обрабатывается сразу по пробуждению, без опроса
+    assert worker.last_decision_latency < 0.25
+
+
+def test_focus_loss_is_applied_after_debounce(spawn_dummy, write_config, make_worker):
+    game = spawn_dummy()
+    clock = FakeClock()
+    worker = make_worker(write_config(focus_loss_debounce_ms=750), clock)
+    worker.focus_source.emit(game.pid, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    assert worker.actuator.applied[-1] == (144, DUMMY_GAME)
+
+    worker.focus_source.emit(None, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    # Потеря фокуса ещё не подтверждена
+    assert worker.actuator.applied[-1] == (144, DUMMY_GAME)
+
+    clock.now += 0.8
+    worker.run_once(timeout=0)
+    assert worker.actuator.applied[-1] == (5, DUMMY_GAME)
+    assert worker.last_decision_latency == pytest.approx(0.8)
+
+
+def test_alt_tab_back_within_debounce_changes_nothing(spawn_dummy, write_config, make_worker):
+    game = spawn_dummy()
+    clock = FakeClock()
+    worker = make_worker(write_config(focus_loss_debounce_ms=750), clock)
+    worker.focus_source.emit(game.pid, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    applied = len(worker.actuator.applied)
+
+    worker.focus_source.emit(None, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    clock.now += 0.3
+    worker.focus_source.emit(game.pid, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    clock.now += 1.0
+    worker.run_once(timeout=0)
+
+    assert len(worker.actuator.applied) == applied
+    assert worker.scheduler.suppressed >= 1
+
+
+def test_ignored_window_class_is_not_a_focus_loss(spawn_dummy, write_config, make_worker):
+    game = spawn_dummy()
+    clock = FakeClock()
+    worker = make_worker(write_config(focus_loss_debounce_ms=750), clock)
+    worker.focus_source.emit(game.pid, timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    applied = len(worker.actuator.applied)
+
+    # Переключатель задач KWin забрал фокус
+    worker.focus_source.emit(None, "kwin_wayland", timestamp=clock.now)
+    worker.run_once(timeout=1.0)
+    clock.now += 1.0
+    worker.run_once(timeout=0)
+
+    assert len(worker.actuator.applied) == applied
+    assert worker.scheduler.deadline is None
@@ -0,0 +1,106 @@
+# --- PATH: GameFocusManager/tests/test_freezer.py ---
+
+import json
+
+import pytest
+
+from src.actuators import FakeActuator
+from src.focus import LocalFocusEmitter
+from src.freezer import ProcessFreezer
+from src.lifecycle import ProcScanMonitor
+from src.procfs import ProcFS
+from src.worker import FocusWorker
+from tests.conftest import DUMMY_GAME, wait_for_state
+
+
+class ScopedProcFS(ProcFS):
+    """ Настоящий /proc, но каждый процесс числится в cgroup /game.scope. """
+
+    def cgroup(self, pid: int):
+        return "/game.scope" if self.stat(pid) is not None else None
+
+
+@pytest.fixture
+def cgroup_root(tmp_path):
+    root = tmp_path / "cgroup"
+    (root / "game.scope").mkdir(parents=True)
+    (root / "game.scope" / "cgroup.freeze").write_text("0")
+    return root
+
+
+def set_members(cgroup_root, *pids):
+    (cgroup_root / "game.scope" / "cgroup.procs").write_text("".join(f"{pid}\n" for pid in pids))
+
+
+def test_cgroup_freeze_and_thaw(spawn_dummy, cgroup_root, tmp_path):
+    game = spawn_dummy()
+    set_members(cgroup_root, game.pid)
+    procfs = ScopedProcFS()
+    freezer = ProcessFreezer(procfs, cgroup_root, state_file=tmp_path / "frozen.json")
+
+    assert freezer.freeze(game.pid) == "cgroup"
+    assert (cgroup_root / "game.scope" / "cgroup.freeze").read_text() == "1"
+    # Через cgroup - сигналы процессу не посылаются
+    assert wait_for_state(procfs, game.pid, "T", timeout=0.1) != "T"
+    assert str(game.pid) in json.loads((tmp_path / "frozen.json").read_text())
+
+    assert freezer.thaw(game.pid)
+    assert (cgroup_root / "game.scope" / "cgroup.freeze").read_text() == "0"
+    assert not (tmp_path / "frozen.json").exists()
+    assert not freezer.thaw(game.pid)
+
+
+def test_shared_cgroup_falls_back_to_signals(spawn_dummy, cgroup_root):
+    game = spawn_dummy()
+    other = spawn_dummy("steam")
+    # В cgroup игры есть чужой процесс - замораживать его нельзя
+    set_members(cgroup_root, game.pid, other.pid)
+    procfs = ScopedProcFS()
+    freezer = ProcessFreezer(procfs, cgroup_root)
+
+    assert freezer.freeze(game.pid) == "signal"
+    assert (cgroup_root / "game.scope" / "cgroup.freeze").read_text() == "0"
+    assert wait_for_state(procfs, game.pid, "T") == "T"
+    assert wait_for_state(procfs, other.pid, "S") == "S"
+
+    assert freezer.thaw(game.pid)
+    assert wait_for_state(procfs, game.pid, "S") == "S"
+
+
+def test_recover_thaws_after_crash(spawn_dummy, tmp_path):
+    game = spawn_dummy()
+    procfs = ProcFS()
+    state_file = tmp_path / "frozen.json"
+    assert ProcessFreezer(procfs, method="signal", state_file=state_file).freeze(game.pid) == "signal"
+    assert wait_for_state(procfs, game.pid, "T") == "T"
+
+    # Новый воркер после аварии прежнего
+    assert ProcessFreezer(procfs, method="signal", state_file=state_file).recover() == 1
+    assert wait_for_state(procfs, game.pid, "S") == "S"
+    assert not state_file.exists()
+
+
+def test_unwatched_game_is_thawed_on_config_reload(spawn_dummy, write_config):
+    game = spawn_dummy()
+    config_file = write_config(freeze_method="signal", background_tiers=[{"after": 0, "freeze": True}])
+    procfs = ProcFS()
+    worker = FocusWorker(config_file, focus_source=LocalFocusEmitter(), actuator=FakeActuator(), procfs=procfs,
+                         freezer=ProcessFreezer(procfs, method="signal"), process_monitor=ProcScanMonitor(procfs))
+    worker.start()
+    try:
+        # Не в фокусе, ступень заморозки сразу
+        assert worker.freezer.is_frozen(game.pid)
+        assert wait_for_state(procfs, game.pid, "T") == "T"
+
+        write_config(games_to_watch=["other"], freeze_method="signal")
+        assert worker.load_config(force=True)
+        applied = len(worker.actuator.applied)
+        worker.on_config_reloaded()
+
+        assert len(worker.games) == 0
+        assert not worker.freezer.is_frozen(game.pid)
+        assert wait_for_state(procfs, game.pid, "S") == "S"
+        # Per-app конфиг игры вернулся к активному лимиту
+        assert (144, DUMMY_GAME) in worker.actuator.applied[applied:]
+    finally:
+        worker.shutdown()
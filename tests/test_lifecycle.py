@@ -0,0 +1,85 @@
+# --- PATH: GameFocusManager/tests/test_lifecycle.py ---
+
+import pytest
+
+from benchmarks.focus_replay import FakeProcTree
+from src.actuators import FakeActuator
+from src.focus import LocalFocusEmitter
+from src.lifecycle import ProcessEvent, ProcScanMonitor
+from src.procfs import ProcFS
+from src.worker import FocusWorker
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProcTree(tmp_path / "proc")
+
+
+@pytest.fixture
+def procfs(proc):
+    return ProcFS(str(proc.root))
+
+
+def kinds(events) -> set:
+    return {(event.kind, event.pid) for event in events}
+
+
+def test_scan_reports_exec_and_exit(proc, procfs):
+    proc.spawn(1, "systemd")
+    proc.spawn(100, "steam")
+    monitor = ProcScanMonitor(procfs, interval=2.0)
+    monitor.open()
+    assert monitor.scan() == []
+
+    proc.spawn(200, "dota2", ppid=100)
+    proc.exit(100)
+    assert kinds(monitor.scan()) == {("exec", 200), ("exit", 100)}
+    # Новый процесс сообщается ещё раз: Wine меняет имя уже после запуска
+    assert kinds(monitor.scan()) == {("comm", 200)}
+    assert monitor.scan() == []
+
+
+def test_pid_reuse_across_scans(proc, procfs):
+    proc.spawn(100, "dota2")
+    monitor = ProcScanMonitor(procfs)
+    monitor.open()
+
+    proc.exit(100)
+    assert kinds(monitor.scan()) == {("exit", 100)}
+    proc.spawn(100, "firefox")
+    assert kinds(monitor.scan()) == {("exec", 100)}
+
+
+def test_pid_reused_between_scans_is_invisible_to_the_diff(proc, procfs):
+    proc.spawn(100, "dota2")
+    monitor = ProcScanMonitor(procfs)
+    monitor.open()
+
+    proc.exit(100)
+    proc.spawn(100, "firefox")
+    # Множество PID то же самое - это проверяет воркер (см. следующий тест)
+    assert monitor.scan() == []
+
+
+def test_unreadable_proc_requests_a_resync(tmp_path):
+    monitor = ProcScanMonitor(ProcFS(str(tmp_path / "missing")))
+    assert monitor.scan() == [ProcessEvent("resync", 0)]
+
+
+def test_worker_notices_a_game_pid_reused_between_scans(proc, procfs, write_config):
+    proc.spawn(100, "dota2")
+    worker = FocusWorker(write_config(games_to_watch=["dota2"], mangohud_per_app=False),
+                         focus_source=LocalFocusEmitter(), actuator=FakeActuator(), procfs=procfs,
+                         process_monitor=ProcScanMonitor(procfs))
+    worker.start()
+    try:
+        assert [instance.pid for instance in worker.games] == [100]
+
+        proc.exit(100)
+        proc.spawn(100, "firefox")
+        worker._on_scan_timer()
+        assert len(worker.games) == 0
+        assert not worker.focus_tracking
+        assert worker.actuator.applied[-1] == (144, None)
+    finally:
+        worker.shutdown()
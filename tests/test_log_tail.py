@@ -0,0 +1,80 @@
+# --- PATH: GameFocusManager/tests/test_log_tail.py ---
+
+import os
+
+import pytest
+
+from src.log_tail import LogTailer
+
+
+@pytest.fixture
+def log(tmp_path):
+    return tmp_path / "events.jsonl"
+
+
+def append(path, text: str):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_reads_only_appended_lines(log):
+    append(log, "one\ntwo\n")
+    tailer = LogTailer(log)
+    assert tailer.read_new_lines() == (["one", "two"], False)
+    assert tailer.read_new_lines() == ([], False)
+
+    append(log, "three\n")
+    assert tailer.read_new_lines() == (["three"], False)
+    assert tailer.offset == log.stat().st_size
+
+
+def test_partial_line_waits_for_its_end(log):
+    append(log, "one\ntw")
+    tailer = LogTailer(log)
+    assert tailer.read_new_lines() == (["one"], False)
+    append(log, "o\nthr")
+    assert tailer.read_new_lines() == (["two"], False)
+    append(log, "ee\n")
+    assert tailer.read_new_lines() == (["three"], False)
+
+
+def test_truncation_starts_over(log):
+    append(log, "one\ntwo\n")
+    tailer = LogTailer(log)
+    tailer.read_new_lines()
+
+    log.write_text("new\n")
+    assert tailer.read_new_lines() == (["new"], True)
+    assert tailer.read_new_lines() == ([], False)
+
+
+def test_rotation_is_detected_by_inode(log):
+    append(log, "old 1\nold 2\n")
+    tailer = LogTailer(log)
+    tailer.read_new_lines()
+
+    # Новый файл того же размера: по размеру ротацию не заметить
+    os.replace(log, log.with_name("events.jsonl.1"))
+    append(log, "new 1\nnew 2\n")
+    assert tailer.read_new_lines() == (["new 1", "new 2"], True)
+
+
+def test_first_read_takes_only_the_tail(log):
+    append(log, "".join(f"line {i}\n" for i in range(1000)))
+    tailer = LogTailer(log, initial_bytes=20)
+    lines, restarted = tailer.read_new_lines()
+    # Обрезанная первая строка отброшена
+    assert lines == ["line 998", "line 999"]
+    assert not restarted
+
+
+def test_missing_file(log):
+    tailer = LogTailer(log)
+    assert tailer.read_new_lines() == (None, False)
+
+    append(log, "one\n")
+    assert tailer.read_new_lines() == (["one"], False)
+    log.unlink()
+    # Файл пропал после того, как мы его читали
+    assert tailer.read_new_lines() == (None, True)
+    assert tailer.offset == 0 and tailer.inode is None
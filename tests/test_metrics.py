@@ -0,0 +1,75 @@
+# --- PATH: GameFocusManager/tests/test_metrics.py ---
+
+import pytest
+
+from src.metrics import Histogram, render_prometheus
+
+
+def test_observe_uses_inclusive_upper_bounds():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.1, 5.0):
+        histogram.observe(value)
+    # le="0.01" включает саму границу, как в Prometheus; последняя корзина - +Inf
+    assert histogram.counts == [2, 2, 0, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(5.165)
+
+
+def test_quantile():
+    histogram = Histogram((0.01, 0.1, 1.0))
+    assert histogram.quantile(0.5) is None
+
+    for _ in range(90):
+        histogram.observe(0.005)
+    for _ in range(9):
+        histogram.observe(0.05)
+    histogram.observe(3.0)
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.9) == 0.01
+    assert histogram.quantile(0.99) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+
+
+def test_dict_round_trip():
+    histogram = Histogram()
+    for value in (0.0003, 0.002, 0.2, 0.7, 30.0):
+        histogram.observe(value)
+    restored = Histogram.from_dict(histogram.to_dict())
+    assert restored.buckets == histogram.buckets
+    assert restored.counts == histogram.counts
+    assert restored.count == histogram.count
+    assert restored.sum == pytest.approx(histogram.sum)
+    assert restored.quantile(0.5) == histogram.quantile(0.5)
+
+
+def test_from_dict_ignores_mismatched_counts():
+    restored = Histogram.from_dict({"buckets": [0.1, 1.0], "counts": [1, 2], "sum": 0.5})
+    # Счётчиков должно быть на один больше границ (+Inf)
+    assert restored.counts == [0, 0, 0]
+    assert restored.count == 0
+
+
+def test_render_prometheus():
+    histogram = Histogram((0.01, 0.1))
+    histogram.observe(0.005)
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    text = render_prometheus({"focus_events": 12, "running_games": 1, "unknown": 5, "config_generation": None},
+                             {"decision_latency": histogram})
+
+    assert text.endswith("\n")
+    assert text.splitlines() == [
+        "# HELP gamefocus_focus_events_total Focus notifications received from the focus source.",
+        "# TYPE gamefocus_focus_events_total counter",
+        "gamefocus_focus_events_total 12",
+        "# HELP gamefocus_running_games Watched games currently running.",
+        "# TYPE gamefocus_running_games gauge",
+        "gamefocus_running_games 1",
+        "# HELP gamefocus_decision_latency_seconds Time from a focus event to the FPS limit being applied.",
+        "# TYPE gamefocus_decision_latency_seconds histogram",
+        'gamefocus_decision_latency_seconds_bucket{le="0.01"} 1',
+        'gamefocus_decision_latency_seconds_bucket{le="0.1"} 2',
+        'gamefocus_decision_latency_seconds_bucket{le="+Inf"} 3',
+        "gamefocus_decision_latency_seconds_sum 0.555",
+        "gamefocus_decision_latency_seconds_count 3",
+    ]
@@ -0,0 +1,109 @@
+# --- PATH: GameFocusManager/tests/test_scheduler.py ---
+
+import pytest
+
+from benchmarks.focus_replay import VirtualClock
+from src.scheduler import TransitionScheduler
+
+GAME = object()
+OTHER_GAME = object()
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def scheduler():
+    return TransitionScheduler(lose_focus_delay=0.75)
+
+
+def test_focus_gain_is_immediate(clock, scheduler):
+    assert scheduler.submit(GAME, clock())
+    assert scheduler.committed is GAME
+    # Повтор того же владельца ничего не меняет
+    assert not scheduler.submit(GAME, clock())
+    assert scheduler.suppressed == 0
+
+
+def test_focus_loss_waits_for_the_deadline(clock, scheduler):
+    scheduler.submit(GAME, clock())
+    clock.now = 10.0
+    assert not scheduler.submit(None, clock(), event_time=9.9)
+    assert scheduler.deadline == pytest.approx(10.75)
+
+    clock.now = 10.5
+    assert scheduler.fire(clock()) is None
+    assert scheduler.committed is GAME
+    clock.now = 10.75
+    # Возвращается время исходного события - для задержки решения
+    assert scheduler.fire(clock()) == 9.9
+    assert scheduler.committed is None and scheduler.deadline is None
+
+
+def test_repeated_loss_events_extend_the_debounce(clock, scheduler):
+    scheduler.submit(GAME, clock())
+    scheduler.submit(None, clock())
+    clock.now = 0.5
+    scheduler.submit(None, clock())
+    assert scheduler.deadline == pytest.approx(1.25)
+
+    clock.now = 1.0
+    assert scheduler.fire(clock()) is None
+    clock.now = 1.25
+    # Время события - первое, а не последнее
+    assert scheduler.fire(clock()) == 0.0
+
+
+def test_regaining_focus_cancels_the_pending_loss(clock, scheduler):
+    scheduler.submit(GAME, clock())
+    scheduler.submit(None, clock())
+    clock.now = 0.3
+    assert not scheduler.submit(GAME, clock())
+    assert scheduler.deadline is None
+    assert scheduler.suppressed == 1
+
+    clock.now = 5.0
+    assert scheduler.fire(clock()) is None
+    assert scheduler.committed is GAME
+
+
+def test_switching_to_another_game_is_immediate(clock, scheduler):
+    scheduler.submit(GAME, clock())
+    scheduler.submit(None, clock())
+    clock.now = 0.2
+    assert scheduler.submit(OTHER_GAME, clock())
+    assert scheduler.committed is OTHER_GAME
+    # Отложенная потеря фокуса поглощена переходом к другой игре
+    assert scheduler.suppressed == 1
+    assert scheduler.fire(10.0) is None
+
+
+def test_zero_delay_commits_loss_immediately(clock):
+    scheduler = TransitionScheduler(lose_focus_delay=0)
+    scheduler.submit(GAME, clock())
+    assert scheduler.submit(None, clock())
+    assert scheduler.committed is None
+
+
+def test_ignored_window_classes(scheduler):
+    assert scheduler.is_ignored("plasmashell")
+    assert scheduler.is_ignored("KRunner")
+    assert not scheduler.is_ignored("firefox")
+    assert not scheduler.is_ignored("")
+    assert not scheduler.is_ignored(None)
+
+    scheduler.configure(-1.0, ["Steam", ""])
+    assert scheduler.lose_focus_delay == 0.0
+    assert scheduler.is_ignored("steam")
+    assert not scheduler.is_ignored("plasmashell")
+
+
+def test_reset_drops_the_pending_loss(clock, scheduler):
+    scheduler.submit(GAME, clock())
+    scheduler.submit(None, clock())
+    # Игра завершилась: цель задаётся принудительно, без подсчёта подавленных
+    scheduler.reset(None)
+    assert scheduler.deadline is None and scheduler.committed is None
+    assert scheduler.suppressed == 0
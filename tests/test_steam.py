@@ -0,0 +1,129 @@
+# --- PATH: GameFocusManager/tests/test_steam.py ---
+
+import os
+
+import pytest
+
+from src.steam import SteamLibraryIndex, find_executables, parse_vdf
+
+
+def test_parse_vdf_tokens_and_nesting():
+    text = '''
+    "AppState"
+    {
+        "appid"     "570"
+        InstallDir  dota_2_beta
+        "UserConfig" { "language" "russian" }
+    }
+    '''
+    # Ключи в нижнем регистре, значения как есть; токены без кавычек тоже допустимы
+    assert parse_vdf(text) == {"appstate": {"appid": "570", "installdir": "dota_2_beta",
+                                            "userconfig": {"language": "russian"}}}
+
+
+def test_parse_vdf_escapes_comments_and_conditionals():
+    text = r'''
+    // libraryfolders.vdf
+    "libraryfolders"
+    {
+        "0"  { "path" "D:\\SteamLibrary" }  // комментарий до конца строки
+        "label"  "say \"hi\"\tnow\n"
+        "launch"  "game.exe"  [$WIN32]
+        "text"  "{ not a block } // not a comment"
+    }
+    '''
+    assert parse_vdf(text) == {"libraryfolders": {
+        "0": {"path": "D:\\SteamLibrary"},
+        "label": 'say "hi"\tnow\n',
+        "launch": "game.exe",
+        "text": "{ not a block } // not a comment",
+    }}
+
+
+@pytest.mark.parametrize("text", ['{ "a" "b" }', '"a" "b" }', '"a" { "b" "c"', '"a"', '"a" "unterminated',
+                                  '"a" { "b" } }'])
+def test_parse_vdf_rejects_malformed_input(text):
+    with pytest.raises(ValueError):
+        parse_vdf(text)
+
+
+def make_executable(path, size: int):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x7fELF" + b"\0" * size)
+    os.chmod(path, 0o755)
+
+
+def write_manifest(library, appid: int, name: str, installdir: str):
+    (library / "steamapps").mkdir(parents=True, exist_ok=True)
+    (library / "steamapps" / f"appmanifest_{appid}.acf").write_text(
+        f'"AppState"\n{{\n\t"appid"\t"{appid}"\n\t"name"\t"{name}"\n\t"installdir"\t"{installdir}"\n}}\n')
+
+
+@pytest.fixture
+def steam(tmp_path):
+    """ Steam с двумя библиотеками: в основной Dota 2, во второй Witcher 3 под Proton и сам Proton. """
+    root, library = tmp_path / "Steam", tmp_path / "Library"
+    write_manifest(root, 570, "Dota 2", "dota 2 beta")
+    make_executable(root / "steamapps" / "common" / "dota 2 beta" / "game" / "bin" / "linuxsteamrt64" / "dota2",
+                    4096)
+    make_executable(root / "steamapps" / "common" / "dota 2 beta" / "game" / "dota.sh", 16)
+
+    write_manifest(library, 292030, "The Witcher 3", "The Witcher 3")
+    witcher = library / "steamapps" / "common" / "The Witcher 3"
+    (witcher / "bin" / "x64").mkdir(parents=True)
+    (witcher / "bin" / "x64" / "witcher3.exe").write_bytes(b"MZ" + b"\0" * 8192)
+    (witcher / "REDprelauncher.exe").write_bytes(b"MZ" + b"\0" * 1024)
+    (witcher / "_CommonRedist").mkdir()
+    (witcher / "_CommonRedist" / "vc_redist.x64.exe").write_bytes(b"MZ" + b"\0" * 65536)
+    write_manifest(library, 1493710, "Proton Experimental", "Proton - Experimental")
+
+    (root / "steamapps" / "libraryfolders.vdf").write_text(
+        f'"libraryfolders"\n{{\n\t"0"\t{{ "path" "{root}" }}\n\t"1"\t{{ "path" "{library}" }}\n}}\n')
+    return root, library
+
+
+def test_find_executables_prefers_the_largest_game_binary(steam):
+    _, library = steam
+    assert find_executables(library / "steamapps" / "common" / "The Witcher 3") == [("witcher3.exe", 8194),
+                                                                                   ("REDprelauncher.exe", 1026)]
+
+
+def test_scan_finds_games_in_all_libraries(steam, tmp_path):
+    root, _ = steam
+    index = SteamLibraryIndex(tmp_path / "index.json", steam_roots=[root])
+    games = index.scan()
+
+    # Proton - не игра
+    assert [(game.appid, game.name) for game in games] == [(570, "Dota 2"), (292030, "The Witcher 3")]
+    assert games[0].executables[0][0] == "dota2"
+    assert index.last_scan == {"reused": 0, "parsed": 3, "removed": 0}
+    assert (tmp_path / "index.json").exists()
+
+
+def test_rescan_reuses_unchanged_manifests(steam, tmp_path):
+    root, library = steam
+    SteamLibraryIndex(tmp_path / "index.json", steam_roots=[root]).scan()
+
+    # Новый экземпляр читает индекс с диска: ни один манифест не разбирается заново
+    index = SteamLibraryIndex(tmp_path / "index.json", steam_roots=[root])
+    mtime = (tmp_path / "index.json").stat().st_mtime_ns
+    assert len(index.scan()) == 2
+    assert index.last_scan == {"reused": 3, "parsed": 0, "removed": 0}
+    # Ничего не изменилось - индекс не перезаписывается
+    assert (tmp_path / "index.json").stat().st_mtime_ns == mtime
+
+    # Steam обновил игру (манифест переписан) и удалил другую
+    manifest = root / "steamapps" / "appmanifest_570.acf"
+    manifest.write_text(manifest.read_text().replace('"Dota 2"', '"Dota 2 Reborn"'))
+    (library / "steamapps" / "appmanifest_292030.acf").unlink()
+    games = index.scan()
+    assert [game.name for game in games] == ["Dota 2 Reborn"]
+    assert index.last_scan == {"reused": 1, "parsed": 1, "removed": 1}
+
+
+def test_corrupt_index_is_ignored(steam, tmp_path):
+    root, _ = steam
+    (tmp_path / "index.json").write_text("{ not json")
+    index = SteamLibraryIndex(tmp_path / "index.json", steam_roots=[root])
+    assert index.games == {}
+    assert len(index.scan()) == 2
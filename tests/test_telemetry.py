@@ -0,0 +1,127 @@
+# --- PATH: GameFocusManager/tests/test_telemetry.py ---
+
+import pytest
+
+from src.game_state import GameInstance
+from src.telemetry import (EnergyCounter, HwmonPowerSource, RaplPowerSource, SampleRing, TelemetrySampler,
+                           TelemetryUnavailable)
+
+
+class FakeCpuSource:
+    """ CPU-время процессов (секунды), которое задаёт тест. """
+
+    def __init__(self):
+        self.seconds = {}
+
+    def read(self, pid: int):
+        return self.seconds[pid]
+
+
+@pytest.fixture
+def hwmon_root(tmp_path):
+    """ Как /sys/class/hwmon: GPU amdgpu с power1_average и посторонний датчик. """
+    root = tmp_path / "hwmon"
+    (root / "hwmon0").mkdir(parents=True)
+    (root / "hwmon0" / "name").write_text("amdgpu\n")
+    (root / "hwmon1").mkdir()
+    (root / "hwmon1" / "name").write_text("k10temp\n")
+    (root / "hwmon1" / "power1_input").write_text("999000000\n")
+    return root
+
+
+@pytest.fixture
+def powercap_root(tmp_path):
+    """ Как /sys/class/powercap: пакет intel-rapl:0 и вложенный домен, который не считается. """
+    root = tmp_path / "powercap"
+    for zone in ("intel-rapl:0", "intel-rapl:0:0"):
+        (root / zone).mkdir(parents=True)
+        (root / zone / "energy_uj").write_text("0\n")
+        (root / zone / "max_energy_range_uj").write_text("262143328850\n")
+    return root
+
+
+def set_gpu_watts(hwmon_root, watts: float):
+    (hwmon_root / "hwmon0" / "power1_average").write_text(f"{int(watts * 1e6)}\n")
+
+
+def set_cpu_energy(powercap_root, microjoules: int):
+    (powercap_root / "intel-rapl:0" / "energy_uj").write_text(f"{microjoules}\n")
+
+
+def test_energy_counter_handles_wraparound(tmp_path):
+    path = tmp_path / "energy_uj"
+    counter = EnergyCounter(path, wrap=1000_000_000)
+    path.write_text("990000000")
+    assert counter.read(0.0) is None
+    path.write_text("10000000")
+    # 10 Дж до переполнения и 10 после за 2 секунды
+    assert counter.read(2.0) == pytest.approx(10.0)
+
+
+def test_unavailable_sources_are_dropped(tmp_path, hwmon_root):
+    set_gpu_watts(hwmon_root, 40)
+    sampler = TelemetrySampler([HwmonPowerSource(hwmon_root), RaplPowerSource(tmp_path / "missing")],
+                               FakeCpuSource())
+    messages = []
+    sampler.open(lambda tag, message: messages.append(message))
+    assert sampler.source_names == ["hwmon:hwmon0", "procstat"]
+    assert len(messages) == 1 and "rapl" in messages[0]
+
+    with pytest.raises(TelemetryUnavailable):
+        HwmonPowerSource(tmp_path / "missing").open()
+
+
+def test_summary_splits_focused_and_background(hwmon_root, powercap_root):
+    set_gpu_watts(hwmon_root, 50)
+    cpu = FakeCpuSource()
+    sampler = TelemetrySampler([HwmonPowerSource(hwmon_root), RaplPowerSource(powercap_root)], cpu)
+    sampler.open()
+    game = GameInstance(1234, "dota2", starttime=1, app="dota2", focused=True)
+
+    cpu.seconds[1234] = 0.0
+    sampler.sample(0.0, [game])
+    # 5 с в фокусе: GPU 50 Вт, ЦП 100 Дж = 20 Вт, 4 с процессорного времени
+    set_cpu_energy(powercap_root, 100_000_000)
+    cpu.seconds[1234] = 4.0
+    game.focused = False
+    assert sampler.state_changed([game])
+    sampler.sample(5.0, [game])
+    assert not sampler.state_changed([game])
+
+    # 5 с в фоне: GPU 10 Вт, ЦП 25 Дж = 5 Вт, 0.5 с процессорного времени
+    set_gpu_watts(hwmon_root, 10)
+    set_cpu_energy(powercap_root, 125_000_000)
+    cpu.seconds[1234] = 4.5
+    sampler.sample(10.0, [game])
+
+    (summary,) = sampler.summary()
+    assert summary["game"] == "dota2"
+    assert summary["focused"] == {"seconds": 5.0, "watts": 70.0, "cpu_percent": 80.0, "cpu_seconds": 4.0}
+    assert summary["unfocused"] == {"seconds": 5.0, "watts": 15.0, "cpu_percent": 10.0, "cpu_seconds": 0.5}
+    assert summary["saved_watts"] == 55.0
+    assert sampler.snapshot()["samples"] == 2
+
+
+def test_stop_starts_a_new_interval(hwmon_root):
+    set_gpu_watts(hwmon_root, 30)
+    cpu = FakeCpuSource()
+    sampler = TelemetrySampler([HwmonPowerSource(hwmon_root)], cpu)
+    sampler.open()
+    game = GameInstance(1, "cs2", starttime=1, app="cs2")
+    cpu.seconds[1] = 0.0
+
+    sampler.sample(0.0, [game])
+    sampler.stop(5.0, [game])
+    # Пауза (игр не было) не попадает ни в один интервал
+    sampler.sample(100.0, [game])
+    sampler.sample(105.0, [game])
+    assert len(sampler.ring) == 2
+    assert sampler.summary()[0]["unfocused"]["seconds"] == 10.0
+
+
+def test_ring_keeps_the_newest_records():
+    ring = SampleRing(capacity=3)
+    for i in range(5):
+        ring.append(float(i), 1.0, 0.0, 0.0, 0, False)
+    assert len(ring) == 3
+    assert [ring.time[i] for i in ring.indices()] == [2.0, 3.0, 4.0]
@@ -0,0 +1,172 @@
+# --- PATH: GameFocusManager/tests/test_worker.py ---
+
+import pytest
+
+from benchmarks.focus_replay import FakeProcTree, VirtualClock
+from src.actuators import FakeActuator, MangoHudActuator
+from src.focus import FakeFocusSource, LocalFocusEmitter
+from src.lifecycle import ProcScanMonitor
+from src.procfs import ProcFS
+from src.worker import FocusWorker
+from tests.conftest import DUMMY_GAME
+
+
+@pytest.fixture
+def mangohud_dir(tmp_path):
+    return tmp_path / "MangoHud"
+
+
+def make_mangohud_worker(config_file, mangohud_dir):
+    procfs = ProcFS()
+    worker = FocusWorker(config_file, focus_source=LocalFocusEmitter(),
+                         actuator=MangoHudActuator(mangohud_dir / "MangoHud.conf"),
+                         procfs=procfs, process_monitor=ProcScanMonitor(procfs))
+    worker.start()
+    return worker
+
+
+def test_per_app_configs_exist_before_games_launch(write_config, mangohud_dir):
+    worker = make_mangohud_worker(write_config(games_to_watch=["witcher3.exe", "dota2"]), mangohud_dir)
+    try:
+        assert (mangohud_dir / "wine-witcher3.conf").read_text() == "fps_limit=144\n"
+        assert (mangohud_dir / "dota2.conf").read_text() == "fps_limit=144\n"
+        # Общий конфиг в режиме per-app не наш
+        assert not (mangohud_dir / "MangoHud.conf").exists()
+    finally:
+        worker.shutdown()
+
+
+def test_per_app_config_is_reset_after_the_game_exits(spawn_dummy, write_config, mangohud_dir):
+    game = spawn_dummy()
+    worker = make_mangohud_worker(write_config(), mangohud_dir)
+    try:
+        app_config = mangohud_dir / f"{DUMMY_GAME}.conf"
+        # Игра не в фокусе
+        assert app_config.read_text() == "fps_limit=5\n"
+
+        game.kill()
+        game.wait()
+        worker.refresh_games()
+        assert len(worker.games) == 0
+        assert app_config.read_text() == "fps_limit=144\n"
+    finally:
+        worker.shutdown()
+
+
+@pytest.fixture
+def proc(tmp_path):
+    return FakeProcTree(tmp_path / "proc")
+
+
+@pytest.fixture
+def make_fake_worker(proc, write_config):
+    """ Воркер на поддельных /proc, источнике фокуса (опрос) и актуаторе, с виртуальными часами. """
+    workers = []
+
+    def make(**config):
+        procfs = ProcFS(str(proc.root))
+        worker = FocusWorker(write_config(**dict({"games_to_watch": ["dota2", "cs2"], "mangohud_per_app": False},
+                                                 **config)),
+                             focus_source=FakeFocusSource(), actuator=FakeActuator(), procfs=procfs,
+                             process_monitor=ProcScanMonitor(procfs), clock=VirtualClock())
+        worker.start()
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.shutdown()
+
+
+def focus(worker, pid):
+    """ Активное окно сменилось на pid; воркер замечает это при следующем опросе. """
+    worker.focus_source.set_active(pid)
+    worker.clock.now += 1.0
+    worker.run_once(timeout=0)
+
+
+def test_focus_and_unfocus(proc, make_fake_worker):
+    proc.spawn(100, "dota2")
+    proc.spawn(200, "firefox")
+    worker = make_fake_worker()
+    # Игра запущена не в фокусе
+    assert worker.actuator.applied[-1] == (5, None)
+
+    focus(worker, 100)
+    assert worker.actuator.applied[-1] == (144, None)
+    assert worker.focused_instance.pid == 100 and worker.focused_instance.focused
+
+    focus(worker, 200)
+    assert worker.actuator.applied[-1] == (5, None)
+    assert worker.focused_instance is None
+    assert not any(instance.focused for instance in worker.games)
+
+    # Тот же PID при следующем опросе - ничего не применяется
+    applied = len(worker.actuator.applied)
+    focus(worker, 200)
+    assert len(worker.actuator.applied) == applied
+
+
+def test_helper_window_focuses_the_game(proc, make_fake_worker):
+    proc.spawn(100, "dota2")
+    proc.spawn(101, "steamwebhelper", ppid=100)
+    worker = make_fake_worker()
+
+    focus(worker, 101)
+    assert worker.actuator.applied[-1] == (144, None)
+    assert worker.focused_instance.pid == 100
+
+
+def test_game_exits_while_focused(proc, make_fake_worker):
+    proc.spawn(100, "dota2")
+    worker = make_fake_worker()
+    focus(worker, 100)
+
+    proc.exit(100)
+    worker._on_scan_timer()
+    assert len(worker.games) == 0
+    assert worker.focused_instance is None
+    assert worker.scheduler.committed is None
+    # Общий конфиг возвращается к активному лимиту, отслеживание фокуса выключено
+    assert worker.actuator.applied[-1] == (144, None)
+    assert not worker.focus_tracking
+
+
+def test_games_sharing_the_global_config(proc, make_fake_worker):
+    proc.spawn(100, "dota2")
+    proc.spawn(101, "cs2")
+    proc.spawn(200, "firefox")
+    worker = make_fake_worker(game_overrides={"cs2": {"fps_limit_inactive": 30}})
+    # Обе в фоне: побеждает более мягкий лимит
+    assert worker.actuator.applied[-1] == (30, None)
+
+    focus(worker, 100)
+    assert worker.actuator.applied[-1] == (144, None)
+    focus(worker, 101)
+    # Фокус перешёл к другой игре с той же целью - лимит остаётся активным
+    assert worker.actuator.applied[-1] == (144, None)
+    focus(worker, 200)
+    assert worker.actuator.applied[-1] == (30, None)
+
+
+def latest_limits(actuator) -> dict:
+    """ Последний лимит каждой цели (FakeActuator записывает и вызовы, которые ничего бы не изменили). """
+    return {target: limit for limit, target in actuator.applied}
+
+
+def test_per_app_targets_are_separate(proc, make_fake_worker):
+    proc.spawn(100, "dota2")
+    proc.spawn(101, "dota2")
+    proc.spawn(102, "cs2")
+    worker = make_fake_worker(mangohud_per_app=True)
+    assert latest_limits(worker.actuator) == {"dota2": 5, "cs2": 5}
+
+    focus(worker, 102)
+    assert latest_limits(worker.actuator) == {"dota2": 5, "cs2": 144}
+    # Общий конфиг в режиме per-app не трогается
+    assert None not in latest_limits(worker.actuator)
+
+    # Два экземпляра dota2 делят один per-app конфиг: фокус у одного - активный лимит
+    focus(worker, 101)
+    assert latest_limits(worker.actuator) == {"dota2": 144, "cs2": 5}
+    assert [instance.pid for instance in worker.games if instance.focused] == [101]
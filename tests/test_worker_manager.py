@@ -0,0 +1,50 @@
+# --- PATH: GameFocusManager/tests/test_worker_manager.py ---
+
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from src.config import CONFIG_ERROR_EXIT_CODE
+from src.worker_manager import WorkerManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """ WorkerManager, у которого конфиг, журнал, сокет и блокировка во временном каталоге. """
+    for name in ("XDG_CONFIG_HOME", "XDG_STATE_HOME", "XDG_CACHE_HOME", "XDG_RUNTIME_DIR"):
+        monkeypatch.setenv(name, str(tmp_path / name.lower()))
+    manager = WorkerManager()
+    yield manager
+    # Заодно отменяет перезапуск, если он был запланирован
+    manager.stop(timeout=1.0)
+
+
+def test_broken_config_is_not_restarted(manager):
+    manager.config_file.write_text("{ not json", encoding="utf-8")
+    exits = []
+    exited = threading.Event()
+    manager.add_exit_listener(lambda pid, returncode, restart_delay: (exits.append((returncode, restart_delay)),
+                                                                        exited.set()))
+
+    assert manager.start()
+    assert exited.wait(10.0)
+    # Перезапуск упал бы так же: ждём, пока пользователь исправит games.json
+    assert exits == [(CONFIG_ERROR_EXIT_CODE, None)]
+    assert manager._restart_timer is None
+
+
+def test_failed_stop_keeps_supervising(manager, monkeypatch):
+    # Воркер только что запущен: PID ещё не записан, команду stop он не принимает
+    monkeypatch.setattr(manager, "_lock_holder", lambda: -1)
+    monkeypatch.setattr(manager, "request", lambda cmd, **params: None)
+    assert not manager.stop(timeout=0.1)
+    assert not manager._stopping
+
+    # Падение после неудачной остановки по-прежнему приводит к перезапуску
+    process = subprocess.Popen([sys.executable, "-c", "raise SystemExit(1)"])
+    manager.process = process
+    manager._watch(process, threading.Event())
+    assert manager._restart_timer is not None
+    manager._cancel_restart()